@@ -0,0 +1,77 @@
+"""Hot reload of the bestiary catalogue against rebuilding it.
+
+Copies the bundled bestiary into a temporary directory and times a cold load,
+adding a second book, editing one record, and a full rebuild. Also checks that
+a record moved unchanged from one file to another stays in the catalogue, and
+that a reader's frame is never modified by a refresh.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_catalogue [source path]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bestiary.catalogue import Catalogue
+from bestiary.stat_block import row_id
+
+
+def write(path: Path, records: list) -> None:
+    path.write_text(json.dumps({"monster": records}), encoding="utf-8")
+    # Bump the mtime explicitly: several writes can land within one clock tick
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(path: str = "data/bestiary/bestiary-mm.json") -> None:
+    records = json.loads(Path(path).read_text(encoding="utf-8"))["monster"]
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        shutil.copy(path, directory / "a.json")
+        catalogue = Catalogue(directory)
+        change, ms = timed(catalogue.refresh)
+        print(f"cold load            {ms:8.1f} ms  ({len(change.added)} monsters)")
+
+        # A second book: every record again under a new source
+        snapshot = catalogue.df
+        book = [dict(r, source="XX") for r in records]
+        write(directory / "b.json", book)
+        change, ms = timed(catalogue.refresh)
+        print(f"add a second book    {ms:8.1f} ms  ({len(change.added)} added)")
+        assert len(change.added) == len(records) and len(catalogue.df) == 2 * len(records)
+        assert len(snapshot) == len(records)  # the frame a reader held was not touched
+
+        # One edited record
+        book[0] = dict(book[0], hp={"average": 1, "formula": "1d1"})
+        write(directory / "b.json", book)
+        change, ms = timed(catalogue.refresh)
+        print(f"edit one record      {ms:8.1f} ms  ({len(change.changed)} changed)")
+        assert change.changed == [row_id(book[0]["name"], "XX")]
+        assert catalogue.df.loc[change.changed[0], "hp_avg"] == 1
+        assert catalogue.df.index[len(records)] == change.changed[0]  # kept its row position
+
+        # Move the last record of b.json, unchanged, to a new file
+        moved = book.pop()
+        write(directory / "b.json", book)
+        write(directory / "a0.json", [moved])
+        change = catalogue.refresh()
+        assert not change, change
+        assert catalogue.get(row_id(moved["name"], "XX")) is not None
+
+        _, ms = timed(lambda: Catalogue(directory).refresh())
+        print(f"full rebuild         {ms:8.1f} ms  ({len(catalogue.df)} monsters)")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
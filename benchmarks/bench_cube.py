@@ -0,0 +1,96 @@
+"""Bestiary roll-ups from the aggregate cube versus pandas over the raw rows.
+
+The bundled bestiary is copied under several made-up sources to get a larger
+catalogue. Times the cube build, typical dashboard roll-ups, and single-monster
+updates; each roll-up is checked against the same statistics computed with a
+pandas group-by over one row per monster.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cube [copies] [repeats]
+"""
+import copy
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bestiary.cube import DIMENSIONS, FLAG_INDEX, StatCube, monster_facts
+from bestiary.decoder import load_bestiary_file
+from bestiary.stat_block import row_id
+
+QUERIES = [
+    ("median AC/HP/to-hit by CR", dict(metrics=("ac", "hp", "to_hit"), by=("cr",))),
+    ("HP by type and size", dict(metrics=("hp",), by=("type", "size"))),
+    ("CR 10+ fiends by CR", dict(metrics=("ac", "hp", "dc"), by=("cr",), where={"type": "fiend", "cr": (10, None)})),
+    ("dragons by source", dict(metrics=("to_hit",), by=("source",), where={"type": {"dragon"}})),
+]
+
+
+def facts_frame(statblocks) -> pd.DataFrame:
+    """One row per monster: its cell, its stats and whether it is immune to fire."""
+    rows = []
+    for sb in statblocks:
+        facts = monster_facts(sb)
+        rows.append(dict(zip(DIMENSIONS, facts.cell), **facts.metrics,
+                         fire_immune=FLAG_INDEX["immune:fire"] in facts.flags))
+    return pd.DataFrame(rows)
+
+
+def check(rollup: pd.DataFrame, frame: pd.DataFrame, metrics, by, where) -> None:
+    rows = frame
+    for dim, condition in (where or {}).items():
+        if dim == "cr":
+            lo, hi = condition
+            rows = rows[(rows.cr >= (lo if lo is not None else -1)) & (rows.cr <= (hi if hi is not None else 99))]
+        elif isinstance(condition, set):
+            rows = rows[rows[dim].isin(condition)]
+        else:
+            rows = rows[rows[dim] == condition]
+    grouped = rows.groupby(list(by))
+    assert (rollup["count"].to_numpy() == grouped.size().to_numpy()).all()
+    for metric in metrics:
+        for name, expected in (("mean", grouped[metric].mean()), ("median", grouped[metric].median()),
+                               ("p25", grouped[metric].quantile(0.25)), ("p75", grouped[metric].quantile(0.75))):
+            np.testing.assert_allclose(rollup[f"{metric}_{name}"].to_numpy(), expected.to_numpy(), equal_nan=True)
+
+
+def main(copies: int = 20, repeats: int = 20) -> None:
+    base = load_bestiary_file("data/bestiary/bestiary-mm.json").statblocks
+    statblocks = []
+    for i in range(copies):
+        for sb in base:
+            clone = copy.copy(sb)
+            clone.source = "MM" if i == 0 else f"HB{i}"
+            statblocks.append(clone)
+
+    start = time.perf_counter()
+    cube = StatCube(statblocks)
+    print(f"{len(cube)} monsters, cube built in {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({len(cube._keys)} cells)")
+    frame = facts_frame(statblocks)
+
+    for label, query in QUERIES:
+        best = min(cube.rollup(**query).milliseconds for _ in range(repeats))
+        check(cube.rollup(**query).frame, frame, query["metrics"], query["by"], query.get("where"))
+        print(f"{label:<28} cube {best:7.2f} ms")
+
+    share = cube.flag_share(["immune:fire"], by=("type",), where={"cr": (10, None)})
+    expected = frame[frame.cr >= 10].groupby("type")["fire_immune"].sum()
+    assert (share.frame["immune:fire"].to_numpy() == expected.to_numpy()).all()
+    print(f"{'fire immunity, CR 10+':<28} cube {share.milliseconds:7.2f} ms")
+
+    start = time.perf_counter()
+    for sb in base[:100]:
+        cube.add(row_id(sb.name, "NEW"), sb)
+    print(f"{'add a monster':<28} {(time.perf_counter() - start) / 100 * 1e6:8.1f} us")
+    start = time.perf_counter()
+    for sb in base[:100]:
+        cube.remove(row_id(sb.name, "NEW"))
+    print(f"{'remove a monster':<28} {(time.perf_counter() - start) / 100 * 1e6:8.1f} us")
+    check(cube.rollup(**QUERIES[0][1]).frame, frame, ("ac", "hp", "to_hit"), ("cr",), None)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
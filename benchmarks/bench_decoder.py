@@ -0,0 +1,251 @@
+"""Throughput of the 5etools monster decoder against the decoder it replaced.
+
+The old decoder (the nested-closure `bestiary.StatBlock.from_json` and
+`combat.StatBlock.from_dict` over the raw record) is frozen below as the
+reference; both build today's statblock classes, so only the decoding differs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_decoder [path/to/bestiary.json] [repeats]
+"""
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+from bestiary import StatBlock
+from bestiary.decoder import decode_monsters
+from bestiary.stat_block import (
+    AbilityScores,
+    Action,
+    CreatureType,
+    DamageModifier,
+    DamageModifierNote,
+    NestedEntry,
+    Speed,
+    SpeedEntry,
+    SpellSlot,
+    Spellcasting,
+)
+from combat import combatant
+
+
+# --- Old decoder (reference) ---
+
+
+def old_from_json(data: Dict[str, Any]) -> StatBlock:
+    name = data["name"]
+    size = data["size"]
+    type_ = data["type"]
+    if isinstance(type_, dict):
+        type_ = CreatureType(type_=type_["type"], tags=type_.get("tags"))
+    source = data["source"]
+    alignment = data["alignment"]
+
+    if isinstance(alignment, str):
+        alignment = [alignment]
+    if isinstance(alignment, list):
+        if len(alignment) > 0:
+            if isinstance(alignment[0], dict):
+                temp = []
+                for al in alignment:
+                    datat = dict(al)
+                    temp.append(",".join(datat["alignment"]) + f" {datat['chance']}%")
+                alignment = temp
+
+    ac = data["ac"]
+    hp = data["hp"]
+    speed = Speed(
+        modes={
+            key: (SpeedEntry(number=value) if isinstance(value, dict) else value)
+            for key, value in data["speed"].items()
+        }
+    )
+    abilities = AbilityScores(
+        str_=data["str"], dex_=data["dex"], con_=data["con"],
+        int_=data["int"], wis_=data["wis"], cha_=data["cha"],
+    )
+
+    saves = data.get("save")
+    skills = data.get("skill")
+
+    def parse_damage_modifiers(modifiers: Any, key) -> DamageModifier:
+        damage_modifier = DamageModifier()
+        if isinstance(modifiers, list):
+            for modifier in modifiers:
+                if isinstance(modifier, str):
+                    damage_modifier.entries.append(modifier)
+                else:
+                    if key in modifier:
+                        damage_modifier.entries.append(
+                            DamageModifierNote(types=modifier[key], note=modifier.get("note", ""))
+                        )
+                    else:
+                        damage_modifier.entries.append(modifier)
+        return damage_modifier
+
+    resist = parse_damage_modifiers(data.get("resist", []), "resist")
+    immune = parse_damage_modifiers(data.get("immune", []), "immune")
+    vulnerable = parse_damage_modifiers(data.get("vulnerable", []), "vulnerable")
+
+    conditionImmune = data.get("conditionImmune", [])
+
+    senses = data.get("senses")
+    passive = data.get("passive")
+    languages = data.get("languages")
+    cr = data.get("cr")
+
+    def parse_actions(actions: List[Dict[str, Any]]) -> List[Action]:
+        parsed_actions = []
+        for action in actions:
+            entries = []
+            for entry in action["entries"]:
+                if isinstance(entry, dict):
+                    entries.append(
+                        NestedEntry(type_=entry["type"], style=entry.get("style"), items=entry["items"])
+                    )
+                else:
+                    entries.append(entry)
+            parsed_actions.append(Action(name=action["name"], entries=entries))
+        return parsed_actions
+
+    trait = parse_actions(data.get("trait", []))
+    action = parse_actions(data.get("action", []))
+    legendary = parse_actions(data.get("legendary", [])) if "legendary" in data else None
+
+    page = data.get("page")
+
+    def parse_spellcasting(sc_data: Any) -> List[Spellcasting]:
+        result: List[Spellcasting] = []
+        for block in sc_data:
+            slots_map: Dict[int, SpellSlot] = {}
+            for lvl_str, info in block.get("spells", {}).items():
+                lvl = int(lvl_str)
+                slots = info.get("slots")
+                spells = info.get("spells", [])
+                slots_map[lvl] = SpellSlot(level=lvl, slots=slots, spells=spells)
+            result.append(
+                Spellcasting(
+                    name=block["name"],
+                    headerEntries=block.get("headerEntries", []),
+                    spells=slots_map,
+                    footerEntries=block.get("footerEntries"),
+                )
+            )
+        return result
+
+    spellcasting = parse_spellcasting(data.get("spellcasting", []))
+
+    return StatBlock(
+        name=name, size=size, type_=type_, source=source, alignment=alignment, ac=ac, hp=hp,
+        speed=speed, abilities=abilities, saves=saves, skills=skills, resist=resist, immune=immune,
+        vulnerable=vulnerable, conditionImmune=conditionImmune, senses=senses, passive=passive,
+        languages=languages, cr=cr, trait=trait, action=action, legendary=legendary, page=page,
+        spellcasting=spellcasting,
+    )
+
+
+def old_combat_from_dict(data: Dict[str, Any]) -> combatant.StatBlock:
+    Action = combatant.Action
+    return combatant.StatBlock(
+        name=data["name"],
+        size=data["size"],
+        creature_type=data["type"],
+        alignment=data.get("alignment", []),
+        source=data.get("source", ""),
+        armor_class=int(data["ac"].split()[0]) if isinstance(data["ac"], str) else data["ac"],
+        armor_desc=" ".join(data["ac"].split()[1:]) if isinstance(data["ac"], str) and " " in data["ac"] else None,
+        hit_dice=data["hp"]["formula"],
+        max_HP=data["hp"]["average"],
+        speed=combatant.Speed.from_dict(data.get("speed", {})),
+        abilities=combatant.Abilities(
+            str_=data["str"], dex_=data["dex"], con_=data["con"],
+            int_=data["int"], wis_=data["wis"], cha_=data["cha"]
+        ),
+        saves=data.get("save", {}),
+        skills=data.get("skill", {}),
+        senses=data.get("senses", ""),
+        passive_perception=data.get("passive", 10),
+        languages=data.get("languages", ""),
+        challenge_rating=data.get("cr", "0"),
+        traits=[Action(name=t["name"], entries=t.get("entries", [])) for t in data.get("trait", [])],
+        actions=[Action(name=a["name"], entries=a.get("entries", [])) for a in data.get("action", [])],
+        legendary=[Action(name=l["name"], entries=l.get("entries", [])) for l in data.get("legendary", [])],
+        legendary_group=data.get("legendaryGroup"),
+        page=data.get("page")
+    )
+
+
+def old_decode(records: List[Dict[str, Any]], combat: bool = False) -> int:
+    """Decode with the old functions, skipping records they reject; returns how many were skipped."""
+    skipped = 0
+    for record in records:
+        try:
+            old_from_json(record)
+            if combat:
+                old_combat_from_dict(record)
+        except (KeyError, ValueError, TypeError, AttributeError):
+            skipped += 1
+    return skipped
+
+
+# --- Benchmark ---
+
+
+def measure(label: str, fn, records: int, repeats: int) -> float:
+    fn()  # warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    elapsed = min(timings)  # least disturbed run
+    print(f"{label:<36} {elapsed * 1000:8.2f} ms  {records / elapsed:10.0f} records/s")
+    return elapsed
+
+
+def main(path: str = "data/bestiary/bestiary-mm.json", repeats: int = 20) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        records = json.load(f)["monster"]
+    n = len(records)
+    print(f"{n} records from {path}, {repeats} repeats; old decoder skips "
+          f"{old_decode(records)} (bestiary) / {old_decode(records, combat=True)} (both shapes)")
+
+    old = measure("old decoder (bestiary)", lambda: old_decode(records), n, repeats)
+    new = measure("decode_monsters (bestiary)", lambda: decode_monsters(records, path), n, repeats)
+    print(f"{'':<36} {old / new:8.2f}x")
+    old = measure("old decoder (bestiary + combat)", lambda: old_decode(records, combat=True), n, repeats)
+    new = measure("decode_monsters (bestiary + combat)", lambda: decode_monsters(records, path, combat=True), n, repeats)
+    print(f"{'':<36} {old / new:8.2f}x")
+
+    # Same values as the old decoder, with derived stats only built on first use
+    result = decode_monsters(records, path)
+    assert not result.errors
+    for record, sb in zip(records, result.statblocks):
+        reference = old_from_json(record)
+        assert "_derived" not in sb.__dict__
+        assert sb.derived == reference.derived
+        assert (sb.name, sb.alignment, sb.hp, sb.trait, sb.action) == (
+            reference.name, reference.alignment, reference.hp, reference.trait, reference.action)
+
+    # The cache follows in-place edits of scores, saves and skills on both shapes
+    result = decode_monsters(records, path, combat=True)
+    i = next(i for i, sb in enumerate(result.statblocks) if sb.saves and sb.skills)
+    for sb in (result.statblocks[i], result.combat[i]):
+        sb.derived
+        sb.saves["dex"] = "+5"
+        assert sb.derived.save("dex") == 5
+        sb.saves.update(dex="+7")
+        assert sb.derived.save("dex") == 7
+        del sb.saves["dex"]
+        assert sb.derived.save("dex") == sb.derived.modifier("dex")
+        sb.skills["stealth"] = "+9"
+        assert sb.derived.skill("stealth") == 9
+        sb.saves = {"con": "+4"}
+        assert sb.derived.save("con") == 4
+        sb.saves["con"] = "+6"
+        assert sb.derived.save("con") == 6
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *(int(a) for a in sys.argv[2:3]))
@@ -0,0 +1,35 @@
+"""Per-roll cost of the dice service against the stdlib `random` module.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dice [rolls] [repeats]
+"""
+import random
+import sys
+import time
+
+from combat.dice import Dice
+
+
+def measure(label: str, fn, rolls: int, repeats: int) -> None:
+    fn()  # warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    elapsed = min(timings)  # least disturbed run
+    print(f"{label:<36} {elapsed * 1e9 / rolls:8.1f} ns/roll")
+
+
+def main(rolls: int = 100_000, repeats: int = 5) -> None:
+    dice = Dice(seed=1)
+    print(f"{rolls} d6 rolls, {repeats} repeats")
+    measure("random.randint (one at a time)", lambda: [random.randint(1, 6) for _ in range(rolls)], rolls, repeats)
+    measure("Dice.d (one at a time)", lambda: [dice.d(6) for _ in range(rolls)], rolls, repeats)
+    measure("Dice.dice (one batch)", lambda: dice.dice(6, rolls), rolls, repeats)
+    measure("Dice.roll_hp 2d6 (one batch)", lambda: dice.roll_hp("2d6", rolls // 2), rolls, repeats)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,52 @@
+"""Typo-tolerant name search: a fresh query against a repeated one.
+
+A page rerun repeats the last query, which should be answered from the
+per-query cache; the repeat is checked to return the cached result. Re-adding
+every monster a few times (as repeated catalogue edits do) must not grow the
+index or change the answers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fuzzy [repeats]
+"""
+import sys
+import time
+
+from bestiary.decoder import load_bestiary_file
+from bestiary.fuzzy import NameIndex
+
+QUERIES = [("owlbaer", "Owlbear"), ("beholdr", "Beholder"), ("yng red drag", "Young Red Dragon"), ("gobl", "Goblin")]
+
+
+def main(repeats: int = 200) -> None:
+    statblocks = load_bestiary_file("data/bestiary/bestiary-mm.json").statblocks
+    index = NameIndex(statblocks)
+    print(f"{len(index)} monsters, {repeats} repeats")
+
+    for query, expected in QUERIES:
+        cold = []
+        for _ in range(repeats):
+            index._cache.clear()
+            start = time.perf_counter()
+            first = index.search(query)
+            cold.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            again = index.search(query)
+        cached = (time.perf_counter() - start) / repeats
+
+        assert first[0].name == expected, (query, first[0])
+        assert again is first  # the repeat was answered from the cache
+        assert len(index._cache) == 1
+        print(f"{query!r:<16} {first[0].name:<18} search {min(cold) * 1e6:7.1f} us, repeated {cached * 1e6:5.2f} us")
+
+    before = {query: index.search(query) for query, _ in QUERIES}
+    size = len(index._names)
+    for _ in range(5):
+        index.upsert(statblocks)
+    assert len(index._names) <= 2 * size, "tombstones of removed names are compacted"
+    assert {query: index.search(query) for query, _ in QUERIES} == before
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
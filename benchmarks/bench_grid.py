@@ -0,0 +1,94 @@
+"""Area-of-effect queries on a crowded battle map.
+
+Scatters tokens of mixed sizes over a square map, then times incremental moves
+and sphere / cone / line / cube queries against the spatial hash. Every query
+result is checked against a brute-force scan of all tokens.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_grid [tokens] [map squares per side] [queries]
+"""
+import sys
+import time
+
+import numpy as np
+
+from combat.grid import SQUARE_FEET, SpatialHash
+
+
+def brute_force(tokens: dict, inside) -> list:
+    hit = []
+    for id_, ((x, y), size) in tokens.items():
+        centers = np.array(
+            [((x + dx + 0.5) * SQUARE_FEET, (y + dy + 0.5) * SQUARE_FEET) for dx in range(size) for dy in range(size)]
+        )
+        if inside(centers).any():
+            hit.append(id_)
+    return sorted(hit)
+
+
+def main(tokens: int = 500, side: int = 200, queries: int = 1000) -> None:
+    rng = np.random.default_rng(7)
+    grid = SpatialHash()
+    placed = {}
+    start = time.perf_counter()
+    for i in range(tokens):
+        size = int(rng.choice([1, 1, 1, 1, 2, 2, 3, 4]))
+        pos = tuple(int(v) for v in rng.integers(0, side - size, 2))
+        grid.place(f"t{i}", pos, size)
+        placed[f"t{i}"] = (pos, size)
+    print(f"{tokens} tokens on {side}x{side} squares, {queries} queries per template")
+    print(f"{'place (all)':<10} {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    ids = list(placed)
+    start = time.perf_counter()
+    for _ in range(queries):
+        id_ = ids[int(rng.integers(len(ids)))]
+        (x, y), size = placed[id_]
+        pos = (int(np.clip(x + rng.integers(-6, 7), 0, side - size)), int(np.clip(y + rng.integers(-6, 7), 0, side - size)))
+        grid.place(id_, pos, size)
+        placed[id_] = (pos, size)
+    print(f"{'move':<10} {(time.perf_counter() - start) / queries * 1e6:8.1f} us/move")
+
+    def sphere(o, u, r):
+        return grid.sphere(o, r), lambda p: ((p - o) ** 2).sum(axis=1) <= r * r
+
+    def rect(o, u, length, width):
+        v = np.array([-u[1], u[0]])
+
+        def inside(p):
+            along, across = (p - o) @ u, (p - o) @ v
+            return (along >= 0) & (along <= length) & (np.abs(across) <= width / 2)
+        return inside
+
+    def cone(o, u, r):
+        v = np.array([-u[1], u[0]])
+
+        def inside(p):
+            along, across = (p - o) @ u, (p - o) @ v
+            return (along > 0) & (along <= r) & (np.abs(across) <= along / 2)
+        return grid.cone(o, u, r), inside
+
+    templates = {
+        "sphere": lambda o, u: sphere(o, u, 20),
+        "cone": lambda o, u: cone(o, u, 60),
+        "line": lambda o, u: (grid.line(o, u, 100), rect(o, u, 100, SQUARE_FEET)),
+        "cube": lambda o, u: (grid.cube(o, u, 30), rect(o, u, 30, 30)),
+    }
+    for name, template in templates.items():
+        origins = rng.uniform(0, side * SQUARE_FEET, (queries, 2))
+        angles = rng.uniform(0, 2 * np.pi, queries)
+        directions = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        elapsed = 0.0
+        hits = 0
+        for o, u in zip(origins, directions):
+            start = time.perf_counter()
+            result, inside = template(o, u)
+            elapsed += time.perf_counter() - start
+            assert result == brute_force(placed, inside), name
+            hits += len(result)
+        print(f"{name:<10} {elapsed / queries * 1e6:8.1f} us/query  ({hits / queries:.1f} tokens hit on average)")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
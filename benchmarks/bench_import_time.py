@@ -0,0 +1,99 @@
+"""Cold import time of the packages and first render time of each page.
+
+Every target is imported in a fresh interpreter with `-X importtime`; the best
+of a few runs is compared against its budget and the modules that cost the
+most are listed. Pages are rendered once with Streamlit's `AppTest` when
+Streamlit is installed. Exits with status 1 when anything is over budget.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import_time [repeats]
+"""
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Budgets in milliseconds
+IMPORT_BUDGETS = {
+    "import combat": 30,
+    "from combat import Encounter": 150,
+    "from combat import EncounterRegistry": 150,
+    "import bestiary": 100,
+    "import llm": 120,
+    "from bestiary.catalogue import Catalogue": 600,
+}
+PAGE_BUDGETS = {
+    "app.py": 1500,
+    "pages/1_Monsters_list.py": 5000,
+    "pages/2_Spell_list.py": 1500,
+    "pages/3_Magic_items.py": 1500,
+    "pages/4_Notes.py": 3000,
+    "pages/5_DnD_LLM.py": 4000,
+    "pages/6_Encounter_helper.py": 3000,
+    "pages/7_Bestiary_stats.py": 3000,
+}
+
+
+def import_profile(code: str) -> tuple[float, list[tuple[int, str]]]:
+    """Total import time (ms) of `code` in a fresh interpreter and per-module self times (us)."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    total = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us), name.strip()))
+        if not name.startswith("  "):  # top level: its cumulative time covers its children
+            total += int(cumulative)
+    return total / 1000, modules
+
+
+def check_imports(repeats: int) -> bool:
+    ok = True
+    for code, budget in IMPORT_BUDGETS.items():
+        runs = [import_profile(code) for _ in range(repeats)]
+        total, modules = min(runs, key=lambda run: run[0])  # least disturbed run
+        status = "ok" if total <= budget else "OVER BUDGET"
+        ok &= total <= budget
+        print(f"{code:<44} {total:8.1f} ms  (budget {budget} ms) {status}")
+        for self_us, name in sorted(modules, reverse=True)[:5]:
+            print(f"    {self_us / 1000:7.1f} ms  {name}")
+    return ok
+
+
+def check_pages() -> bool:
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("streamlit is not installed: page render times skipped")
+        return True
+    ok = True
+    os.chdir(ROOT)
+    for page, budget in PAGE_BUDGETS.items():
+        start = time.perf_counter()
+        app = AppTest.from_file(page, default_timeout=budget / 1000 * 4).run()
+        elapsed = (time.perf_counter() - start) * 1000
+        failed = bool(app.exception)
+        status = "FAILED" if failed else ("ok" if elapsed <= budget else "OVER BUDGET")
+        ok &= not failed and elapsed <= budget
+        print(f"{page:<44} {elapsed:8.1f} ms  (budget {budget} ms) {status}")
+    return ok
+
+
+def main(repeats: int = 3) -> None:
+    ok = check_imports(repeats)
+    ok &= check_pages()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,123 @@
+"""Entity linking over long session transcripts.
+
+Links every monster of the bundled bestiary plus a list of NPCs and places in
+synthetic transcripts fed in small chunks. Times the automaton build, linking
+throughput, a vocabulary edit (delta rebuild) against a full rebuild, and an
+"every session with X" lookup against rescanning the transcripts. Mentions are
+checked against a plain greedy matcher over the word list.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_linking [sessions] [words per session] [chunk size]
+"""
+import random
+import sys
+import time
+
+from bestiary.decoder import load_bestiary_file
+from notes import Entity, EntityLinker, Note, NoteStore
+from notes.linker import WORD_RE, _sequences
+
+FILLER = ("the party walks into a dark cave and the rogue checks for traps while the cleric "
+          "prays quietly then someone rolls initiative and everyone groans at the result").split()
+NPCS = ["Goblin King", "Sildar Hallwinter", "Gundren Rockseeker", "Iarno Albrek", "Nezznar"]
+PLACES = ["Phandalin", "Cragmaw Hideout", "Wave Echo Cave", "Tresendar Manor"]
+
+
+def transcript(rng: random.Random, words: int, names: list) -> str:
+    out = []
+    while len(out) < words:
+        if rng.random() < 0.04:
+            name = rng.choice(names)
+            name = name.upper() if rng.random() < 0.1 else name
+            out.append(name + rng.choice(["", "", "'s", "s", ",", "."]))
+        else:
+            out.append(rng.choice(FILLER))
+    return " ".join(out)
+
+
+def reference(vocabulary: dict, text: str) -> list:
+    """Greedy leftmost-longest over the word list, trying every length at every word."""
+    table = {}
+    for entity, aliases in vocabulary.items():
+        for words in _sequences(entity.name, aliases):
+            table.setdefault(words, []).append(entity)
+    longest = max(len(w) for w in table)
+    matches = list(WORD_RE.finditer(text))
+    words = [m.group().lower() for m in matches]
+    found, i = [], 0
+    while i < len(words):
+        for n in range(min(longest, len(words) - i), 0, -1):
+            entities = table.get(tuple(words[i:i + n]))
+            if entities:
+                found.extend((e, matches[i].start(), matches[i + n - 1].end()) for e in dict.fromkeys(entities))
+                i += n
+                break
+        else:
+            i += 1
+    return found
+
+
+def main(sessions: int = 20, words: int = 50_000, chunk: int = 4096) -> None:
+    rng = random.Random(5)
+    statblocks = load_bestiary_file("data/bestiary/bestiary-mm.json").statblocks
+
+    start = time.perf_counter()
+    linker = EntityLinker()
+    linker.add_statblocks(statblocks)
+    linker.set_vocabulary("npc", NPCS)
+    linker.set_vocabulary("place", PLACES)
+    linker.stream()
+    print(f"{len(linker)} entities, automaton built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    vocabulary = {Entity("monster", sb.name): sb.alias for sb in statblocks}
+    vocabulary.update({Entity("npc", name): () for name in NPCS})
+    vocabulary.update({Entity("place", name): () for name in PLACES})
+
+    names = [sb.name for sb in statblocks] + NPCS * 20 + PLACES * 20
+    texts = [transcript(rng, words, names) for _ in range(sessions)]
+    size = sum(len(t) for t in texts)
+
+    store = NoteStore()
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        chunks = (text[j:j + chunk] for j in range(0, len(text), chunk))
+        store.ingest(Note(f"s{i}", f"Session {i}", date=f"2026-{i // 28 + 1:02d}-{i % 28 + 1:02d}"), chunks, linker)
+    elapsed = time.perf_counter() - start
+    mentions = sum(store.entities().values())
+    print(f"linked {sessions} transcripts ({size / 1e6:.1f} MB) in {elapsed * 1000:.0f} ms: "
+          f"{size / elapsed / 1e6:.1f} MB/s, {mentions} mentions")
+
+    for i, text in enumerate(texts[:3]):
+        expected = reference(vocabulary, text)
+        got = [(e, s, t) for e, spans in store.postings[f"s{i}"].items() for s, t in spans]
+        assert sorted(got, key=lambda m: (m[1], str(m[0]))) == sorted(expected, key=lambda m: (m[1], str(m[0])))
+
+    # A match starting inside a mention that was already reported is dropped
+    overlap = EntityLinker()
+    overlap.set_vocabulary("npc", ["Alpha Beta", "Beta Gamma Delta"])
+    text = "alpha beta gamma delta"
+    expected = reference({Entity("npc", "Alpha Beta"): (), Entity("npc", "Beta Gamma Delta"): ()}, text)
+    assert [(m.entity, m.start, m.end) for m in overlap.link(text)] == expected == [(Entity("npc", "Alpha Beta"), 0, 10)]
+
+    start = time.perf_counter()
+    linker.add("npc", "Glasstaff", ["Iarno"])
+    linker.stream()
+    delta = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    linker.rebuild()
+    full = (time.perf_counter() - start) * 1000
+    print(f"add an NPC: {delta:.2f} ms (delta automaton), full rebuild {full:.1f} ms")
+
+    king = Entity("npc", "Goblin King")
+    start = time.perf_counter()
+    found = store.notes_with(king)
+    lookup = (time.perf_counter() - start) * 1e6
+    start = time.perf_counter()
+    scanned = [i for i, text in enumerate(texts) if any(m.entity == king for m in linker.link(text))]
+    scan = (time.perf_counter() - start) * 1000
+    assert sorted(note.id for note, _ in found) == sorted(f"s{i}" for i in scanned)
+    print(f"sessions with the Goblin King: {len(found)}; index {lookup:.0f} us, rescan {scan:.0f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -0,0 +1,123 @@
+"""Fan-out latency of the live player view.
+
+Connects many websocket subscribers (plus one that never reads) to a local
+broadcaster, drives an encounter through the registry and measures how long a
+delta takes to reach every reading subscriber.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_live_view [subscribers] [updates]
+"""
+import asyncio
+import base64
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from combat import Encounter, EncounterRegistry, default_encounter
+from combat.live import LiveBroadcaster, player_view, read_frame
+from combat.registry import DirectoryStorage
+
+
+async def connect(port: int, encounter_id: str):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        f"GET /ws?encounter={encounter_id} HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+        f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+    )
+    await writer.drain()
+    await reader.readuntil(b"\r\n\r\n")
+    return reader, writer
+
+
+async def rejected(port: int, encounter_id: str) -> bool:
+    """Whether the server turns the client away or hangs up on an oversized frame."""
+    reader, writer = await connect(port, encounter_id)
+    writer.write(bytes([0x81, 0xFF]) + (1 << 40).to_bytes(8, "big"))  # claims a 1 TiB payload
+    await writer.drain()
+    try:
+        await asyncio.wait_for(reader.read(), timeout=1)  # returns once the server hangs up
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        writer.close()
+
+
+async def subscriber(port: int, encounter_id: str, updates: int, arrivals: list, ready: asyncio.Event, counter: list):
+    reader, writer = await connect(port, encounter_id)
+    received = []
+    snapshot_seen = False
+    while True:
+        _, payload = await read_frame(reader)
+        message = json.loads(payload)
+        if message["type"] == "snapshot" and not snapshot_seen:
+            snapshot_seen = True
+            counter[0] += 1
+            if counter[0] == counter[1]:
+                ready.set()
+            continue
+        received.append((message["seq"], time.perf_counter(), len(payload)))
+        if message["seq"] >= updates + 1:
+            break
+    arrivals.append(received)
+    writer.close()
+
+
+async def run(subscribers: int, updates: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = EncounterRegistry(DirectoryStorage(tmp))
+        broadcaster = LiveBroadcaster(registry, port=0).start()
+        encounter_id = registry.create(Encounter.from_dict(Encounter(default_encounter).to_dict()))
+
+        # One client that connects and never reads: it must not slow the others down
+        stalled = await connect(broadcaster.port, encounter_id)
+
+        arrivals: list = []
+        ready = asyncio.Event()
+        counter = [0, subscribers]
+        tasks = [
+            asyncio.create_task(subscriber(broadcaster.port, encounter_id, updates, arrivals, ready, counter))
+            for _ in range(subscribers)
+        ]
+        await ready.wait()
+
+        sent = {}
+        for i in range(updates):
+            sent[i + 2] = time.perf_counter()  # the initial snapshot was seq 1; publishing is part of the latency
+            with registry.edit(encounter_id) as encounter:
+                combatant = encounter.combatants[i % len(encounter.combatants)]
+                combatant.HP = max(0, combatant.HP - 1) if i % 2 else combatant.HP + 1
+                if i % 5 == 4:
+                    encounter.next_turn()
+            await asyncio.sleep(0.002)
+        await asyncio.gather(*tasks)
+
+        latencies = [(t - sent[seq]) * 1000 for received in arrivals for seq, t, _ in received if seq in sent]
+        sizes = [size for received in arrivals for _, _, size in received]
+        snapshot_size = len(json.dumps(player_view(registry.get(encounter_id))))
+        print(f"{subscribers} subscribers (+1 stalled), {updates} updates")
+        print(f"delivered     {len(latencies)} / {subscribers * updates}")
+        print(f"latency  p50  {statistics.median(latencies):7.2f} ms")
+        print(f"latency  p99  {statistics.quantiles(latencies, n=100)[98]:7.2f} ms")
+        print(f"delta size    {statistics.mean(sizes):7.0f} B avg (full snapshot {snapshot_size} B)")
+
+        stalled[1].close()
+        await asyncio.sleep(0.05)
+        assert not broadcaster._channels, "channels are dropped with their last subscriber"
+        assert await rejected(broadcaster.port, "0123456789ab"), "unknown encounter ids are refused"
+        assert await rejected(broadcaster.port, encounter_id), "oversized frames close the connection"
+        assert not broadcaster._channels
+        broadcaster.stop()
+
+
+def main(subscribers: int = 50, updates: int = 200) -> None:
+    asyncio.run(run(subscribers, updates))
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
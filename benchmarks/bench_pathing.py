@@ -0,0 +1,126 @@
+"""Movement ranges of a whole encounter on a large terrain map.
+
+Builds a map with walls, difficult terrain, water and cliffs, then times the
+reach of every monster cold, again from the cache, and after small terrain
+edits (only fields near an edit are recomputed). Cached fields that survive an
+edit are checked against a fresh search, and a sample of fields against a
+brute-force relaxation over the whole map.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pathing [monsters] [map squares per side] [edits]
+"""
+import math
+import sys
+import time
+
+import numpy as np
+
+from combat.pathing import NEIGHBOURS, WALL, MovementProfile, Pathfinder, TerrainMap, _Layer, _step
+
+PROFILES = [
+    MovementProfile(walk=30),
+    MovementProfile(walk=30, size=2),
+    MovementProfile(walk=40, climb=30),
+    MovementProfile(walk=10, swim=40),
+    MovementProfile(walk=30, fly=60),
+    MovementProfile(walk=40, burrow=20, size=3),
+    MovementProfile(walk=40, fly=80, swim=40, size=4),
+]
+
+
+def build_map(side: int, rng: np.random.Generator) -> TerrainMap:
+    terrain = TerrainMap(side, side)
+    cells = rng.random((side, side))
+    terrain.kind[cells < 0.08] = 3  # walls
+    terrain.kind[(cells >= 0.08) & (cells < 0.2)] = 1  # difficult
+    for _ in range(side // 10):  # lakes
+        x, y = rng.integers(0, side, 2)
+        terrain.kind[max(x - 4, 0):x + 4, max(y - 4, 0):y + 4] = 2
+    for _ in range(side // 10):  # plateaus
+        x, y = rng.integers(0, side, 2)
+        terrain.elevation[max(x - 6, 0):x + 6, max(y - 6, 0):y + 6] = int(rng.choice([10, 20, 30]))
+    return terrain
+
+
+def brute_force(terrain: TerrainMap, start, profile: MovementProfile) -> dict:
+    """Relax every square until nothing improves (Bellman-Ford, no priority queue)."""
+    layer = _Layer(terrain, profile.size)
+    h = terrain.height
+    best = {start[0] * h + start[1]: 0}
+    changed = True
+    while changed:
+        changed = False
+        for i, spent in list(best.items()):
+            x, y = divmod(i, h)
+            for dx, dy in NEIGHBOURS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < terrain.width and 0 <= ny < h):
+                    continue
+                if dx and dy and (layer.kind[nx * h + y] == WALL or layer.kind[x * h + ny] == WALL):
+                    continue
+                j = nx * h + ny
+                after = _step(spent, layer.kind[j], layer.elevation[j] - layer.elevation[i], profile)
+                if after < best.get(j, math.inf):
+                    best[j] = after
+                    changed = True
+    return best
+
+
+def main(monsters: int = 100, side: int = 300, edits: int = 20) -> None:
+    rng = np.random.default_rng(11)
+    terrain = build_map(side, rng)
+    finder = Pathfinder(terrain)
+    tokens = []
+    for _ in range(monsters):
+        profile = PROFILES[int(rng.integers(len(PROFILES)))]
+        while True:
+            x, y = (int(v) for v in rng.integers(0, side - profile.size, 2))
+            if not terrain.kind[x:x + profile.size, y:y + profile.size].any():
+                break
+        tokens.append(((x, y), profile))
+    print(f"{monsters} monsters on {side}x{side} squares")
+
+    start = time.perf_counter()
+    finder._layer(1)
+    print(f"{'layers':<22} {(time.perf_counter() - start) * 1000:8.2f} ms (size 1)")
+
+    start = time.perf_counter()
+    squares = sum(len(finder.reach(pos, profile)) for pos, profile in tokens)
+    print(f"{'cold ranges':<22} {(time.perf_counter() - start) * 1000:8.2f} ms  ({squares / monsters:.0f} squares each)")
+
+    start = time.perf_counter()
+    for pos, profile in tokens:
+        finder.reach(pos, profile)
+    print(f"{'cached ranges':<22} {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    for pos, profile in tokens[:5]:
+        assert finder.reach(pos, profile)._cost == brute_force(terrain, pos, profile)
+
+    elapsed = 0.0
+    recomputed = 0
+    for _ in range(edits):
+        x, y = (int(v) for v in rng.integers(0, side, 2))
+        kind = ["open", "difficult", "water", "wall"][int(rng.integers(4))]
+        start = time.perf_counter()
+        terrain.paint([(x, y), (x + 1, y)] if x + 1 < side else [(x, y)], kind=kind)
+        before = len(finder._cache)
+        for pos, profile in tokens:
+            finder.reach(pos, profile)
+        elapsed += time.perf_counter() - start
+        recomputed += monsters - before
+    print(f"{'edit + all ranges':<22} {elapsed / edits * 1000:8.2f} ms/edit  ({recomputed / edits:.1f} fields recomputed)")
+
+    fresh = Pathfinder(terrain)
+    for pos, profile in tokens:
+        assert finder.reach(pos, profile)._cost == fresh.reach(pos, profile)._cost, (pos, profile)
+
+    pos, profile = tokens[0]
+    start = time.perf_counter()
+    route = finder.path(pos, (side - 1 - pos[0], side - 1 - pos[1]), profile)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{'A* across the map':<22} {elapsed:8.2f} ms  ({route[0] if route else 'no route'} ft)")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .decoder import DecodeError, decode_monster
+from .stat_block import StatBlock, row_id
+
+# Live catalogue of every monster under data/bestiary/.
+#
+# `refresh()` stats the bestiary files; only files whose mtime or size moved are
+# re-read, and inside those only records whose content hash changed are decoded
+# again. The DataFrame and any subscribed indexes are patched with the
+# added/changed/removed rows instead of being rebuilt.
+#
+# `df` is never modified in place: a refresh builds the patched frame next to
+# it and swaps it in under `lock`, so a reader that took `catalogue.df` once
+# keeps a consistent frame for the whole page run.
+
+
+def record_digest(record: dict) -> str:
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class CatalogueEntry:
+    id: str
+    digest: str
+    path: Path
+    statblock: StatBlock
+
+
+@dataclass
+class CatalogueChange:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class Catalogue:
+    def __init__(self, directory: str | Path = "data/bestiary", pattern: str = "*.json"):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.entries: Dict[str, CatalogueEntry] = {}
+        self.df = pd.DataFrame()
+        self.errors: Dict[Path, List[DecodeError]] = {}
+        self.lock = threading.RLock()
+        self._stats: Dict[Path, Tuple[int, int]] = {}
+        self._file_ids: Dict[Path, List[str]] = {}
+        self._listeners: List[Callable[["Catalogue", CatalogueChange], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- Queries ---
+
+    def statblocks(self) -> List[StatBlock]:
+        return [entry.statblock for entry in self.entries.values()]
+
+    def get(self, id_: str) -> Optional[StatBlock]:
+        entry = self.entries.get(id_)
+        return entry.statblock if entry else None
+
+    def record(self, id_: str) -> Optional[dict]:
+        """The raw record behind `id_`, read back from its file (for the few callers that need more than the statblock)."""
+        entry = self.entries.get(id_)
+        if entry is None:
+            return None
+        for record in self._read_file(entry.path):
+            if isinstance(record, dict) and row_id(record.get("name", ""), record.get("source", "")) == id_:
+                return record
+        return None
+
+    def subscribe(self, listener: Callable[["Catalogue", CatalogueChange], None]) -> None:
+        """Call `listener(catalogue, change)` after every refresh that changed something."""
+        self._listeners.append(listener)
+
+    # --- Loading ---
+
+    def _changed_files(self) -> Tuple[List[Path], List[Path]]:
+        current = {}
+        for path in sorted(self.directory.glob(self.pattern)):
+            st = path.stat()
+            current[path] = (st.st_mtime_ns, st.st_size)
+        modified = [p for p, stat in current.items() if self._stats.get(p) != stat]
+        deleted = [p for p in self._stats if p not in current]
+        self._stats = current
+        return modified, deleted
+
+    def _read_file(self, path: Path) -> List[dict]:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f).get("monster", [])
+
+    def _reload_file(self, path: Path, records: List[dict], change: CatalogueChange, rows: Dict[str, dict]) -> None:
+        seen = []
+        errors = []
+        for index, record in enumerate(records):
+            try:
+                id_ = row_id(record["name"], record["source"])
+            except (KeyError, TypeError) as e:
+                errors.append(DecodeError(path.name, index, None, e))
+                continue
+            digest = record_digest(record)
+            entry = self.entries.get(id_)
+            seen.append(id_)
+            if entry is not None and entry.digest == digest:
+                entry.path = path  # unchanged, but it may have moved here from another file
+                continue
+            try:
+                statblock = decode_monster(record, source=path.name, index=index)
+            except DecodeError as e:
+                errors.append(e)
+                seen.pop()
+                continue
+            (change.changed if entry is not None else change.added).append(id_)
+            self.entries[id_] = CatalogueEntry(id_, digest, path, statblock)
+            rows[id_] = statblock.to_pandas_row()
+
+        self.errors[path] = errors
+        self._file_ids[path] = seen
+
+    def _drop_removed(self, previous: Dict[Path, List[str]], change: CatalogueChange) -> None:
+        """Drop ids that were in a re-read or deleted file and are now in none of them.
+
+        Decided after every modified file is read, so a record that moved from
+        one file to another is kept.
+        """
+        for path, ids in previous.items():
+            current = set(self._file_ids.get(path, ()))
+            for id_ in ids:
+                entry = self.entries.get(id_)
+                if entry is not None and entry.path == path and id_ not in current:
+                    del self.entries[id_]
+                    change.removed.append(id_)
+
+    def _patched_frame(self, change: CatalogueChange, rows: Dict[str, dict]) -> pd.DataFrame:
+        """The frame with `change` applied, built as a new object; `self.df` is left alone."""
+        df = self.df
+        if change.removed:
+            df = df.drop(index=change.removed, errors="ignore")
+        if not rows:
+            return df
+        new = pd.DataFrame.from_records(list(rows.values()), index=list(rows.keys()))
+        if df.empty:
+            return new
+        # Changed rows keep their position, added ones go at the end; one concat either way
+        changed = new.index.isin(df.index)
+        order = df.index.append(new.index[~changed])
+        if changed.any():
+            df = df.drop(index=new.index[changed])
+        return pd.concat([df, new]).reindex(order)
+
+    def refresh(self) -> CatalogueChange:
+        """Pick up added, edited and deleted bestiary files; returns what changed."""
+        with self.lock:
+            change = CatalogueChange()
+            modified, deleted = self._changed_files()
+            if not modified and not deleted:
+                return change
+            loaded: Dict[Path, List[dict]] = {}
+            for path in modified:
+                try:
+                    loaded[path] = self._read_file(path)
+                except (OSError, ValueError) as e:
+                    # Half-written file or invalid JSON: keep the previous records, retry next time
+                    self.errors[path] = [DecodeError(path.name, -1, None, e)]
+                    self._stats.pop(path, None)
+            previous = {path: self._file_ids.get(path, []) for path in [*deleted, *loaded]}
+            for path in deleted:
+                self._file_ids.pop(path, None)
+                self.errors.pop(path, None)
+            rows: Dict[str, dict] = {}
+            for path, records in loaded.items():
+                self._reload_file(path, records, change, rows)
+            self._drop_removed(previous, change)
+            self.df = self._patched_frame(change, rows)
+            if change:
+                for listener in self._listeners:
+                    listener(self, change)
+            return change
+
+    # --- Watching ---
+
+    def watch(self, interval: float = 0.25) -> None:
+        """Refresh from a daemon thread every `interval` seconds."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=loop, name="bestiary-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
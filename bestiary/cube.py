@@ -0,0 +1,316 @@
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .catalogue import Catalogue, CatalogueChange
+from .stat_block import Action, CreatureType, DamageModifier, NestedEntry, StatBlock, row_id
+
+# Aggregate cube of the bestiary for balance questions ("median HP by CR",
+# "share of CR 10+ fiends immune to fire").
+#
+# Monsters are binned into cells by CR x type x size x source. A cell holds,
+# for each numeric stat, a histogram of the values seen (stats are small
+# integers, so a histogram is exact and tiny), plus a count per flag. Counts
+# add up, so any roll-up (group by some dimensions, filter on others) is a sum
+# of cell rows, and means, medians and quantiles come out of the summed
+# histogram. Adding or removing a monster touches one cell.
+
+DIMENSIONS = ("cr", "type", "size", "source")
+METRICS = ("ac", "hp", "to_hit", "dc", "str", "dex", "con", "int", "wis", "cha", "passive", "walk", "fly")
+DAMAGE_TYPES = (
+    "acid", "bludgeoning", "cold", "fire", "force", "lightning", "necrotic",
+    "piercing", "poison", "psychic", "radiant", "slashing", "thunder",
+)
+CONDITIONS = (
+    "blinded", "charmed", "deafened", "exhaustion", "frightened", "grappled", "incapacitated",
+    "invisible", "paralyzed", "petrified", "poisoned", "prone", "restrained", "stunned", "unconscious",
+)
+FLAGS = (
+    tuple(f"{kind}:{damage}" for kind in ("immune", "resist", "vulnerable") for damage in DAMAGE_TYPES)
+    + tuple(f"condition:{condition}" for condition in CONDITIONS)
+    + ("has:legendary", "has:lair", "has:spellcasting", "speed:fly", "speed:swim", "speed:burrow", "speed:climb")
+)
+FLAG_INDEX = {flag: i for i, flag in enumerate(FLAGS)}
+
+HIT_RE = re.compile(r"\{@hit ([+-]?\d+)\}")
+DC_RE = re.compile(r"(?:\{@dc |\bDC )(\d+)")
+
+Cell = Tuple[float, str, str, str]
+
+
+# --- Facts ---
+
+
+def _entry_texts(entries) -> Iterable[str]:
+    for entry in entries:
+        if isinstance(entry, NestedEntry):
+            for item in entry.items:
+                yield item.get("entry", "") if isinstance(item, dict) else str(item)
+        else:
+            yield str(entry)
+
+
+def _damage_types(modifier: DamageModifier) -> Set[str]:
+    types = set()
+    for entry in modifier.entries:
+        types.update(entry.types if hasattr(entry, "types") else [str(entry)])
+    return types
+
+
+def _speed(sb: StatBlock, mode: str) -> Optional[int]:
+    value = sb.speed.modes.get(mode)
+    return getattr(value, "number", value) if value is not None else None
+
+
+@dataclass(frozen=True)
+class MonsterFacts:
+    cell: Cell
+    metrics: Dict[str, int]  # stats the monster has; a missing one (no attack roll) is left out
+    flags: Tuple[int, ...]  # indices into FLAGS
+
+
+def monster_facts(sb: StatBlock) -> MonsterFacts:
+    creature_type = sb.type_.type_ if isinstance(sb.type_, CreatureType) else sb.type_
+    derived = sb.derived
+    actions: List[Action] = sb.trait + sb.action + (sb.legendary or [])
+    text = " ".join(t for a in actions for t in _entry_texts(a.entries))
+    text += " " + " ".join(" ".join(block.headerEntries) for block in sb.spellcasting or [])
+    hits = [int(h) for h in HIT_RE.findall(text)]
+    dcs = [int(d) for d in DC_RE.findall(text)]
+
+    metrics = dict(zip(("str", "dex", "con", "int", "wis", "cha"), derived.scores))
+    metrics["ac"] = derived.ac
+    candidates = {
+        "hp": sb.hp.get("average"),
+        "to_hit": max(hits, default=None),
+        "dc": max(dcs, default=None),
+        "passive": sb.passive,
+        "walk": _speed(sb, "walk"),
+        "fly": _speed(sb, "fly"),
+    }
+    metrics.update({k: int(v) for k, v in candidates.items() if isinstance(v, (int, float))})
+
+    flags = {f"{kind}:{damage}" for kind in ("immune", "resist", "vulnerable")
+             for damage in _damage_types(getattr(sb, kind))}
+    flags |= {f"condition:{c}" for c in sb.conditionImmune if isinstance(c, str)}
+    if sb.legendary:
+        flags.add("has:legendary")
+    if sb.legendaryGroup:
+        flags.add("has:lair")
+    if sb.spellcasting:
+        flags.add("has:spellcasting")
+    flags |= {f"speed:{mode}" for mode in ("fly", "swim", "burrow", "climb") if _speed(sb, mode)}
+
+    cell = (float(derived.cr), str(creature_type).lower(), str(sb.size)[:1].upper(), sb.source)
+    return MonsterFacts(cell, metrics, tuple(sorted(FLAG_INDEX[f] for f in flags if f in FLAG_INDEX)))
+
+
+# --- Cube ---
+
+
+class _Histograms:
+    """Counts of each value per cell for one metric; a column per distinct value, grown as needed."""
+
+    def __init__(self, cells: int):
+        self.values: List[int] = []
+        self.column: Dict[int, int] = {}
+        self.counts = np.zeros((cells, 8), dtype=np.int32)
+
+    def grow_cells(self, cells: int) -> None:
+        self.counts = np.vstack([self.counts, np.zeros((cells - len(self.counts), self.counts.shape[1]), np.int32)])
+
+    def add(self, cell: int, value: int, delta: int) -> None:
+        col = self.column.get(value)
+        if col is None:
+            col = self.column[value] = len(self.values)
+            self.values.append(value)
+            if col == self.counts.shape[1]:
+                self.counts = np.hstack([self.counts, np.zeros_like(self.counts)])
+        self.counts[cell, col] += delta
+
+
+@dataclass
+class Rollup:
+    frame: pd.DataFrame
+    cells: int  # cells summed
+    milliseconds: float
+
+
+class StatCube:
+    def __init__(self, statblocks: Iterable[StatBlock] = (), quantiles: Sequence[float] = (0.25, 0.75)):
+        self.quantiles = tuple(quantiles)
+        self._cells: Dict[Cell, int] = {}
+        self._keys: List[Cell] = []
+        self._dims: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}  # see _dimension
+        capacity = 64
+        self._monsters = np.zeros(capacity, dtype=np.int32)
+        self._flags = np.zeros((capacity, len(FLAGS)), dtype=np.int32)
+        self._histograms = {metric: _Histograms(capacity) for metric in METRICS}
+        self._facts: Dict[str, MonsterFacts] = {}  # row id -> what was added, so it can be taken out again
+        for sb in statblocks:
+            self.add(row_id(sb.name, sb.source), sb)
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    # --- Updates ---
+
+    def _cell(self, key: Cell) -> int:
+        index = self._cells.get(key)
+        if index is None:
+            index = self._cells[key] = len(self._keys)
+            self._keys.append(key)
+            self._dims = {}
+            if index == len(self._monsters):
+                capacity = 2 * len(self._monsters)
+                self._monsters = np.concatenate([self._monsters, np.zeros_like(self._monsters)])
+                self._flags = np.vstack([self._flags, np.zeros_like(self._flags)])
+                for histograms in self._histograms.values():
+                    histograms.grow_cells(capacity)
+        return index
+
+    def _apply(self, facts: MonsterFacts, delta: int) -> None:
+        cell = self._cell(facts.cell)
+        self._monsters[cell] += delta
+        self._flags[cell, list(facts.flags)] += delta
+        for metric, value in facts.metrics.items():
+            self._histograms[metric].add(cell, value, delta)
+
+    def add(self, id_: str, sb: StatBlock) -> None:
+        self.remove(id_)
+        facts = self._facts[id_] = monster_facts(sb)
+        self._apply(facts, 1)
+
+    def remove(self, id_: str) -> None:
+        facts = self._facts.pop(id_, None)
+        if facts is not None:
+            self._apply(facts, -1)
+
+    def apply_change(self, catalogue: Catalogue, change: CatalogueChange) -> None:
+        """`Catalogue.subscribe` hook."""
+        for id_ in change.removed:
+            self.remove(id_)
+        for id_ in change.added + change.changed:
+            self.add(id_, catalogue.get(id_))
+
+    # --- Roll-ups ---
+
+    def _dimension(self, name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Value of a dimension per cell, its sorted distinct values, and each cell's code into those.
+
+        Rebuilt only when a new cell appears.
+        """
+        if not self._dims:
+            columns = list(zip(*self._keys)) if self._keys else [()] * len(DIMENSIONS)
+            for dim, values in zip(DIMENSIONS, columns):
+                values = np.array(values, dtype=float if dim == "cr" else object)
+                distinct, codes = np.unique(values, return_inverse=True)
+                self._dims[dim] = values, distinct, codes
+        return self._dims[name]
+
+    def _select(self, where: Optional[dict]) -> np.ndarray:
+        """Cells matching `where`: {"cr": (lo, hi)} with None for open ends, else a value or a collection of values."""
+        mask = self._monsters[:len(self._keys)] > 0
+        for dim, condition in (where or {}).items():
+            values = self._dimension(dim)[0]
+            if dim == "cr" and isinstance(condition, tuple):
+                lo, hi = condition
+                if lo is not None:
+                    mask &= values >= lo
+                if hi is not None:
+                    mask &= values <= hi
+            elif isinstance(condition, (list, set, frozenset, tuple)):
+                mask &= np.isin(values, list(condition))
+            else:
+                mask &= values == condition
+        return np.flatnonzero(mask)
+
+    def _groups(self, cells: np.ndarray, by: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, pd.Index]:
+        """Selected cells ordered by group, where each group starts, and the group keys (sorted)."""
+        combined = np.zeros(len(cells), dtype=np.int64)
+        radices = []
+        for dim in by:
+            _, distinct, codes = self._dimension(dim)
+            combined = combined * len(distinct) + codes[cells]
+            radices.append(distinct)
+        keys, inverse = np.unique(combined, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        starts = np.searchsorted(inverse[order], np.arange(len(keys)))
+        if not by:
+            return cells[order], starts, pd.Index(["all"][:len(keys)])
+        levels = []
+        for distinct in reversed(radices):
+            levels.append(distinct[keys % len(distinct)])
+            keys = keys // len(distinct)
+        levels.reverse()
+        index = pd.MultiIndex.from_arrays(levels, names=list(by)) if len(by) > 1 else pd.Index(levels[0], name=by[0])
+        return cells[order], starts, index
+
+    @staticmethod
+    def _sum(rows: np.ndarray, cells: np.ndarray, starts: np.ndarray) -> np.ndarray:
+        """Per-group sums of the rows of the (group-ordered) cells."""
+        if not len(cells):
+            return np.zeros((0,) + rows.shape[1:], dtype=np.int64)
+        return np.add.reduceat(rows[cells].astype(np.int64), starts, axis=0)
+
+    def _quantiles(self, counts: np.ndarray, values: np.ndarray, qs: Sequence[float]) -> np.ndarray:
+        """Linearly interpolated quantiles (as pandas computes them) of each row's histogram."""
+        n = counts.sum(axis=1)
+        cumulative = counts.cumsum(axis=1)
+        out = np.full((len(counts), len(qs)), np.nan)
+        for j, q in enumerate(qs):
+            position = q * np.maximum(n - 1, 0)
+            lo, hi = np.floor(position), np.ceil(position)
+            # Value at rank r (0-based): first bin whose cumulative count exceeds r
+            at_lo = values[np.minimum((cumulative <= lo[:, None]).sum(axis=1), len(values) - 1)]
+            at_hi = values[np.minimum((cumulative <= hi[:, None]).sum(axis=1), len(values) - 1)]
+            out[:, j] = np.where(n > 0, at_lo + (at_hi - at_lo) * (position - lo), np.nan)
+        return out
+
+    def rollup(self, metrics: Sequence[str] = ("ac", "hp", "to_hit"), by: Sequence[str] = ("cr",),
+               where: Optional[dict] = None) -> Rollup:
+        """Count, mean, median and quantiles of `metrics`, grouped by some dimensions and filtered on others."""
+        start = time.perf_counter()
+        cells, starts, index = self._groups(self._select(where), by)
+        columns = {"count": self._sum(self._monsters, cells, starts)}
+        qs = (0.5,) + self.quantiles
+        for metric in metrics:
+            histograms = self._histograms[metric]
+            if not histograms.values:
+                continue
+            order = np.argsort(histograms.values)
+            values = np.asarray(histograms.values, dtype=float)[order]
+            counts = self._sum(histograms.counts[:, :len(order)], cells, starts)[:, order]
+            n = counts.sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                columns[f"{metric}_mean"] = np.where(n > 0, counts @ values / n, np.nan)
+            quantiles = self._quantiles(counts, values, qs)
+            columns[f"{metric}_median"] = quantiles[:, 0]
+            for j, q in enumerate(self.quantiles, 1):
+                columns[f"{metric}_p{round(q * 100)}"] = quantiles[:, j]
+        frame = pd.DataFrame(columns, index=index)
+        return Rollup(frame, len(cells), (time.perf_counter() - start) * 1000)
+
+    def flag_share(self, flags: Sequence[str], by: Sequence[str] = ("cr",), where: Optional[dict] = None) -> Rollup:
+        """How many monsters in each group have each flag ("immune:fire", "has:legendary", ...), and what share."""
+        start = time.perf_counter()
+        cells, starts, index = self._groups(self._select(where), by)
+        total = self._sum(self._monsters, cells, starts)
+        columns = {"count": total}
+        counts = self._sum(self._flags, cells, starts)
+        for flag in flags:
+            with_flag = counts[:, FLAG_INDEX[flag]]
+            columns[flag] = with_flag
+            with np.errstate(invalid="ignore", divide="ignore"):
+                columns[f"{flag} share"] = np.where(total > 0, with_flag / total, np.nan)
+        frame = pd.DataFrame(columns, index=index)
+        return Rollup(frame, len(cells), (time.perf_counter() - start) * 1000)
+
+    def values(self, dimension: str) -> list:
+        """Values of a dimension present in the cube, for filter widgets."""
+        cells = self._select(None)
+        return sorted(set(self._dimension(dimension)[0][cells].tolist()))
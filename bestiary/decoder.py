@@ -0,0 +1,322 @@
+import json
+import re
+from dataclasses import MISSING, dataclass, field, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .stat_block import (
+    Action,
+    AbilityScores,
+    CreatureType,
+    DamageModifier,
+    DamageModifierNote,
+    NestedEntry,
+    Speed,
+    SpeedEntry,
+    SpellSlot,
+    Spellcasting,
+    StatBlock,
+)
+from .derived import TrackedDict, parse_ac
+from .legendary import LegendaryGroupRef
+
+# Schema-driven decoder for 5etools monster records.
+#
+# Every top-level key of a record is looked up once in FIELDS, a dispatch table
+# built at import, and decoded straight into the keyword arguments of
+# `bestiary.StatBlock`. When the combat shape is requested it is assembled from
+# those already-decoded values, so each record is walked exactly once.
+
+ABILITY_KEYS = ("str", "dex", "con", "int", "wis", "cha")
+REQUIRED = frozenset(("name", "size", "type", "source", "ac", "hp", "speed") + ABILITY_KEYS)
+RECHARGE_RE = re.compile(r"\(Recharge (\d)")
+
+
+class DecodeError(ValueError):
+    """A malformed monster record, with where it came from."""
+
+    def __init__(self, source: str, index: int, name: Optional[str], cause: Exception | str):
+        self.source = source
+        self.index = index
+        self.name = name
+        self.cause = cause
+        label = f"{source}[{index}]" + (f" ({name})" if name else "")
+        super().__init__(f"{label}: {cause}")
+
+
+# --- Value decoders ---
+
+
+def _creature_type(value):
+    if type(value) is dict:
+        return CreatureType(type_=value["type"], tags=value.get("tags"))
+    return value
+
+
+def _alignment(value):
+    if type(value) is str:
+        return [value]
+    out = []
+    for item in value:
+        if type(item) is dict:
+            out.append(",".join(item["alignment"]) + f" {item['chance']}%")
+        else:
+            out.append(item)
+    return out
+
+
+def _speed(value: Dict[str, Any]) -> Speed:
+    modes = {}
+    for mode, speed in value.items():
+        if type(speed) is dict:
+            condition = speed.get("condition")
+            modes[mode] = SpeedEntry(
+                number=speed["number"], condition=condition.strip().strip("()") if condition else None
+            )
+        else:
+            modes[mode] = speed
+    return Speed(modes=modes)
+
+
+def _damage_modifier(key: str) -> Callable[[List[Any]], DamageModifier]:
+    def decode(value: List[Any]) -> DamageModifier:
+        entries = []
+        for entry in value:
+            if type(entry) is dict and key in entry:
+                entries.append(DamageModifierNote(types=entry[key], note=entry.get("note", "")))
+            else:
+                entries.append(entry)
+        return DamageModifier(entries=entries)
+
+    return decode
+
+
+def _nested_entry(entry: Dict[str, Any]) -> NestedEntry:
+    return NestedEntry(type_=entry["type"], style=entry.get("style"), items=entry.get("items", []))
+
+
+ENTRY_DECODERS: Dict[type, Callable[[Any], Any]] = {
+    str: lambda entry: entry,
+    dict: _nested_entry,
+}
+
+
+def _actions(value: List[Dict[str, Any]]) -> List[Action]:
+    return [
+        Action(name=action["name"], entries=[ENTRY_DECODERS[type(e)](e) for e in action["entries"]])
+        for action in value
+    ]
+
+
+def _spellcasting(value: List[Dict[str, Any]]) -> List[Spellcasting]:
+    result = []
+    for block in value:
+        slots_map = {}
+        for lvl_str, info in block.get("spells", {}).items():
+            lvl = int(lvl_str)
+            slots_map[lvl] = SpellSlot(level=lvl, slots=info.get("slots"), spells=info.get("spells", []))
+        result.append(
+            Spellcasting(
+                name=block["name"],
+                headerEntries=block.get("headerEntries", []),
+                spells=slots_map,
+                footerEntries=block.get("footerEntries"),
+            )
+        )
+    return result
+
+
+def _same(value):
+    return value
+
+
+# raw key -> (StatBlock field, decoder)
+FIELDS: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    "name": ("name", _same),
+    "alias": ("alias", _same),
+    "size": ("size", _same),
+    "type": ("type_", _creature_type),
+    "source": ("source", _same),
+    "alignment": ("alignment", _alignment),
+    "ac": ("ac", _same),
+    "hp": ("hp", _same),
+    "speed": ("speed", _speed),
+    "save": ("saves", TrackedDict),
+    "skill": ("skills", TrackedDict),
+    "resist": ("resist", _damage_modifier("resist")),
+    "immune": ("immune", _damage_modifier("immune")),
+    "vulnerable": ("vulnerable", _damage_modifier("vulnerable")),
+    "conditionImmune": ("conditionImmune", _same),
+    "senses": ("senses", _same),
+    "passive": ("passive", _same),
+    "languages": ("languages", _same),
+    "cr": ("cr", _same),
+    "trait": ("trait", _actions),
+    "action": ("action", _actions),
+    "legendary": ("legendary", _actions),
+    "legendaryGroup": ("legendaryGroup", _same),
+    "page": ("page", _same),
+    "spellcasting": ("spellcasting", _spellcasting),
+}
+
+
+# --- Records ---
+
+
+_DEFAULTS: Dict[type, Tuple[Dict[str, Any], Tuple[Tuple[str, Callable[[], Any]], ...]]] = {}
+
+
+def _build(cls, kwargs: Dict[str, Any]):
+    """`cls(**kwargs)` for a dataclass, filling the instance dict directly.
+
+    Skips the generated `__init__` and the per-field `__setattr__` of the
+    statblock classes: a fresh instance has no cached derived stats to drop.
+    """
+    spec = _DEFAULTS.get(cls)
+    if spec is None:
+        values = {f.name: f.default for f in fields(cls) if f.default is not MISSING}
+        factories = tuple((f.name, f.default_factory) for f in fields(cls) if f.default_factory is not MISSING)
+        spec = _DEFAULTS[cls] = (values, factories)
+    obj = cls.__new__(cls)
+    state = obj.__dict__
+    state.update(spec[0])
+    for name, factory in spec[1]:
+        if name not in kwargs:
+            state[name] = factory()
+    state.update(kwargs)
+    if hasattr(obj, "__post_init__"):
+        obj.__post_init__()
+    return obj
+
+
+def _decode_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    missing = REQUIRED.difference(record)
+    if missing:
+        raise KeyError(f"missing {', '.join(sorted(missing))}")
+
+    kwargs: Dict[str, Any] = {}
+    scores: Dict[str, int] = {}
+    for key, value in record.items():
+        spec = FIELDS.get(key)
+        if spec is not None:
+            kwargs[spec[0]] = spec[1](value)
+        elif key in ABILITY_KEYS:
+            scores[f"{key}_"] = value
+    kwargs["abilities"] = _build(AbilityScores, scores)
+    if "legendaryGroup" in kwargs:
+        # A bare group name refers to the monster's own source book
+        kwargs["legendaryGroup"] = LegendaryGroupRef.from_json(kwargs["legendaryGroup"], kwargs["source"])
+    kwargs.setdefault("alignment", [])
+    kwargs.setdefault("spellcasting", [])
+    return kwargs
+
+
+def _combat_action(action: Action, raw: Dict[str, Any], combat) -> Any:
+    match = RECHARGE_RE.search(action.name)
+    return combat.Action(
+        name=action.name,
+        entries=raw["entries"],
+        recharge=int(match.group(1)) if match else None,
+    )
+
+
+_combat = None
+
+
+def _combat_module():
+    # combat depends on bestiary, not the other way round, so import on first use
+    global _combat
+    if _combat is None:
+        from combat import combatant
+
+        _combat = combatant
+    return _combat
+
+
+def _combat_statblock(sb: StatBlock, record: Dict[str, Any]) -> Any:
+    combat = _combat_module()
+
+    speeds = {}
+    for mode, value in sb.speed.modes.items():
+        if type(value) is SpeedEntry:
+            speeds[mode] = value.number
+            if value.condition and "hover" in value.condition:
+                speeds["hover"] = value.number
+        elif mode in combat.MOVEMENT_BY_NAME:
+            speeds[mode] = value
+
+    armor_class, armor_desc = parse_ac(sb.ac)
+    return _build(combat.StatBlock, dict(
+        name=sb.name,
+        size=sb.size,
+        creature_type=sb.type_.type_ if isinstance(sb.type_, CreatureType) else sb.type_,
+        alignment=sb.alignment,
+        source=sb.source,
+        armor_class=armor_class,
+        armor_desc=armor_desc,
+        hit_dice=sb.hp.get("formula", ""),
+        max_HP=sb.hp.get("average", 0),
+        speed=combat.Speed(**speeds),
+        abilities=combat.Abilities(*sb.abilities.as_tuple()),
+        saves=TrackedDict(sb.saves or ()),
+        skills=TrackedDict(sb.skills or ()),
+        condition_immune=list(sb.conditionImmune),
+        senses=sb.senses or "",
+        passive_perception=sb.passive if sb.passive is not None else 10,
+        languages=sb.languages or "",
+        challenge_rating=sb.cr if sb.cr is not None else "0",
+        traits=[_combat_action(a, r, combat) for a, r in zip(sb.trait, record.get("trait", []))],
+        actions=[_combat_action(a, r, combat) for a, r in zip(sb.action, record.get("action", []))],
+        legendary=[_combat_action(a, r, combat) for a, r in zip(sb.legendary or [], record.get("legendary", []))],
+        legendary_group=sb.legendaryGroup,
+        page=sb.page,
+    ))
+
+
+def decode_monster(record: Dict[str, Any], cls=StatBlock, source: str = "<record>", index: int = 0) -> StatBlock:
+    """Decode one 5etools monster record into a `bestiary.StatBlock` (or subclass `cls`)."""
+    try:
+        return _build(cls, _decode_fields(record))
+    except Exception as e:
+        raise DecodeError(source, index, record.get("name") if isinstance(record, dict) else None, e) from e
+
+
+def decode_monster_pair(record: Dict[str, Any], source: str = "<record>", index: int = 0) -> Tuple[StatBlock, Any]:
+    """Decode one record into both the bestiary and the combat `StatBlock`."""
+    try:
+        sb = _build(StatBlock, _decode_fields(record))
+        return sb, _combat_statblock(sb, record)
+    except Exception as e:
+        raise DecodeError(source, index, record.get("name") if isinstance(record, dict) else None, e) from e
+
+
+@dataclass
+class DecodeResult:
+    statblocks: List[StatBlock] = field(default_factory=list)
+    combat: List[Any] = field(default_factory=list)
+    errors: List[DecodeError] = field(default_factory=list)
+
+
+def decode_monsters(records: List[Dict[str, Any]], source: str = "<records>", combat: bool = False) -> DecodeResult:
+    """Decode a list of records, collecting malformed ones as `DecodeError`s instead of raising."""
+    result = DecodeResult()
+    for index, record in enumerate(records):
+        try:
+            if combat:
+                sb, combat_sb = decode_monster_pair(record, source, index)
+                result.combat.append(combat_sb)
+            else:
+                sb = decode_monster(record, source=source, index=index)
+        except DecodeError as e:
+            result.errors.append(e)
+            continue
+        result.statblocks.append(sb)
+    return result
+
+
+def load_bestiary_file(path: str | Path, combat: bool = False) -> DecodeResult:
+    """Decode every record under the "monster" key of a 5etools bestiary file."""
+    path = Path(path)
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    return decode_monsters(data.get("monster", []), source=path.name, combat=combat)
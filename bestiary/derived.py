@@ -0,0 +1,229 @@
+from dataclasses import dataclass
+from fractions import Fraction
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# Numbers derived from a statblock (modifiers, bonuses, AC, CR, XP) are computed
+# once and cached on the statblock; they are only recomputed after one of the
+# fields they depend on is reassigned or edited in place.
+
+ABILITIES = ("str", "dex", "con", "int", "wis", "cha")
+ABILITY_INDEX = {name: i for i, name in enumerate(ABILITIES)}
+
+SKILL_ABILITY = {
+    "acrobatics": "dex",
+    "animal handling": "wis",
+    "arcana": "int",
+    "athletics": "str",
+    "deception": "cha",
+    "history": "int",
+    "insight": "wis",
+    "intimidation": "cha",
+    "investigation": "int",
+    "medicine": "wis",
+    "nature": "int",
+    "perception": "wis",
+    "performance": "cha",
+    "persuasion": "cha",
+    "religion": "int",
+    "sleight of hand": "dex",
+    "stealth": "dex",
+    "survival": "wis",
+}
+
+XP_BY_CR = {
+    0: 10, 0.125: 25, 0.25: 50, 0.5: 100,
+    1: 200, 2: 450, 3: 700, 4: 1100, 5: 1800, 6: 2300, 7: 2900, 8: 3900, 9: 5000, 10: 5900,
+    11: 7200, 12: 8400, 13: 10000, 14: 11500, 15: 13000, 16: 15000, 17: 18000, 18: 20000,
+    19: 22000, 20: 25000, 21: 33000, 22: 41000, 23: 50000, 24: 62000, 25: 75000, 26: 90000,
+    27: 105000, 28: 120000, 29: 135000, 30: 155000,
+}
+
+
+FRACTIONAL_CR = {"1/8": 0.125, "1/4": 0.25, "1/2": 0.5}
+
+
+# --- Parsing helpers ---
+
+
+def ability_modifier(score: int) -> int:
+    return (score - 10) // 2
+
+
+def parse_bonus(value: Any) -> int:
+    """"+11" / "-1" / 4 -> int."""
+    if isinstance(value, int):
+        return value
+    return int(str(value).strip().split()[0])
+
+
+def parse_ac(value: Any) -> Tuple[int, Optional[str]]:
+    """"19 (natural armor)" -> (19, "natural armor"); also accepts ints and 5etools AC lists."""
+    if isinstance(value, list):
+        value = value[0] if value else 10
+    if isinstance(value, dict):
+        note = ", ".join(value.get("from", [])) or value.get("condition")
+        return int(value["ac"]), note
+    if isinstance(value, int):
+        return value, None
+    text = str(value).strip()
+    number, _, rest = text.partition(" ")
+    note = rest.strip().strip("()") or None
+    return int(number), note
+
+
+def parse_cr(value: Any) -> float:
+    """"1/4" -> 0.25, {"cr": "13", "lair": "14"} -> 13.0, missing -> 0.0."""
+    if value is None:
+        return 0.0
+    if isinstance(value, dict):
+        value = value.get("cr", 0)
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).split(" ")[0]
+    if text in FRACTIONAL_CR:
+        return FRACTIONAL_CR[text]
+    if not text:
+        return 0.0
+    return float(Fraction(text)) if "/" in text else float(text)
+
+
+def proficiency_bonus(cr: float) -> int:
+    return 2 + max(0, int(-(-cr // 1)) - 1) // 4
+
+
+def xp_for_cr(cr: float) -> int:
+    return XP_BY_CR.get(cr, XP_BY_CR.get(int(cr), 0))
+
+
+# --- Derived stats ---
+
+
+@dataclass(frozen=True)
+class DerivedStats:
+    scores: Tuple[int, int, int, int, int, int]
+    modifiers: Tuple[int, int, int, int, int, int]
+    saves: Tuple[int, int, int, int, int, int]  # listed save bonus, or the plain modifier
+    skills: Mapping[str, int]  # only skills listed on the statblock
+    ac: int
+    ac_note: Optional[str]
+    cr: float
+    proficiency: int
+    xp: int
+
+    @classmethod
+    def compute(
+        cls,
+        scores: Tuple[int, ...],
+        ac: Any,
+        cr: Any,
+        saves: Optional[Dict[str, Any]] = None,
+        skills: Optional[Dict[str, Any]] = None,
+    ) -> "DerivedStats":
+        scores = tuple(scores)
+        save_bonus = [(s - 10) // 2 for s in scores]
+        modifiers = tuple(save_bonus)
+        if saves:
+            for ability, bonus in saves.items():
+                save_bonus[ABILITY_INDEX[ability.lower()[:3]]] = parse_bonus(bonus)
+        skill_bonus = {name.lower(): parse_bonus(bonus) for name, bonus in skills.items()} if skills else {}
+        ac_value, ac_note = parse_ac(ac)
+        cr_value = parse_cr(cr)
+        return cls(
+            scores=scores,
+            modifiers=modifiers,
+            saves=tuple(save_bonus),
+            skills=MappingProxyType(skill_bonus),
+            ac=ac_value,
+            ac_note=ac_note,
+            cr=cr_value,
+            proficiency=proficiency_bonus(cr_value),
+            xp=xp_for_cr(cr_value),
+        )
+
+    def modifier(self, ability: str) -> int:
+        return self.modifiers[ABILITY_INDEX[ability.lower()[:3]]]
+
+    def save(self, ability: str) -> int:
+        return self.saves[ABILITY_INDEX[ability.lower()[:3]]]
+
+    def skill(self, name: str) -> int:
+        """Listed skill bonus, falling back to the governing ability modifier."""
+        name = name.lower()
+        if name in self.skills:
+            return self.skills[name]
+        return self.modifier(SKILL_ABILITY[name])
+
+
+class TrackedDict(dict):
+    """A dict that counts its in-place edits in `version` (statblock saves and skills)."""
+
+    version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+
+class DerivedStatsMixin:
+    """Caches `derived` on the instance and drops it when a field listed in `_derived_sources` changes.
+
+    Ability score objects carry a `version` counter that is bumped on every score
+    assignment, so in-place edits (`sb.abilities.STR = 20`) are noticed as well.
+    Dicts assigned to a field in `_tracked_sources` are held as `TrackedDict`s,
+    whose version covers in-place edits such as `sb.saves["dex"] = "+5"`.
+    """
+
+    _derived_sources: Tuple[str, ...] = ()
+    _tracked_sources: Tuple[str, ...] = ()
+
+    def _compute_derived(self) -> DerivedStats:
+        raise NotImplementedError
+
+    def __setattr__(self, name, value):
+        if name in self._tracked_sources and type(value) is dict:
+            value = TrackedDict(value)
+        object.__setattr__(self, name, value)
+        if name in self._derived_sources:
+            self.__dict__.pop("_derived", None)
+
+    def _derived_version(self) -> Tuple[int, ...]:
+        state = self.__dict__
+        return (self.abilities.version,) + tuple([getattr(state[name], "version", 0) for name in self._tracked_sources])
+
+    @property
+    def derived(self) -> DerivedStats:
+        cached = self.__dict__.get("_derived")
+        version = self._derived_version()
+        if cached is None or cached[0] != version:
+            cached = (version, self._compute_derived())
+            self.__dict__["_derived"] = cached
+        return cached[1]
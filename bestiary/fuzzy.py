@@ -0,0 +1,163 @@
+import heapq
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .stat_block import StatBlock, row_id
+
+# Typo-tolerant lookup of monster names ("owlbaer", "beholdr", "yng red drag").
+#
+# Names and aliases are split into padded character trigrams with a posting set
+# per trigram. A query collects the names sharing the most trigrams with it
+# (cheap set lookups), and only that short list is scored by edit distance,
+# both against the whole name and against a prefix at each word start, so
+# half-typed names rank well too. Results are cached per query until the index
+# changes, since a page rerun repeats the last query.
+
+NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+# Removed names leave a None behind so positions stay valid; past this share of
+# the list the positions are renumbered without them
+COMPACT_FRACTION = 0.5
+
+
+def normalize(name: str) -> str:
+    return NON_WORD_RE.sub(" ", name.lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _alignments(query: str, name: str) -> Tuple[int, int]:
+    """Edit distance of `query` to all of `name`, and to the best prefix of `name` from a word start.
+
+    Both are filled in one pass over the same table; they only differ in the
+    first row, where the prefix variant may start for free at any word.
+    """
+    n = len(name)
+    whole = list(range(n + 1))
+    prefix = [0 if j == 0 or name[j - 1] == " " else n + 1 for j in range(n + 1)]
+    whole2 = prefix2 = None
+    for i, cq in enumerate(query, 1):
+        w = [i]
+        p = [i]
+        for j, cn in enumerate(name, 1):
+            cost = cq != cn
+            wv = min(whole[j] + 1, w[j - 1] + 1, whole[j - 1] + cost)
+            pv = min(prefix[j] + 1, p[j - 1] + 1, prefix[j - 1] + cost)
+            if whole2 is not None and j > 1 and cq == name[j - 2] and query[i - 2] == cn:
+                wv = min(wv, whole2[j - 2] + 1)
+                pv = min(pv, prefix2[j - 2] + 1)
+            w.append(wv)
+            p.append(pv)
+        whole2, prefix2, whole, prefix = whole, prefix, w, p
+    return whole[-1], min(prefix)
+
+
+def similarity(query: str, name: str) -> float:
+    """1.0 for an exact match; the best of whole-name and word-prefix similarity."""
+    whole, prefix = _alignments(query, name)
+    # A prefix match is slightly worse than the same whole-name match
+    return max(1 - whole / max(len(query), len(name)), (1 - prefix / len(query)) * 0.95)
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    id: str  # row id of the statblock
+    name: str  # the statblock's name
+    matched: str  # the name or alias that matched
+    score: float
+
+
+class NameIndex:
+    def __init__(self, statblocks: Iterable[StatBlock] = (), candidates: int = 16, cache_size: int = 256):
+        self.candidates = candidates
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, int, float], List[NameMatch]]" = OrderedDict()
+        self._names: List[Optional[Tuple[str, str, str]]] = []  # (id, display name, normalized), None once removed
+        self._ids: Dict[str, List[int]] = {}  # row id -> positions in _names
+        self._postings: Dict[str, Set[int]] = {}
+        self._removed = 0  # None entries in _names
+        self.upsert(statblocks)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # --- Updates ---
+
+    def add(self, id_: str, name: str, aliases: Iterable[str] = ()) -> None:
+        self.remove([id_])
+        self._cache.clear()
+        positions = []
+        for text in [name, *aliases]:
+            key = normalize(text)
+            if not key:
+                continue
+            pos = len(self._names)
+            self._names.append((id_, name, key))
+            for gram in trigrams(key):
+                self._postings.setdefault(gram, set()).add(pos)
+            positions.append(pos)
+        self._ids[id_] = positions
+
+    def upsert(self, statblocks: Iterable[StatBlock]) -> None:
+        for sb in statblocks:
+            self.add(row_id(sb.name, sb.source), sb.name, sb.alias)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        for id_ in ids:
+            self._cache.clear()
+            for pos in self._ids.pop(id_, []):
+                for gram in trigrams(self._names[pos][2]):
+                    self._postings[gram].discard(pos)
+                self._names[pos] = None
+                self._removed += 1
+        if self._removed > len(self._names) * COMPACT_FRACTION:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Renumber the names without the removed ones (same order, so ties still break the same way)."""
+        live = [entry for entry in self._names if entry is not None]
+        self._names, self._ids, self._postings, self._removed = live, {}, {}, 0
+        for pos, (id_, _, key) in enumerate(live):
+            self._ids.setdefault(id_, []).append(pos)
+            for gram in trigrams(key):
+                self._postings.setdefault(gram, set()).add(pos)
+
+    def apply_change(self, catalogue, change) -> None:
+        """`Catalogue.subscribe` hook."""
+        self.remove(change.removed)
+        self.upsert(catalogue.get(id_) for id_ in change.added + change.changed)
+
+    # --- Queries ---
+
+    def search(self, query: str, k: int = 8, min_score: float = 0.5) -> List[NameMatch]:
+        """Best `k` monsters for a possibly misspelled or half-typed name."""
+        query = normalize(query)
+        if not query:
+            return []
+        key = (query, k, min_score)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        shared: Dict[int, int] = {}
+        for gram in trigrams(query):
+            for pos in self._postings.get(gram, ()):
+                shared[pos] = shared.get(pos, 0) + 1
+        shortlist = heapq.nlargest(self.candidates, shared, key=lambda pos: (shared[pos], -pos))
+
+        best: Dict[str, NameMatch] = {}
+        for pos in shortlist:
+            id_, name, normalized = self._names[pos]
+            score = similarity(query, normalized)
+            if score >= min_score and (id_ not in best or score > best[id_].score):
+                best[id_] = NameMatch(id_, name, normalized, round(score, 3))
+        matches = sorted(best.values(), key=lambda m: (-m.score, len(m.name), m.name))[:k]
+        self._cache[key] = matches
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return matches
@@ -0,0 +1,98 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# Legendary groups (lair actions, regional effects) live in a companion file in
+# the 5etools layout: {"legendaryGroup": [{"name", "source", "lairActions",
+# "regionalEffects", "mythicEncounter"}, ...]}. Monsters only carry a reference.
+#
+# The file is read the first time any group is looked up, and indexed by
+# (name, source) in that same read; each group is then built on first access
+# and cached, so resolving groups never rescans the file.
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "data" / "bestiary" / "legendarygroups.json"
+
+
+@dataclass(frozen=True)
+class LegendaryGroupRef:
+    name: str
+    source: str = "MM"
+
+    @classmethod
+    def from_json(cls, value: Union[str, Dict[str, str]], default_source: str = "MM") -> "LegendaryGroupRef":
+        if isinstance(value, dict):
+            return cls(name=value["name"], source=value.get("source", default_source))
+        return cls(name=value, source=default_source)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"name": self.name, "source": self.source}
+
+    def resolve(self) -> Optional["LegendaryGroup"]:
+        return legendary_groups.get(self)
+
+
+@dataclass
+class LegendaryGroup:
+    name: str
+    source: str
+    lairActions: List[Any] = field(default_factory=list)
+    regionalEffects: List[Any] = field(default_factory=list)
+    mythicEncounter: List[Any] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "LegendaryGroup":
+        return cls(
+            name=data["name"],
+            source=data.get("source", "MM"),
+            lairActions=data.get("lairActions", []),
+            regionalEffects=data.get("regionalEffects", []),
+            mythicEncounter=data.get("mythicEncounter", []),
+        )
+
+
+class LegendaryGroupTable:
+    def __init__(self, paths: Iterable[Union[str, Path]] = (DEFAULT_PATH,)):
+        self.paths = [Path(p) for p in paths]
+        self._records: Optional[List[Dict[str, Any]]] = None
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._resolved: Dict[Tuple[str, str], Optional[LegendaryGroup]] = {}
+
+    def _load(self) -> None:
+        records: List[Dict[str, Any]] = []
+        for path in self.paths:
+            if not path.is_file():
+                continue
+            with path.open("r", encoding="utf-8") as f:
+                records.extend(json.load(f).get("legendaryGroup", []))
+        self._index = {
+            (record["name"].lower(), record.get("source", "MM")): i for i, record in enumerate(records)
+        }
+        self._records = records
+
+    def get(self, ref: Union[LegendaryGroupRef, str], source: str = "MM") -> Optional[LegendaryGroup]:
+        if not isinstance(ref, LegendaryGroupRef):
+            ref = LegendaryGroupRef(ref, source)
+        key = (ref.name.lower(), ref.source)
+        if key in self._resolved:
+            return self._resolved[key]
+        if self._records is None:
+            self._load()
+        pos = self._index.get(key)
+        group = LegendaryGroup.from_json(self._records[pos]) if pos is not None else None
+        self._resolved[key] = group
+        return group
+
+    def __len__(self) -> int:
+        if self._records is None:
+            self._load()
+        return len(self._records)
+
+    def invalidate(self) -> None:
+        """Forget everything; the file is re-read on the next lookup."""
+        self._records = None
+        self._index = {}
+        self._resolved = {}
+
+
+legendary_groups = LegendaryGroupTable()
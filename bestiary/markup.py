@@ -0,0 +1,214 @@
+import html
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+# Renderer for 5etools `{@tag text|source|display}` markup.
+#
+# Each string is scanned once with a precompiled pattern; tags are resolved on a
+# stack so nested tags (`{@i see {@spell fireball}}`) come out right. Output is
+# Markdown (for st.markdown) or HTML.
+
+SCANNER = re.compile(r"\{@(\w+) ?|\}")
+
+ATTACK_TYPES = {
+    "mw": "Melee Weapon Attack:",
+    "rw": "Ranged Weapon Attack:",
+    "mw,rw": "Melee or Ranged Weapon Attack:",
+    "ms": "Melee Spell Attack:",
+    "rs": "Ranged Spell Attack:",
+    "ms,rs": "Melee or Ranged Spell Attack:",
+}
+
+REFERENCE_TAGS = frozenset(
+    ["spell", "creature", "item", "condition", "skill", "sense", "action", "status", "disease", "race", "class"]
+)
+
+# Tags written `{@tag name|source|display}`, where an optional third part is the text to show
+DISPLAY_PART_TAGS = REFERENCE_TAGS | frozenset(
+    ["background", "feat", "language", "object", "hazard", "trap", "vehicle", "reward", "optfeature", "variantrule"]
+)
+
+
+# --- Tag handlers ---
+
+
+def _parts(content: str) -> List[str]:
+    return content.split("|")
+
+
+def _display(tag: str, content: str) -> str:
+    parts = _parts(content)
+    # `{@creature name|source|display}` shows the third part when present; for other
+    # tags it is not text (`{@filter text|bestiary|type=dragon}`)
+    if tag in DISPLAY_PART_TAGS and len(parts) >= 3 and parts[2]:
+        return parts[2]
+    return parts[0]
+
+
+def _signed(value: str) -> str:
+    value = value.strip()
+    return value if value[:1] in "+-" else f"+{value}"
+
+
+def _tag_text(tag: str, content: str) -> Tuple[str, str]:
+    """Resolve a tag to (style, text); style is one of "", "em" or "strong"."""
+    if tag == "hit":
+        return "", _signed(_parts(content)[0])
+    if tag in ("dice", "damage", "d20", "scaledice", "scaledamage"):
+        return "", _display(tag, content) if "|" in content else content
+    if tag == "dc":
+        return "", f"DC {_parts(content)[0]}"
+    if tag == "atk":
+        return "em", ATTACK_TYPES.get(content.strip(), content)
+    if tag == "h":
+        return "em", "Hit: "
+    if tag == "recharge":
+        value = content.strip() or "6"
+        return "", f"(Recharge {value}–6)" if value != "6" else "(Recharge 6)"
+    if tag == "chance":
+        parts = _parts(content)
+        return "", parts[1] if len(parts) > 1 and parts[1] else f"{parts[0]}%"
+    if tag in ("i", "italic"):
+        return "em", content
+    if tag in ("b", "bold"):
+        return "strong", content
+    if tag in REFERENCE_TAGS:
+        return "em", _display(tag, content)
+    return "", _display(tag, content)
+
+
+def _markdown_tag(tag: str, content: str) -> str:
+    style, text = _tag_text(tag, content)
+    stripped = text.rstrip()
+    trailing = text[len(stripped):]
+    if not stripped:
+        return text
+    if style == "em":
+        # Nested emphasis flips the marker so Markdown doesn't close the outer span early
+        marker = "_" if "*" in stripped else "*"
+        return f"{marker}{stripped}{marker}{trailing}"
+    if style == "strong":
+        return f"**{stripped}**{trailing}"
+    return text
+
+
+def _html_tag(tag: str, content: str) -> str:
+    style, text = _tag_text(tag, content)
+    if style in ("em", "strong"):
+        return f'<{style} class="tag-{tag}">{text}</{style}>'
+    return f'<span class="tag-{tag}">{text}</span>'
+
+
+FORMATS: Dict[str, Tuple[Callable[[str], str], Callable[[str, str], str]]] = {
+    "markdown": (lambda text: text, _markdown_tag),
+    "html": (html.escape, _html_tag),
+}
+
+
+def render_text(text: str, fmt: str = "markdown") -> str:
+    """Render one string containing `{@tag}` markup in a single left-to-right pass."""
+    escape, render_tag = FORMATS[fmt]
+    stack: List[Tuple[str, List[str]]] = []
+    out: List[str] = []
+    pos = 0
+    for match in SCANNER.finditer(text):
+        chunk = text[pos:match.start()]
+        if chunk:
+            (stack[-1][1] if stack else out).append(escape(chunk))
+        pos = match.end()
+        tag = match.group(1)
+        if tag is not None:
+            stack.append((tag, []))
+        elif stack:
+            tag, parts = stack.pop()
+            (stack[-1][1] if stack else out).append(render_tag(tag, "".join(parts)))
+        else:
+            out.append(escape("}"))  # stray brace outside any tag
+    tail = text[pos:]
+    if tail:
+        (stack[-1][1] if stack else out).append(escape(tail))
+    # Unterminated tags: keep their text rather than dropping it
+    while stack:
+        tag, parts = stack.pop()
+        (stack[-1][1] if stack else out).append("".join(parts))
+    return "".join(out)
+
+
+# --- Entries ---
+
+
+def _field(entry: Any, name: str, default=None):
+    if isinstance(entry, dict):
+        return entry.get(name, default)
+    return getattr(entry, name, default)
+
+
+def render_entry(entry: Any, fmt: str = "markdown") -> str:
+    """Render a string, `NestedEntry` or raw 5etools entry dict (lists, named sub-entries)."""
+    if isinstance(entry, str):
+        return render_text(entry, fmt)
+
+    entry_type = _field(entry, "type", None) or _field(entry, "type_", None)
+    if entry_type == "list":
+        items = [_render_item(item, fmt) for item in _field(entry, "items", [])]
+        if fmt == "html":
+            return "<ul>" + "".join(f"<li>{item}</li>" for item in items) + "</ul>"
+        return "\n".join(f"- {item}" for item in items)
+    return _render_item(entry, fmt)
+
+
+def _render_item(item: Any, fmt: str) -> str:
+    if isinstance(item, str):
+        return render_text(item, fmt)
+    name = _field(item, "name")
+    body = _field(item, "entry")
+    parts = [render_entry(body, fmt)] if body is not None else []
+    parts.extend(render_entry(e, fmt) for e in _field(item, "entries", None) or [])
+    if name is None and not parts and _field(item, "items"):
+        return render_entry(item, fmt)
+    text = " ".join(parts)
+    if name:
+        label = render_text(name, fmt)
+        text = (f"<strong>{label}</strong> " if fmt == "html" else f"**{label}** ") + text
+    return text
+
+
+def render_entries(entries: List[Any], fmt: str = "markdown") -> str:
+    separator = "" if fmt == "html" else "\n\n"
+    if fmt == "html":
+        return separator.join(
+            render_entry(e, fmt) if not isinstance(e, str) else f"<p>{render_entry(e, fmt)}</p>"
+            for e in entries
+        )
+    return separator.join(render_entry(e, fmt) for e in entries)
+
+
+# --- Memoized action rendering ---
+
+# Keyed on the identity of the action's entries list, which the decoders build
+# once per statblock and nothing edits afterwards. The list is kept next to its
+# rendering, so an id reused by a later list is told apart. Streamlit runs pages
+# on several threads, hence the lock.
+_CACHE_SIZE = 4096
+_cache: "OrderedDict[Tuple[int, str], Tuple[List[Any], str]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def render_action(action: Any, fmt: str = "markdown") -> str:
+    """Render an action's entries (bestiary or combat `Action`), memoized per entries list."""
+    entries = action.entries
+    key = (id(entries), fmt)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] is entries:
+            _cache.move_to_end(key)
+            return cached[1]
+    rendered = render_entries(entries, fmt)
+    with _cache_lock:
+        _cache[key] = (entries, rendered)
+        _cache.move_to_end(key)
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return rendered
@@ -0,0 +1,427 @@
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# A small query language over the catalogue DataFrame:
+#
+#     cr >= 5 and type = dragon and immune:fire and speed.fly > 60 and str > 20
+#     (size = huge or size = gargantuan) and not has:legendary
+#     name ~ "giant" and condition:frightened
+#
+# Text is parsed once into a plan (a tree of predicates), cached by its text.
+# Evaluating a plan is one NumPy operation per predicate over typed columns,
+# which are built from the frame on first use and kept until the catalogue
+# changes. `explain()` times each predicate.
+
+
+class QueryError(ValueError):
+    def __init__(self, message: str, position: int = -1):
+        super().__init__(message if position < 0 else f"{message} (at character {position})")
+        self.position = position
+
+
+# --- Fields ---
+
+NUMERIC_FIELDS = {
+    "cr": "cr_float",
+    "ac": "ac_value",
+    "hp": "hp_avg",
+    "pb": "pb",
+    "xp": "xp",
+    "passive": "passive",
+    "page": "page",
+    "str": "str_",
+    "dex": "dex_",
+    "con": "con_",
+    "int": "int_",
+    "wis": "wis_",
+    "cha": "cha_",
+}
+SPEED_MODES = ("walk", "fly", "swim", "climb", "burrow")
+NUMERIC_FIELDS.update({f"speed.{mode}": f"speed_{mode}" for mode in SPEED_MODES})
+
+TEXT_FIELDS = {
+    "name": "name",
+    "type": "type",
+    "size": "size",
+    "source": "source",
+    "alignment": "alignment",
+    "languages": "languages",
+    "senses": "senses",
+    "group": "legendary_group",
+}
+
+# kind:value flags, e.g. immune:fire, condition:charmed, speed:hover, has:legendary
+FLAG_COLUMNS = {"immune": "immune", "resist": "resist", "vulnerable": "vulnerable", "condition": "conditionImmune"}
+HAS_FLAGS = {"legendary": "legendary", "lair": "legendary_group", "traits": "trait"}
+
+SIZE_CODES = {"tiny": "t", "small": "s", "medium": "m", "large": "l", "huge": "h", "gargantuan": "g"}
+
+COMPARISONS: Dict[str, Callable[[np.ndarray, object], np.ndarray]] = {
+    "=": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+class QueryTable:
+    """Typed NumPy columns of a catalogue frame, built on first use."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def _build(self, key: str) -> np.ndarray:
+        kind, _, name = key.partition(":")
+        df = self.df
+        if kind == "num":
+            if name not in df.columns:
+                return np.zeros(len(df))
+            if name.startswith("speed_"):
+                # "90 (hover)" -> 90; no such speed -> 0
+                return df[name].astype("string").str.extract(r"^(\d+)", expand=False).astype(float).fillna(0).to_numpy()
+            return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+        if kind == "text":
+            if name not in df.columns:
+                return np.full(len(df), "", dtype=str)
+            return df[name].fillna("").astype(str).str.lower().to_numpy(dtype=str)
+        if kind == "flag":
+            column, _, value = name.partition("=")
+            if column not in df.columns:
+                return np.zeros(len(df), dtype=bool)
+            pattern = rf"(?<![a-z]){re.escape(value)}(?![a-z])"
+            return df[column].fillna("").astype(str).str.lower().str.contains(pattern).to_numpy(dtype=bool)
+        if kind == "has":
+            if name not in df.columns:
+                return np.zeros(len(df), dtype=bool)
+            return (df[name].notna() & (df[name].astype(str) != "")).to_numpy(dtype=bool)
+        raise KeyError(key)
+
+    def column(self, key: str) -> np.ndarray:
+        values = self._columns.get(key)
+        if values is None:
+            values = self._columns[key] = self._build(key)
+        return values
+
+
+# --- Plans ---
+
+
+@dataclass
+class Node:
+    label: str
+
+    leaf = False  # only predicates are timed; and/or/not cost next to nothing
+
+    def evaluate(self, table: QueryTable, timings: Optional[list] = None) -> np.ndarray:
+        start = time.perf_counter()
+        mask = self._evaluate(table, timings)
+        if timings is not None and self.leaf:
+            timings.append((self.label, (time.perf_counter() - start) * 1000, int(mask.sum())))
+        return mask
+
+    def _evaluate(self, table: QueryTable, timings: Optional[list]) -> np.ndarray:
+        raise NotImplementedError
+
+
+@dataclass
+class Compare(Node):
+    column: str = ""
+    op: str = "="
+    value: Union[float, str] = 0.0
+
+    leaf = True
+
+    def _evaluate(self, table, timings):
+        values = table.column(self.column)
+        if self.op == "~":
+            return np.char.find(values, self.value) >= 0
+        return COMPARISONS[self.op](values, self.value)
+
+
+@dataclass
+class Flag(Node):
+    column: str = ""
+
+    leaf = True
+
+    def _evaluate(self, table, timings):
+        return table.column(self.column)
+
+
+@dataclass
+class And(Node):
+    children: List[Node] = field(default_factory=list)
+
+    def _evaluate(self, table, timings):
+        mask = self.children[0].evaluate(table, timings)
+        for child in self.children[1:]:
+            mask = mask & child.evaluate(table, timings)
+        return mask
+
+
+@dataclass
+class Or(Node):
+    children: List[Node] = field(default_factory=list)
+
+    def _evaluate(self, table, timings):
+        mask = self.children[0].evaluate(table, timings)
+        for child in self.children[1:]:
+            mask = mask | child.evaluate(table, timings)
+        return mask
+
+
+@dataclass
+class Not(Node):
+    child: Optional[Node] = None
+
+    def _evaluate(self, table, timings):
+        return ~self.child.evaluate(table, timings)
+
+
+# --- Parsing ---
+
+TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<number>-?\d+(?:\.\d+)?(?:/\d+)?)(?![\w.])
+      | (?P<op><=|>=|!=|=|<|>|~|:|\(|\))
+      | (?P<string>"[^"]*"|'[^']*')
+      | (?P<word>[A-Za-z_][\w.\-]*)
+    )""",
+    re.VERBOSE,
+)
+KEYWORDS = ("and", "or", "not")
+
+
+def tokenize(text: str) -> List[Tuple[str, str, int]]:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if match is None:
+            raise QueryError(f"unexpected {text[pos:].strip()[:10]!r}", pos)
+        kind = match.lastgroup
+        value = match.group(kind)
+        start = match.start(kind)
+        if kind == "word" and value.lower() in KEYWORDS:
+            kind, value = value.lower(), value.lower()
+        elif kind == "string":
+            value = value[1:-1]
+        tokens.append((kind, value, start))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.tokens = tokenize(text)
+        self.end = len(text.rstrip())  # where a query that stops too early is reported
+        self.i = 0
+
+    def peek(self) -> Tuple[str, str, int]:
+        return self.tokens[self.i] if self.i < len(self.tokens) else ("end", "", self.end)
+
+    def take(self, kind: Optional[str] = None, value: Optional[str] = None) -> Tuple[str, str, int]:
+        token = self.peek()
+        if (kind and token[0] != kind) or (value and token[1] != value):
+            expected = value or kind
+            found = token[1] or "end of query"
+            raise QueryError(f"expected {expected}, found {found!r}", token[2])
+        self.i += 1
+        return token
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise QueryError("empty query")
+        node = self.or_expr()
+        if self.peek()[0] != "end":
+            raise QueryError(f"unexpected {self.peek()[1]!r}", self.peek()[2])
+        return node
+
+    def or_expr(self) -> Node:
+        children = [self.and_expr()]
+        while self.peek()[0] == "or":
+            self.take()
+            children.append(self.and_expr())
+        return children[0] if len(children) == 1 else Or(" or ".join(c.label for c in children), children)
+
+    def and_expr(self) -> Node:
+        children = [self.not_expr()]
+        while self.peek()[0] == "and":
+            self.take()
+            children.append(self.not_expr())
+        return children[0] if len(children) == 1 else And(" and ".join(c.label for c in children), children)
+
+    def not_expr(self) -> Node:
+        if self.peek()[0] == "not":
+            self.take()
+            child = self.not_expr()
+            return Not(f"not {child.label}", child)
+        return self.atom()
+
+    def atom(self) -> Node:
+        if self.peek()[1] == "(":
+            self.take("op", "(")
+            node = self.or_expr()
+            self.take("op", ")")
+            node.label = f"({node.label})"
+            return node
+        _, name, pos = self.take("word")
+        name = name.lower()
+        kind, op, _ = self.peek()
+        if op == ":":
+            self.take()
+            _, value, value_pos = self.take_value()
+            return self.flag(name, str(value).lower(), pos, value_pos)
+        if kind != "op" or op not in COMPARISONS and op != "~":
+            raise QueryError(f"expected an operator after {name!r}", self.peek()[2])
+        self.take()
+        value_kind, value, value_pos = self.take_value()
+        return self.comparison(name, op, value_kind, value, pos, value_pos)
+
+    def take_value(self) -> Tuple[str, str, int]:
+        token = self.peek()
+        if token[0] not in ("number", "string", "word"):
+            raise QueryError("expected a value", token[2])
+        self.i += 1
+        return token
+
+    def flag(self, kind: str, value: str, pos: int, value_pos: int) -> Node:
+        label = f"{kind}:{value}"
+        if kind in FLAG_COLUMNS:
+            return Flag(label, f"flag:{FLAG_COLUMNS[kind]}={value}")
+        if kind == "speed":
+            if value == "hover":
+                return Flag(label, "flag:speed_fly=hover")
+            if value in SPEED_MODES:
+                return Compare(label, f"num:speed_{value}", ">", 0.0)
+            raise QueryError(f"unknown speed {value!r}", value_pos)
+        if kind == "has":
+            if value not in HAS_FLAGS:
+                raise QueryError(f"unknown flag has:{value} (try {', '.join(HAS_FLAGS)})", value_pos)
+            return Flag(label, f"has:{HAS_FLAGS[value]}")
+        raise QueryError(f"unknown flag {kind!r} (try {', '.join([*FLAG_COLUMNS, 'speed', 'has'])})", pos)
+
+    def comparison(self, name: str, op: str, value_kind: str, value: str, pos: int, value_pos: int) -> Node:
+        label = f"{name} {op} {value}"
+        if name in NUMERIC_FIELDS:
+            if op == "~":
+                raise QueryError(f"~ only applies to text fields, not {name!r}", pos)
+            if value_kind != "number":
+                raise QueryError(f"{name} needs a number", value_pos)
+            return Compare(label, f"num:{NUMERIC_FIELDS[name]}", op, float(Fraction(value)))
+        if name in TEXT_FIELDS:
+            if op not in ("=", "!=", "~"):
+                raise QueryError(f"{name} is text: use =, != or ~", pos)
+            value = value.lower()
+            if name == "size":
+                value = SIZE_CODES.get(value, value)
+            return Compare(label, f"text:{TEXT_FIELDS[name]}", op, value)
+        known = sorted([*NUMERIC_FIELDS, *TEXT_FIELDS])
+        raise QueryError(f"unknown field {name!r} (fields: {', '.join(known)})", pos)
+
+
+def compile_query(text: str) -> Node:
+    return _Parser(text).parse()
+
+
+# --- Engine ---
+
+
+@dataclass
+class Explain:
+    query: str
+    cached_plan: bool
+    compile_ms: float
+    total_ms: float
+    rows: int
+    matched: int
+    steps: List[Tuple[str, float, int]]  # (predicate, ms, rows matched) in evaluation order
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.query}",
+            f"plan {'from cache' if self.cached_plan else 'compiled'} ({self.compile_ms:.3f} ms), "
+            f"total {self.total_ms:.3f} ms, {self.matched}/{self.rows} rows",
+        ]
+        for label, ms, matched in sorted(self.steps, key=lambda s: -s[1]):
+            lines.append(f"  {ms:8.3f} ms  {matched:6d} rows  {label}")
+        return "\n".join(lines)
+
+
+class MonsterQuery:
+    """Compiles and runs queries against a Catalogue's frame."""
+
+    def __init__(self, catalogue, cache_size: int = 128):
+        self.catalogue = catalogue
+        self.cache_size = cache_size
+        self._plans: "OrderedDict[str, Node]" = OrderedDict()
+        self._table: Optional[QueryTable] = None
+        catalogue.subscribe(self.apply_change)
+
+    def apply_change(self, catalogue, change) -> None:
+        # Plans only depend on the text; the typed columns follow the rows
+        self._table = None
+
+    def table(self, df: Optional[pd.DataFrame] = None) -> QueryTable:
+        """Typed columns of `df`, by default the catalogue's current frame."""
+        if df is None:
+            df = self.catalogue.df
+        table = self._table
+        if table is None or table.df is not df:
+            table = self._table = QueryTable(df)
+        return table
+
+    def plan(self, text: str) -> Tuple[Node, bool]:
+        key = " ".join(text.split())
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            return plan, True
+        plan = self._plans[key] = compile_query(text)  # the typed text, so error positions point into it
+        if len(self._plans) > self.cache_size:
+            self._plans.popitem(last=False)
+        return plan, False
+
+    def mask(self, text: str, df: Optional[pd.DataFrame] = None) -> pd.Series:
+        """Boolean Series over the rows of `df` (default: the catalogue's current frame)."""
+        plan, _ = self.plan(text)
+        with self.catalogue.lock:
+            table = self.table(df)
+            return pd.Series(plan.evaluate(table), index=table.df.index)
+
+    def run(self, text: str, df: Optional[pd.DataFrame] = None) -> Tuple[pd.Series, Explain]:
+        """`mask()` and `explain()` from a single evaluation."""
+        start = time.perf_counter()
+        plan, cached = self.plan(text)
+        compiled = time.perf_counter()
+        steps: list = []
+        with self.catalogue.lock:
+            table = self.table(df)
+            mask = plan.evaluate(table, steps)
+        end = time.perf_counter()
+        return pd.Series(mask, index=table.df.index), Explain(
+            query=" ".join(text.split()),
+            cached_plan=cached,
+            compile_ms=(compiled - start) * 1000,
+            total_ms=(end - start) * 1000,
+            rows=len(table),
+            matched=int(mask.sum()),
+            steps=steps,
+        )
+
+    def explain(self, text: str) -> Explain:
+        return self.run(text)[1]
@@ -0,0 +1,283 @@
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .stat_block import CreatureType, DamageModifier, DamageModifierNote, NestedEntry, SpeedEntry, StatBlock, row_id
+
+# "Find similar monsters": every statblock becomes one row of a feature matrix,
+# columns are standardized once, and queries are a single matrix-vector product
+# plus argpartition over the rows that survive the facet filters.
+
+DAMAGE_TYPES = (
+    "acid", "bludgeoning", "cold", "fire", "force", "lightning", "necrotic",
+    "piercing", "poison", "psychic", "radiant", "slashing", "thunder",
+)
+CONDITIONS = (
+    "blinded", "charmed", "deafened", "exhaustion", "frightened", "grappled", "incapacitated",
+    "invisible", "paralyzed", "petrified", "poisoned", "prone", "restrained", "stunned", "unconscious",
+)
+SPEED_MODES = ("walk", "fly", "swim", "climb", "burrow")
+
+HIT_RE = re.compile(r"\{@hit ([+-]?\d+)")
+DC_RE = re.compile(r"\bDC (\d+)")
+DAMAGE_RE = re.compile(r"(\d+) \(\{@dice [^}]*\}\)")
+
+FEATURES: Tuple[str, ...] = (
+    ("str", "dex", "con", "int", "wis", "cha", "ac", "hp", "cr")
+    + tuple(f"speed_{mode}" for mode in SPEED_MODES)
+    + ("hover",)
+    + tuple(f"{kind}_{dtype}" for kind in ("resist", "immune", "vulnerable") for dtype in DAMAGE_TYPES)
+    + tuple(f"condition_{c}" for c in CONDITIONS)
+    + ("actions", "multiattack", "max_hit", "max_dc", "max_damage", "legendary", "spellcaster")
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES)}
+
+# Relative importance of feature groups after standardization
+GROUP_WEIGHTS = {
+    "abilities": 1.0, "core": 2.0, "speed": 1.0, "damage": 0.5, "condition": 0.4, "actions": 1.0,
+}
+
+
+def _feature_group(name: str) -> str:
+    if name in ("str", "dex", "con", "int", "wis", "cha"):
+        return "abilities"
+    if name in ("ac", "hp", "cr"):
+        return "core"
+    if name.startswith("speed_") or name == "hover":
+        return "speed"
+    if name.startswith(("resist_", "immune_", "vulnerable_")):
+        return "damage"
+    if name.startswith("condition_"):
+        return "condition"
+    return "actions"
+
+
+WEIGHTS = np.array([GROUP_WEIGHTS[_feature_group(f)] for f in FEATURES], dtype=np.float32)
+
+
+def _creature_type(sb: StatBlock) -> str:
+    return sb.type_.type_ if isinstance(sb.type_, CreatureType) else sb.type_
+
+
+def _damage_types(modifier: DamageModifier) -> Iterable[str]:
+    for entry in modifier.entries:
+        if isinstance(entry, DamageModifierNote):
+            yield from entry.types
+        elif isinstance(entry, str):
+            yield entry
+
+
+def _action_strings(sb: StatBlock) -> Iterable[str]:
+    for action in list(sb.action) + list(sb.legendary or []):
+        for entry in action.entries:
+            if isinstance(entry, NestedEntry):
+                yield from (str(item) for item in entry.items)
+            else:
+                yield str(entry)
+
+
+def _speed_parts(value) -> Tuple[float, Optional[str]]:
+    condition = None
+    if isinstance(value, SpeedEntry):
+        value, condition = value.number, value.condition
+    if isinstance(value, dict):
+        value, condition = value.get("number", 0), value.get("condition", condition)
+    return (value if isinstance(value, (int, float)) else 0), condition
+
+
+def feature_vector(sb: StatBlock) -> np.ndarray:
+    vec = np.zeros(len(FEATURES), dtype=np.float32)
+    derived = sb.derived
+    vec[:6] = derived.scores
+    vec[FEATURE_INDEX["ac"]] = derived.ac
+    vec[FEATURE_INDEX["hp"]] = sb.hp.get("average") or 0
+    vec[FEATURE_INDEX["cr"]] = derived.cr
+
+    for mode, value in sb.speed.modes.items():
+        if mode in SPEED_MODES:
+            number, condition = _speed_parts(value)
+            vec[FEATURE_INDEX[f"speed_{mode}"]] = number
+            if condition and "hover" in condition:
+                vec[FEATURE_INDEX["hover"]] = 1
+        elif mode == "canHover" and value:
+            vec[FEATURE_INDEX["hover"]] = 1
+
+    for kind, modifier in (("resist", sb.resist), ("immune", sb.immune), ("vulnerable", sb.vulnerable)):
+        for dtype in _damage_types(modifier):
+            idx = FEATURE_INDEX.get(f"{kind}_{dtype}")
+            if idx is not None:
+                vec[idx] = 1
+    for condition in sb.conditionImmune:
+        idx = FEATURE_INDEX.get(f"condition_{condition}")
+        if idx is not None:
+            vec[idx] = 1
+
+    text = " ".join(_action_strings(sb))
+    vec[FEATURE_INDEX["actions"]] = len(sb.action)
+    vec[FEATURE_INDEX["multiattack"]] = any(a.name == "Multiattack" for a in sb.action)
+    vec[FEATURE_INDEX["max_hit"]] = max((int(h) for h in HIT_RE.findall(text)), default=0)
+    vec[FEATURE_INDEX["max_dc"]] = max((int(d) for d in DC_RE.findall(text)), default=0)
+    vec[FEATURE_INDEX["max_damage"]] = max((int(d) for d in DAMAGE_RE.findall(text)), default=0)
+    vec[FEATURE_INDEX["legendary"]] = len(sb.legendary or [])
+    vec[FEATURE_INDEX["spellcaster"]] = bool(sb.spellcasting)
+    return vec
+
+
+class SimilarityIndex:
+    """k-nearest-neighbour search over statblock feature vectors."""
+
+    def __init__(self, statblocks: Sequence[StatBlock]):
+        self.statblocks = list(statblocks)
+        self._index_positions()
+        self.raw = np.ascontiguousarray(
+            np.vstack([feature_vector(sb) for sb in self.statblocks])
+            if self.statblocks else np.zeros((0, len(FEATURES)), dtype=np.float32)
+        )
+
+        # Facet columns kept as plain arrays so filters are vectorized too
+        self.types = np.array([_creature_type(sb) for sb in self.statblocks], dtype=object)
+        self.sizes = np.array([sb.size for sb in self.statblocks], dtype=object)
+        self.sources = np.array([sb.source for sb in self.statblocks], dtype=object)
+
+        # Standardization is fixed at build time; incremental updates reuse it
+        mean = self.raw.mean(axis=0) if len(self.raw) else np.zeros(len(FEATURES), dtype=np.float32)
+        std = self.raw.std(axis=0) if len(self.raw) else np.ones(len(FEATURES), dtype=np.float32)
+        self.mean = mean.astype(np.float32)
+        self.scale = (np.where(std > 0, std, 1.0) / WEIGHTS).astype(np.float32)
+        self.matrix = np.ascontiguousarray((self.raw - self.mean) / self.scale, dtype=np.float32)
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.unit = np.ascontiguousarray(self.matrix / np.where(norms > 0, norms, 1.0), dtype=np.float32)
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    def _index_positions(self) -> None:
+        self.positions: Dict[str, int] = {row_id(sb.name, sb.source): i for i, sb in enumerate(self.statblocks)}
+        self.by_name: Dict[str, int] = {}
+        for i, sb in enumerate(self.statblocks):
+            self.by_name.setdefault(sb.name.lower(), i)
+
+    def position(self, name: str, source: Optional[str] = None) -> int:
+        if source is not None:
+            return self.positions[row_id(name, source)]
+        return self.by_name[name.lower()]
+
+    # --- Incremental updates ---
+
+    def _standardize(self, raw: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        matrix = ((raw - self.mean) / self.scale).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        unit = matrix / np.where(norms > 0, norms, 1.0)
+        return matrix, unit, np.einsum("...j,...j->...", matrix, matrix)
+
+    def upsert(self, statblocks: Iterable[StatBlock]) -> None:
+        """Replace the rows of known monsters and append new ones."""
+        appended = []
+        for sb in statblocks:
+            pos = self.positions.get(row_id(sb.name, sb.source))
+            if pos is None:
+                appended.append(sb)
+                continue
+            vec = feature_vector(sb)
+            self.statblocks[pos] = sb
+            self.raw[pos] = vec
+            self.matrix[pos], self.unit[pos], self.sq_norms[pos] = self._standardize(vec)
+            self.types[pos], self.sizes[pos], self.sources[pos] = _creature_type(sb), sb.size, sb.source
+        if not appended:
+            return
+        raw = np.vstack([feature_vector(sb) for sb in appended])
+        matrix, unit, sq_norms = self._standardize(raw)
+        self.statblocks.extend(appended)
+        self.raw = np.ascontiguousarray(np.vstack([self.raw, raw]))
+        self.matrix = np.ascontiguousarray(np.vstack([self.matrix, matrix]))
+        self.unit = np.ascontiguousarray(np.vstack([self.unit, unit]))
+        self.sq_norms = np.concatenate([self.sq_norms, sq_norms])
+        self.types = np.concatenate([self.types, np.array([_creature_type(sb) for sb in appended], dtype=object)])
+        self.sizes = np.concatenate([self.sizes, np.array([sb.size for sb in appended], dtype=object)])
+        self.sources = np.concatenate([self.sources, np.array([sb.source for sb in appended], dtype=object)])
+        self._index_positions()
+
+    def remove(self, ids: Iterable[str]) -> None:
+        drop = [self.positions[id_] for id_ in ids if id_ in self.positions]
+        if not drop:
+            return
+        keep = np.setdiff1d(np.arange(len(self.statblocks)), drop)
+        self.statblocks = [self.statblocks[i] for i in keep]
+        for name in ("raw", "matrix", "unit", "sq_norms", "types", "sizes", "sources"):
+            setattr(self, name, np.ascontiguousarray(getattr(self, name)[keep]))
+        self._index_positions()
+
+    def apply_change(self, catalogue, change) -> None:
+        """`Catalogue.subscribe` hook: patch rows for whatever the last refresh touched."""
+        self.remove(change.removed)
+        self.upsert(catalogue.get(id_) for id_ in change.added + change.changed)
+
+    def query_vector(self, like: str | StatBlock, overrides: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Raw feature vector of a monster, with e.g. `{"cr": 5, "speed_fly": 60}` patched in."""
+        if isinstance(like, StatBlock):
+            vec = feature_vector(like)
+        else:
+            vec = self.raw[self.position(like)].copy()
+        for name, value in (overrides or {}).items():
+            vec[FEATURE_INDEX[name]] = value
+        return vec
+
+    def facet_mask(
+        self,
+        cr: Optional[Tuple[float, float]] = None,
+        types: Optional[Iterable[str]] = None,
+        sizes: Optional[Iterable[str]] = None,
+        sources: Optional[Iterable[str]] = None,
+        movement: Iterable[str] = (),
+    ) -> np.ndarray:
+        mask = np.ones(len(self.raw), dtype=bool)
+        if cr is not None:
+            crs = self.raw[:, FEATURE_INDEX["cr"]]
+            mask &= (crs >= cr[0]) & (crs <= cr[1])
+        if types:
+            mask &= np.isin(self.types, list(types))
+        if sizes:
+            mask &= np.isin(self.sizes, list(sizes))
+        if sources:
+            mask &= np.isin(self.sources, list(sources))
+        for mode in movement:
+            column = "hover" if mode == "hover" else f"speed_{mode}"
+            mask &= self.raw[:, FEATURE_INDEX[column]] > 0
+        return mask
+
+    def nearest(
+        self,
+        like: str | StatBlock,
+        k: int = 5,
+        metric: str = "cosine",
+        overrides: Optional[Dict[str, float]] = None,
+        exclude_self: bool = True,
+        **facets,
+    ) -> List[Tuple[StatBlock, float]]:
+        """Top-k monsters most similar to `like`, restricted by facets (see `facet_mask`).
+
+        Scores are cosine similarity (higher is closer) or euclidean distance (lower is closer).
+        """
+        query = (self.query_vector(like, overrides) - self.mean) / self.scale
+        mask = self.facet_mask(**facets)
+        if exclude_self and not isinstance(like, StatBlock):
+            mask[self.position(like)] = False
+        candidates = np.flatnonzero(mask)
+        if len(candidates) == 0:
+            return []
+
+        if metric == "cosine":
+            norm = np.linalg.norm(query)
+            scores = self.unit[candidates] @ (query / norm if norm > 0 else query)
+            order_key = -scores
+        elif metric == "euclidean":
+            # |a - b|^2 = |a|^2 - 2ab + |b|^2, with the row norms precomputed
+            sq = self.sq_norms[candidates] - 2 * (self.matrix[candidates] @ query) + query @ query
+            scores = np.sqrt(np.maximum(sq, 0))
+            order_key = scores
+        else:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        k = min(k, len(candidates))
+        top = np.argpartition(order_key, k - 1)[:k]
+        top = top[np.lexsort((top, order_key[top]))]
+        return [(self.statblocks[candidates[i]], float(scores[i])) for i in top]
@@ -1,6 +1,9 @@
 from dataclasses import dataclass, field
 from typing import List, Union, Optional, Dict, Any
 
+from .derived import DerivedStats, DerivedStatsMixin
+from .legendary import LegendaryGroupRef
+
 
 # --- Damage Types with Notes ---
 
@@ -42,6 +45,16 @@ class AbilityScores:
     wis_: int
     cha_: int
 
+    version = 0  # bumped on every score assignment
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name != "version":
+            object.__setattr__(self, "version", self.__dict__.get("version", 0) + 1)
+
+    def as_tuple(self):
+        return (self.str_, self.dex_, self.con_, self.int_, self.wis_, self.cha_)
+
 
 # --- Actions / Traits / Legendary ---
 
@@ -83,8 +96,14 @@ class CreatureType:
 # --- Main StatBlock ---
 
 
+def row_id(name: str, source: str) -> str:
+    """Stable id of a monster across reloads (catalogue key and DataFrame index)."""
+    return f"{source}:{name}"
+
+
+
 @dataclass
-class StatBlock:
+class StatBlock(DerivedStatsMixin):
     name: str
     size: str
     type_: Union[str, CreatureType]
@@ -115,161 +134,25 @@ class StatBlock:
     trait: List[Action] = field(default_factory=list)
     action: List[Action] = field(default_factory=list)
     legendary: Optional[List[Action]] = None
+    legendaryGroup: Optional[LegendaryGroupRef] = None
 
     page: Optional[int] = None
     spellcasting: Optional[List[Spellcasting]] = None
+    alias: List[str] = field(default_factory=list)  # other names it is known by
 
-    @classmethod
-    def from_json(cls, data: Dict[str, Any]) -> "StatBlock":
-        # Parse basic fields
-        name = data["name"]
-        size = data["size"]
-        type_ = data["type"]
-        if isinstance(type_, dict):
-            type_ = CreatureType(type_=type_["type"], tags=type_.get("tags"))
-        source = data["source"]
-        alignment = data["alignment"]
-
-        if isinstance(alignment, str):
-            alignment = [alignment]
-        if isinstance(alignment, list):
-            if len(alignment) > 0:
-                if isinstance(alignment[0], dict):
-                    temp = []
-                    for al in alignment:
-                        datat = dict(al)
-                        temp.append(
-                            ",".join(datat["alignment"]) + f" {datat['chance']}%"
-                        )
-                    alignment = temp
-
-        ac = data["ac"]
-        hp = data["hp"]
-        speed = Speed(
-            modes={
-                key: (SpeedEntry(number=value) if isinstance(value, dict) else value)
-                for key, value in data["speed"].items()
-            }
-        )
-        abilities = AbilityScores(
-            str_=data["str"],
-            dex_=data["dex"],
-            con_=data["con"],
-            int_=data["int"],
-            wis_=data["wis"],
-            cha_=data["cha"],
-        )
-
-        saves = data.get("save")
-        skills = data.get("skill")
+    _derived_sources = ("ac", "cr", "abilities", "saves", "skills")
+    _tracked_sources = ("saves", "skills")
 
-        # Parse resistances, immunities, and vulnerabilities
-        def parse_damage_modifiers(modifiers: Any, key) -> DamageModifier:
-            damage_modifier = DamageModifier()
-            if isinstance(modifiers, list):
-                for modifier in modifiers:
-                    if isinstance(modifier, str):
-                        damage_modifier.entries.append(modifier)
-                    else:
-                        if key in modifier:
-                            damage_modifier.entries.append(
-                                DamageModifierNote(
-                                    types=modifier[key], note=modifier.get("note", "")
-                                )
-                            )
-                        else:
-                            damage_modifier.entries.append(modifier)
-            return damage_modifier
-
-        resist = parse_damage_modifiers(data.get("resist", []), "resist")
-        immune = parse_damage_modifiers(data.get("immune", []), "immune")
-        vulnerable = parse_damage_modifiers(data.get("vulnerable", []), "vulnerable")
-
-        # Parse condition immunities
-        conditionImmune = data.get("conditionImmune", [])
-
-        # Parse senses, passive, languages, CR
-        senses = data.get("senses")
-        passive = data.get("passive")
-        languages = data.get("languages")
-        cr = data.get("cr")
-
-        # Parse traits, actions, legendary actions
-        def parse_actions(actions: List[Dict[str, Any]]) -> List[Action]:
-            parsed_actions = []
-            for action in actions:
-                entries = []
-                for entry in action["entries"]:
-                    if isinstance(entry, dict):
-                        entries.append(
-                            NestedEntry(
-                                type_=entry["type"],
-                                style=entry.get("style"),
-                                items=entry["items"],
-                            )
-                        )
-                    else:
-                        entries.append(entry)
-                parsed_actions.append(Action(name=action["name"], entries=entries))
-            return parsed_actions
-
-        trait = parse_actions(data.get("trait", []))
-        action = parse_actions(data.get("action", []))
-        legendary = (
-            parse_actions(data.get("legendary", [])) if "legendary" in data else None
+    def _compute_derived(self) -> DerivedStats:
+        return DerivedStats.compute(
+            self.abilities.as_tuple(), self.ac, self.cr, self.saves, self.skills
         )
 
-        # Parse page
-        page = data.get("page")
-
-        def parse_spellcasting(sc_data: Any) -> List[Spellcasting]:
-            result: List[Spellcasting] = []
-            for block in sc_data:
-                slots_map: Dict[int, SpellSlot] = {}
-                for lvl_str, info in block.get("spells", {}).items():
-                    lvl = int(lvl_str)
-                    slots = info.get("slots")
-                    spells = info.get("spells", [])
-                    slots_map[lvl] = SpellSlot(level=lvl, slots=slots, spells=spells)
-                result.append(
-                    Spellcasting(
-                        name=block["name"],
-                        headerEntries=block.get("headerEntries", []),
-                        spells=slots_map,
-                        footerEntries=block.get("footerEntries"),
-                    )
-                )
-            return result
-
-        spellcasting = parse_spellcasting(data.get("spellcasting", []))
-
-        # Create and return the StatBlock object
-        return cls(
-            name=name,
-            size=size,
-            type_=type_,
-            source=source,
-            alignment=alignment,
-            ac=ac,
-            hp=hp,
-            speed=speed,
-            abilities=abilities,
-            saves=saves,
-            skills=skills,
-            resist=resist,
-            immune=immune,
-            vulnerable=vulnerable,
-            conditionImmune=conditionImmune,
-            senses=senses,
-            passive=passive,
-            languages=languages,
-            cr=cr,
-            trait=trait,
-            action=action,
-            legendary=legendary,
-            page=page,
-            spellcasting=spellcasting,
-        )
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "StatBlock":
+        from .decoder import decode_monster
+
+        return decode_monster(data, cls)
 
     def to_pandas_row(self):
         # Flatten basic attributes
@@ -311,6 +194,12 @@ class StatBlock:
                 if "coven" in self.cr:
                     row["cr"] = f"{self.cr["cr"]} (coven {self.cr['coven']})"
 
+        # Numeric columns for filtering and sorting
+        row["cr_float"] = self.derived.cr
+        row["ac_value"] = self.derived.ac
+        row["pb"] = self.derived.proficiency
+        row["xp"] = self.derived.xp
+
         # Flatten Speed (modes as comma-separated list or number)
         for mode, value in self.speed.modes.items():
             if isinstance(value, SpeedEntry):
@@ -364,6 +253,8 @@ class StatBlock:
 
         if self.legendary:
             flatten_actions(self.legendary, "legendary")
+        if self.legendaryGroup:
+            row["legendary_group"] = self.legendaryGroup.name
 
         # Spellcasting (currently ignored, you can follow the same pattern if needed)
 
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .catalogue import Catalogue
+
+# Paged, projected view over the catalogue DataFrame for the Monsters page.
+#
+# Only one page of summary columns ever leaves the server; the long flattened
+# trait/action/legendary text stays behind and is read per row when it is
+# expanded. Rows are addressed by their catalogue id (`row_id`), never by
+# position, so selections survive sorting, paging and reloads. Sort orders are
+# computed once per column and reused until the catalogue changes.
+
+SUMMARY_COLUMNS = ("name", "source", "size", "type", "cr", "ac_value", "hp_avg", "alignment")
+
+# Columns whose display value does not sort correctly ("1/2" vs "10")
+SORT_KEYS = {"cr": "cr_float"}
+
+
+@dataclass
+class TableWindow:
+    rows: pd.DataFrame  # one page, summary columns only, indexed by row id
+    total: int  # rows matching the filter
+    page: int
+    pages: int
+
+    @property
+    def ids(self) -> list:
+        return list(self.rows.index)
+
+
+class TableView:
+    def __init__(self, catalogue: Catalogue, columns: Sequence[str] = SUMMARY_COLUMNS):
+        self.catalogue = catalogue
+        self.columns = list(columns)
+        self._orders: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._frame: Optional[pd.DataFrame] = None  # the frame `_orders` were computed on
+
+    def _order(self, df: pd.DataFrame, column: str, ascending: bool) -> np.ndarray:
+        """Row positions of `df` sorted by `column` (stable, missing values last)."""
+        if df is not self._frame:
+            # The catalogue swaps in a new frame on every change, so identity tells stale orders apart
+            self._orders = {}
+            self._frame = df
+        key = (column, ascending)
+        order = self._orders.get(key)
+        if order is None:
+            values = df[SORT_KEYS.get(column, column)]
+            if values.dtype == object or pd.api.types.is_string_dtype(values):
+                values = values.str.lower()
+            order = values.reset_index(drop=True).sort_values(
+                ascending=ascending, kind="stable", na_position="last"
+            ).index.to_numpy()
+            self._orders[key] = order
+        return order
+
+    def window(
+        self,
+        mask: Optional[pd.Series] = None,
+        sort_by: str = "name",
+        ascending: bool = True,
+        page: int = 0,
+        page_size: int = 50,
+        df: Optional[pd.DataFrame] = None,
+    ) -> TableWindow:
+        """Page `page` of the rows selected by the boolean `mask`, sorted by `sort_by`.
+
+        `df` is the frame the mask was built on (a snapshot of `catalogue.df`
+        taken once per page run); it defaults to the current one.
+        """
+        with self.catalogue.lock:
+            if df is None:
+                df = self.catalogue.df
+            order = self._order(df, sort_by, ascending)
+            if mask is not None:
+                order = order[mask.reindex(df.index, fill_value=False).to_numpy(dtype=bool)[order]]
+            total = len(order)
+            pages = max(1, -(-total // page_size))
+            page = min(max(page, 0), pages - 1)
+            positions = order[page * page_size:(page + 1) * page_size]
+            rows = df.iloc[positions][[c for c in self.columns if c in df.columns]]
+        return TableWindow(rows=rows, total=total, page=page, pages=pages)
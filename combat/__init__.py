@@ -1,5 +1,29 @@
 # combat/__init__.py
+#
+# Names are resolved on first access (PEP 562), so `import combat` is cheap and
+# the sample encounter is only built when something asks for it.
 
-from .combatant import Combatant, Action
-from .battle_manager import Encounter
-from .default_encounter import default_encounter
\ No newline at end of file
+import importlib
+
+_LAZY = {
+    "Combatant": ".combatant",
+    "Action": ".combatant",
+    "Encounter": ".battle_manager",
+    "EncounterRegistry": ".registry",
+    "default_encounter": ".default_encounter",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # later lookups skip this hook
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,24 +1,302 @@
+import bisect
 import json
-from .combatant import Combatant
+import secrets
+from typing import TYPE_CHECKING, Optional, Tuple
+from bestiary.legendary import LegendaryGroup
+from .combatant import Combatant, StatBlock
+from .effects import END, START, ConditionImmune, Effect, EffectEvent, EffectTracker, Time
+
+if TYPE_CHECKING:
+    from .dice import Dice
+    from .grid import SpatialHash
+    from .pathing import Pathfinder, Reach, TerrainMap
+
+# Lair actions happen on initiative count 20, losing initiative ties
+LAIR_INITIATIVE = 20
 
 
 class Encounter:
-    def __init__(self, combatants: list[Combatant]):
+    def __init__(self, combatants: list[Combatant], seed: Optional[int] = None):
         self.round = 1
         self.combatants = sorted(combatants, key=lambda x: x.initiative, reverse=True)
         self.turn_index = 0
+        # Join order breaks initiative ties and never changes, unlike list indices
+        self.joined = {c.id: i for i, c in enumerate(self.combatants)}
+        self.effects = EffectTracker()
+        self.last_events: list[EffectEvent] = []  # from the latest turn change, not saved
+        # Every roll of the fight comes from one generator, saved with the encounter
+        self.seed = seed if seed is not None else secrets.randbits(32)
+        self._dice: Optional["Dice"] = None
+        self._grid: Optional["SpatialHash"] = None
+        self.terrain: Optional["TerrainMap"] = None
+        self._pathfinder: Optional["Pathfinder"] = None
+
+    def next_turn(self) -> list[EffectEvent]:
+        """Advance to the next combatant's turn, recharging actions if needed.
 
-    def next_turn(self):
-        """Advance to the next combatant's turn, recharging actions if needed."""
+        Returns the effect events that came due: expiries and repeated saves
+        from the end of the previous turn up to the start of this one.
+        """
         self.turn_index = (self.turn_index + 1) % len(self.combatants)
 
         # Recharge actions at start of each turn
-        self.combatants[self.turn_index].recharge_actions()
+        self._recharge_current()
 
         # Increment round if back to first combatant
         if self.turn_index == 0:
             self.round += 1
 
+        self.last_events = self.effects.advance(self.now(), self._next_save)
+        return self.last_events
+
+    # ===== TURN ORDER =====
+
+    def _recharge_current(self) -> None:
+        current = self.get_current()
+        if current.pending_recharges():
+            current.recharge_actions(self.dice)
+
+    def order_key(self, combatant: Combatant) -> Tuple[int, int]:
+        return -combatant.initiative, self.joined[combatant.id]
+
+    def time_of(self, combatant: Combatant, phase: int, round_: int) -> Time:
+        return (round_,) + self.order_key(combatant) + (phase,)
+
+    def now(self) -> Time:
+        """The start of the current turn."""
+        return self.time_of(self.get_current(), START, self.round)
+
+    def combatant(self, combatant_id: str) -> Optional[Combatant]:
+        return next((c for c in self.combatants if c.id == combatant_id), None)
+
+    def add_combatant(self, combatant: Combatant) -> None:
+        """Join the fight in initiative order; the current turn stays with whoever has it."""
+        self.joined[combatant.id] = max(self.joined.values(), default=-1) + 1
+        keys = [self.order_key(c) for c in self.combatants]
+        index = bisect.bisect(keys, self.order_key(combatant))
+        self.combatants.insert(index, combatant)
+        if self._grid is not None and combatant.position is not None:
+            self._place(combatant)
+        if index <= self.turn_index and len(self.combatants) > 1:
+            self.turn_index += 1
+
+    def remove_combatant(self, combatant_id: str) -> Optional[Combatant]:
+        """Leave the fight; if it was their turn, the next combatant's turn begins."""
+        index = next((i for i, c in enumerate(self.combatants) if c.id == combatant_id), None)
+        if index is None:
+            return None
+        combatant = self.combatants.pop(index)
+        self.joined.pop(combatant_id, None)
+        self.effects.drop_combatant(combatant_id)
+        if self._grid is not None:
+            self._grid.remove(combatant_id)
+        if index < self.turn_index:
+            self.turn_index -= 1
+        elif index == self.turn_index and self.combatants:
+            if self.turn_index >= len(self.combatants):
+                self.turn_index = 0
+                self.round += 1
+            self._recharge_current()
+            self.last_events = self.effects.advance(self.now(), self._next_save)
+        return combatant
+
+    # ===== ROLLS =====
+
+    @property
+    def dice(self) -> "Dice":
+        """Created on the first roll (it brings in NumPy)."""
+        if self._dice is None:
+            from .dice import Dice
+
+            self._dice = Dice(self.seed)
+        return self._dice
+
+    def roll_initiative(self, include_pcs: bool = False) -> None:
+        """Roll d20 + DEX for every monster (and PCs if asked) in one batch, then re-sort.
+
+        Effects are scheduled by initiative slot, so this is only allowed before
+        any effect is applied.
+        """
+        if self.effects:
+            raise ValueError("initiative can only be rolled before effects are applied")
+        rollers = [c for c in self.combatants if include_pcs or not c.is_pc]
+        rolls = self.dice.roll_initiative([c.statblock.abilities.get_modifier("dex") for c in rollers])
+        for combatant, roll in zip(rollers, rolls):
+            combatant.initiative = int(roll)
+        current = self.get_current()
+        self.combatants.sort(key=self.order_key)
+        self.turn_index = self.combatants.index(current)
+
+    def spawn(self, statblock: StatBlock, count: int = 1) -> list[Combatant]:
+        """Add `count` copies of a monster mid-fight, with rolled initiative and unique names."""
+        taken = {c.name for c in self.combatants}
+        rolls = self.dice.roll_initiative([statblock.abilities.get_modifier("dex")] * count)
+        spawned = []
+        for roll in rolls:
+            name, n = statblock.name, 1
+            while name in taken:
+                n += 1
+                name = f"{statblock.name} {n}"
+            taken.add(name)
+            # Each copy gets its own statblock, so spent actions and rolled HP stay per creature
+            combatant = Combatant(name=name, statblock=StatBlock.from_dict(statblock.to_dict()), initiative=int(roll))
+            self.add_combatant(combatant)
+            spawned.append(combatant)
+        return spawned
+
+    def roll_hit_points(self) -> None:
+        """Roll each monster's hit dice, batching creatures that share a formula."""
+        by_formula: dict[str, list[Combatant]] = {}
+        for c in self.combatants:
+            if not c.is_pc and c.statblock.hit_dice:
+                by_formula.setdefault(c.statblock.hit_dice, []).append(c)
+        for formula, group in by_formula.items():
+            for combatant, hp in zip(group, self.dice.roll_hp(formula, len(group))):
+                combatant.statblock.max_HP = combatant.HP = int(hp)
+
+    # ===== GRID =====
+
+    @property
+    def grid(self) -> "SpatialHash":
+        """Index of combatant positions for area queries, built on first use."""
+        if self._grid is None:
+            from .grid import SpatialHash
+
+            self._grid = SpatialHash()
+            for c in self.combatants:
+                if c.position is not None:
+                    self._place(c)
+        return self._grid
+
+    def _place(self, combatant: Combatant) -> None:
+        from .grid import footprint
+
+        self._grid.place(combatant.id, combatant.position, footprint(combatant.statblock.size))
+
+    def move(self, combatant_id: str, position: Optional[Tuple[int, int]]) -> None:
+        """Put a combatant on a grid square (None takes it off the map)."""
+        combatant = self.combatant(combatant_id)
+        if combatant is None:
+            raise KeyError(combatant_id)
+        combatant.position = tuple(position) if position is not None else None
+        if self._grid is None:
+            return
+        if combatant.position is None:
+            self._grid.remove(combatant_id)
+        else:
+            self._place(combatant)
+
+    # ===== MOVEMENT =====
+
+    def set_terrain(self, terrain: Optional["TerrainMap"]) -> None:
+        self.terrain = terrain
+        self._pathfinder = None
+
+    @property
+    def pathfinder(self) -> "Pathfinder":
+        """Reach and route queries over `terrain`; keeps its cache across edits of the same map."""
+        if self.terrain is None:
+            raise ValueError("the encounter has no terrain map")
+        if self._pathfinder is None:
+            from .pathing import Pathfinder
+
+            self._pathfinder = Pathfinder(self.terrain)
+        return self._pathfinder
+
+    def reach(self, combatant_id: str, dash: bool = False) -> Optional["Reach"]:
+        """Squares a combatant can move to this turn (None if it isn't on the grid)."""
+        from .grid import footprint
+        from .pathing import MovementProfile
+
+        combatant = self.combatant(combatant_id)
+        if combatant is None:
+            raise KeyError(combatant_id)
+        if combatant.position is None:
+            return None
+        sb = combatant.statblock
+        return self.pathfinder.reach(combatant.position, MovementProfile.of(sb.speed, footprint(sb.size)), dash)
+
+    def movement_ranges(self, dash: bool = False) -> dict[str, "Reach"]:
+        """Reach of every combatant on the grid, by id."""
+        return {c.id: self.reach(c.id, dash) for c in self.combatants if c.position is not None}
+
+    # ===== EFFECTS =====
+
+    def _next_save(self, effect: Effect, after: Time) -> Optional[Time]:
+        target = self.combatant(effect.target)
+        if target is None:
+            return None
+        return self.time_of(target, effect.save_phase, after[0] + 1)
+
+    def _next_occurrence(self, combatant: Combatant, phase: int) -> Time:
+        """The next START/END of the combatant's turn; "next" skips the turn in progress."""
+        due = self.time_of(combatant, phase, self.round)
+        if due <= self.now() or combatant is self.get_current():
+            due = self.time_of(combatant, phase, self.round + 1)
+        return due
+
+    def apply_effect(
+        self,
+        target_id: str,
+        name: str,
+        condition: Optional[str] = None,
+        rounds: Optional[int] = None,
+        until: Optional[Tuple[str, str]] = None,
+        source_id: Optional[str] = None,
+        concentration: bool = False,
+        save_ability: Optional[str] = None,
+        save_dc: Optional[int] = None,
+        save_at: str = "end",
+    ) -> Effect:
+        """Put an effect on a combatant.
+
+        Duration is either `rounds` (10 for 1 minute, counted from the current
+        turn), `until=("end" | "start", combatant_id)` for "until the end of
+        its next turn", or neither for "until removed". With `save_ability`
+        and `save_dc` the target repeats the save at the end (or start) of each
+        of its turns. Raises `ConditionImmune` if the target's statblock lists
+        the condition.
+        """
+        target = self.combatant(target_id)
+        if target is None:
+            raise KeyError(target_id)
+        if condition is not None and condition.lower() in (c.lower() for c in target.statblock.condition_immune):
+            raise ConditionImmune(target.name, condition)
+
+        expires = None
+        if rounds is not None:
+            expires = (self.round + rounds,) + self.now()[1:]
+        elif until is not None:
+            phase, anchor_id = until
+            anchor = self.combatant(anchor_id)
+            if anchor is None:
+                raise KeyError(anchor_id)
+            expires = self._next_occurrence(anchor, END if phase == "end" else START)
+
+        save_phase = END if save_at == "end" else START
+        next_save = None
+        if save_ability and save_dc:
+            next_save = self.time_of(target, save_phase, self.round)
+            if next_save <= self.now():
+                next_save = self.time_of(target, save_phase, self.round + 1)
+
+        return self.effects.add(Effect(
+            name=name,
+            target=target_id,
+            condition=condition,
+            source=source_id,
+            concentration=concentration,
+            save_ability=save_ability,
+            save_dc=save_dc,
+            save_phase=save_phase,
+            expires=expires,
+            next_save=next_save,
+        ))
+
+    def end_effect(self, effect_id: str) -> Optional[Effect]:
+        """End an effect early (a successful save, dispel, ...)."""
+        return self.effects.remove(effect_id)
+
     def get_current(self) -> Combatant:
         """Return the combatant whose turn it currently is."""
         return self.combatants[self.turn_index]
@@ -31,11 +309,48 @@ class Encounter:
         """Combatants who are still to act this round."""
         return self.combatants[self.turn_index + 1:]
 
+    def legendary_groups(self) -> list[LegendaryGroup]:
+        """Legendary groups of the living monsters in the fight, one per group."""
+        groups = {}
+        for c in self.combatants:
+            ref = c.statblock.legendary_group
+            if ref is None or ref in groups or c.HP <= 0:
+                continue
+            group = ref.resolve()
+            if group is not None:
+                groups[ref] = group
+        return list(groups.values())
+
+    def lair_groups(self) -> list[LegendaryGroup]:
+        """Legendary groups in the fight that have lair actions."""
+        return [group for group in self.legendary_groups() if group.lairActions]
+
+    def regional_groups(self) -> list[LegendaryGroup]:
+        """Legendary groups in the fight whose lair changes the region around it."""
+        return [group for group in self.legendary_groups() if group.regionalEffects]
+
+    def lair_turn_index(self) -> int:
+        """Turn the lair action comes before: the first combatant below initiative 20."""
+        for i, c in enumerate(self.combatants):
+            if c.initiative < LAIR_INITIATIVE:
+                return i
+        return 0  # everyone beat 20, so the lair acts at the top of the next round
+
+    def lair_actions_due(self) -> list[LegendaryGroup]:
+        """Groups whose lair actions trigger right before the current turn (empty if none)."""
+        if self.turn_index != self.lair_turn_index():
+            return []
+        return self.lair_groups()
+
     def to_dict(self) -> dict:
         return {
             "round": self.round,
             "turn_index": self.turn_index,
-            "combatants": [c.to_dict() for c in self.combatants]
+            "combatants": [c.to_dict() for c in self.combatants],
+            "joined": self.joined,
+            "effects": self.effects.to_list(),
+            "dice": self._dice.to_dict() if self._dice is not None else {"seed": self.seed},
+            "terrain": self.terrain.to_dict() if self.terrain is not None else None,
         }
 
     @classmethod
@@ -44,6 +359,19 @@ class Encounter:
         instance = cls(combatants)
         instance.round = data["round"]
         instance.turn_index = data["turn_index"]
+        if "joined" in data:
+            instance.joined = dict(data["joined"])
+        instance.effects = EffectTracker.from_list(data.get("effects", []))
+        if "dice" in data:
+            instance.seed = data["dice"]["seed"]
+            if "block_state" in data["dice"]:
+                from .dice import Dice
+
+                instance._dice = Dice.from_dict(data["dice"])
+        if data.get("terrain"):
+            from .pathing import TerrainMap
+
+            instance.terrain = TerrainMap.from_dict(data["terrain"])
         return instance
 
     def save(self, filepath: str):
@@ -1,8 +1,14 @@
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict
+from typing import TYPE_CHECKING, List, Optional, Dict, Tuple
 from enum import Enum
 import json
-import random
+import uuid
+
+from bestiary.derived import DerivedStats, DerivedStatsMixin
+from bestiary.legendary import LegendaryGroupRef
+
+if TYPE_CHECKING:
+    from .dice import Dice  # NumPy is only loaded once something is rolled
 
 
 # ===== ENUMS =====
@@ -18,15 +24,19 @@ class MovementType(Enum):
 
 # ===== SPEED =====
 
+MOVEMENT_TYPES = tuple(MovementType)
+MOVEMENT_BY_NAME = {movement.value: movement for movement in MovementType}
+
+
 class Speed:
     def __init__(self, **speeds: int):
-        self.speeds = {movement: 0 for movement in MovementType}
+        self.speeds = dict.fromkeys(MOVEMENT_TYPES, 0)
         for key, value in speeds.items():
             if isinstance(key, MovementType):
                 self.speeds[key] = value
             elif isinstance(key, str):
                 try:
-                    self.speeds[MovementType[key.upper()]] = value
+                    self.speeds[MOVEMENT_BY_NAME[key.lower()]] = value
                 except KeyError:
                     raise ValueError(f"Unknown movement type: {key}")
 
@@ -55,14 +65,15 @@ class Speed:
 # ===== ABILITIES =====
 
 class Abilities:
+    SCORES = ("STR", "DEX", "CON", "INT", "WIS", "CHA")
+
     def __init__(self, str_: int, dex_: int, con_: int,
                  int_: int, wis_: int, cha_: int):
-        self.STR = str_
-        self.DEX = dex_
-        self.CON = con_
-        self.INT = int_
-        self.WIS = wis_
-        self.CHA = cha_
+        scores = dict(zip(self.SCORES, (str_, dex_, con_, int_, wis_, cha_)))
+        # Bypass __setattr__ while all six scores are set at once
+        self.__dict__.update(scores)
+        self.__dict__["modifiers"] = {name: (value - 10) // 2 for name, value in scores.items()}
+        self.__dict__["version"] = 0
 
     def to_dict(self):
         return {
@@ -85,11 +96,21 @@ class Abilities:
             cha_=data["CHA"],
         )
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # Keep modifiers precomputed; only a score change touches them
+        if name in self.SCORES:
+            self.modifiers[name] = (value - 10) // 2
+            self.__dict__["version"] += 1
+
+    def as_tuple(self):
+        return (self.STR, self.DEX, self.CON, self.INT, self.WIS, self.CHA)
+
     def get_modifier(self, ability: str) -> int:
-        value = getattr(self, ability.upper(), None)
-        if value is None:
+        try:
+            return self.modifiers[ability.upper()]
+        except KeyError:
             raise ValueError(f"Unknown ability: {ability}")
-        return (value - 10) // 2
 
     def __repr__(self):
         return ", ".join(f"{k}: {v}" for k, v in self.to_dict().items())
@@ -104,9 +125,11 @@ class Action:
     recharge: Optional[int] = None
     available: bool = True
 
-    def recharge_roll(self):
+    def recharge_roll(self, dice: Optional["Dice"] = None):
         if self.recharge:
-            self.available = random.randint(1, 6) >= self.recharge
+            if dice is None:
+                from .dice import default_dice as dice
+            self.available = dice.d(6) >= self.recharge
 
     def to_dict(self):
         return {
@@ -129,7 +152,7 @@ class Action:
 # ===== STATBLOCK =====
 
 @dataclass
-class StatBlock:
+class StatBlock(DerivedStatsMixin):
     name: str
     size: str = "Medium"
     creature_type: str = ""
@@ -143,6 +166,7 @@ class StatBlock:
     abilities: Abilities = field(default_factory=lambda: Abilities(10, 10, 10, 10, 10, 10))
     saves: Dict[str, str] = field(default_factory=dict)
     skills: Dict[str, str] = field(default_factory=dict)
+    condition_immune: List[str] = field(default_factory=list)
     senses: str = ""
     passive_perception: int = 10
     languages: str = ""
@@ -150,9 +174,17 @@ class StatBlock:
     traits: List[Action] = field(default_factory=list)
     actions: List[Action] = field(default_factory=list)
     legendary: List[Action] = field(default_factory=list)
-    legendary_group: Optional[str] = None
+    legendary_group: Optional[LegendaryGroupRef] = None
     page: Optional[int] = None
 
+    _derived_sources = ("armor_class", "challenge_rating", "abilities", "saves", "skills")
+    _tracked_sources = ("saves", "skills")
+
+    def _compute_derived(self) -> DerivedStats:
+        return DerivedStats.compute(
+            self.abilities.as_tuple(), self.armor_class, self.challenge_rating, self.saves, self.skills
+        )
+
     def to_dict(self):
         return {
             "name": self.name,
@@ -168,6 +200,7 @@ class StatBlock:
             "abilities": self.abilities.to_dict(),
             "saves": self.saves,
             "skills": self.skills,
+            "condition_immune": self.condition_immune,
             "senses": self.senses,
             "passive_perception": self.passive_perception,
             "languages": self.languages,
@@ -175,40 +208,49 @@ class StatBlock:
             "traits": [a.to_dict() for a in self.traits],
             "actions": [a.to_dict() for a in self.actions],
             "legendary": [a.to_dict() for a in self.legendary],
-            "legendary_group": self.legendary_group,
+            "legendary_group": self.legendary_group.to_dict() if self.legendary_group else None,
             "page": self.page
         }
 
     @classmethod
     def from_dict(cls, data: dict):
+        """Inverse of `to_dict` (the save-file format)."""
         return cls(
             name=data["name"],
-            size=data["size"],
-            creature_type=data["type"],
+            size=data.get("size", "Medium"),
+            creature_type=data.get("type", ""),
             alignment=data.get("alignment", []),
             source=data.get("source", ""),
-            armor_class=int(data["ac"].split()[0]) if isinstance(data["ac"], str) else data["ac"],
-            armor_desc=" ".join(data["ac"].split()[1:]) if isinstance(data["ac"], str) and " " in data["ac"] else None,
-            hit_dice=data["hp"]["formula"],
-            max_HP=data["hp"]["average"],
+            armor_class=data.get("armor_class", 10),
+            armor_desc=data.get("armor_desc"),
+            hit_dice=data.get("hit_dice", "1d8"),
+            max_HP=data.get("max_HP", 1),
             speed=Speed.from_dict(data.get("speed", {})),
-            abilities=Abilities(
-                str_=data["str"], dex_=data["dex"], con_=data["con"],
-                int_=data["int"], wis_=data["wis"], cha_=data["cha"]
-            ),
-            saves=data.get("save", {}),
-            skills=data.get("skill", {}),
+            abilities=Abilities.from_dict(data["abilities"]) if "abilities" in data else Abilities(10, 10, 10, 10, 10, 10),
+            saves=data.get("saves", {}),
+            skills=data.get("skills", {}),
+            condition_immune=data.get("condition_immune", []),
             senses=data.get("senses", ""),
-            passive_perception=data.get("passive", 10),
+            passive_perception=data.get("passive_perception", 10),
             languages=data.get("languages", ""),
-            challenge_rating=data.get("cr", "0"),
-            traits=[Action(name=t["name"], entries=t.get("entries", [])) for t in data.get("trait", [])],
-            actions=[Action(name=a["name"], entries=a.get("entries", [])) for a in data.get("action", [])],
-            legendary=[Action(name=l["name"], entries=l.get("entries", [])) for l in data.get("legendary", [])],
-            legendary_group=data.get("legendaryGroup"),
+            challenge_rating=data.get("challenge_rating", "0"),
+            traits=[Action.from_dict(a) for a in data.get("traits", [])],
+            actions=[Action.from_dict(a) for a in data.get("actions", [])],
+            legendary=[Action.from_dict(a) for a in data.get("legendary", [])],
+            legendary_group=(
+                LegendaryGroupRef.from_json(data["legendary_group"], data.get("source", "MM"))
+                if data.get("legendary_group") else None
+            ),
             page=data.get("page")
         )
 
+    @classmethod
+    def from_json(cls, data: dict):
+        """Build from a raw 5etools monster record (see `bestiary.decoder`)."""
+        from bestiary.decoder import decode_monster_pair
+
+        return decode_monster_pair(data)[1]
+
 
 # ===== COMBATANT =====
 
@@ -219,6 +261,8 @@ class Combatant:
     initiative: int
     HP: Optional[int] = None
     is_pc: bool = False
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    position: Optional[Tuple[int, int]] = None  # grid square; move through Encounter.move
 
     def __post_init__(self):
         if self.HP is None:
@@ -228,19 +272,27 @@ class Combatant:
         self.HP = max(0, self.HP - amount)
 
     def heal(self, amount: int):
-        self.current_HP = min(self.statblock.max_HP, self.HP + amount)
+        self.HP = min(self.statblock.max_HP, self.HP + amount)
+
+    def pending_recharges(self) -> List[Action]:
+        return [a for a in self.statblock.actions + self.statblock.legendary if not a.available and a.recharge]
+
+    def recharge_actions(self, dice: Optional["Dice"] = None):
+        """Roll every spent recharge action in one batch."""
+        pending = self.pending_recharges()
+        if pending:
+            from .dice import default_dice, roll_recharges
 
-    def recharge_actions(self):
-        for action in self.statblock.actions + self.statblock.legendary:
-            if not action.available and action.recharge:
-                action.recharge_roll()
+            roll_recharges(pending, dice or default_dice)
 
     def to_dict(self):
         return {
+            "id": self.id,
             "name": self.name,
             "initiative": self.initiative,
-            "current_HP": self.current_HP,
+            "current_HP": self.HP,
             "is_pc": self.is_pc,
+            "position": list(self.position) if self.position else None,
             "statblock": self.statblock.to_dict()
         }
 
@@ -249,7 +301,9 @@ class Combatant:
         return cls(
             name=data["name"],
             initiative=data["initiative"],
-            current_HP=data.get("current_HP"),
+            HP=data.get("current_HP"),
             is_pc=data.get("is_pc", False),
-            statblock=StatBlock.from_dict(data["statblock"])
+            position=tuple(data["position"]) if data.get("position") else None,
+            statblock=StatBlock.from_dict(data["statblock"]),
+            **({"id": data["id"]} if "id" in data else {})
         )
@@ -0,0 +1,146 @@
+import re
+import secrets
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# All dice of an encounter come from one seeded NumPy generator.
+#
+# Uniform draws are taken from the generator in blocks and turned into die
+# faces on demand, so a single roll costs an array index instead of a call into
+# the generator, and batch rolls (HP for a whole group, initiative for the whole
+# encounter) are one vectorized operation. The saved state is the generator
+# state at the start of the current block plus the position inside it, which is
+# enough to replay the exact same rolls after a reload.
+
+DICE_RE = re.compile(r"^\s*(\d*)\s*d\s*(\d+)\s*(?:([+-])\s*(\d+))?\s*$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class DiceFormula:
+    count: int
+    sides: int
+    bonus: int = 0
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def parse(cls, text: str) -> "DiceFormula":
+        """"12d10+24" -> DiceFormula(12, 10, 24); a bare number is a fixed value."""
+        text = str(text).strip()
+        if text.lstrip("+-").isdigit():
+            return cls(0, 1, int(text))
+        match = DICE_RE.match(text)
+        if match is None:
+            raise ValueError(f"not a dice formula: {text!r}")
+        count, sides, sign, bonus = match.groups()
+        bonus = int(bonus or 0)
+        return cls(int(count or 1), int(sides), -bonus if sign == "-" else bonus)
+
+    @property
+    def average(self) -> int:
+        return self.count * (self.sides + 1) // 2 + self.bonus
+
+    def __str__(self) -> str:
+        bonus = f"{self.bonus:+d}" if self.bonus else ""
+        return f"{self.count}d{self.sides}{bonus}" if self.count else str(self.bonus)
+
+
+class Dice:
+    def __init__(self, seed: Optional[int] = None, block_size: int = 4096):
+        self.seed = seed if seed is not None else secrets.randbits(32)
+        self.block_size = block_size
+        self._rng = np.random.default_rng(self.seed)
+        self._refill()
+
+    # --- Blocks ---
+
+    def _refill(self) -> None:
+        self._block_state = self._rng.bit_generator.state
+        self._block = self._rng.random(self.block_size)
+        self._pos = 0
+
+    def _uniform(self, n: int) -> np.ndarray:
+        parts = []
+        while n:
+            if self._pos >= self.block_size:
+                self._refill()
+            take = min(n, self.block_size - self._pos)
+            parts.append(self._block[self._pos:self._pos + take])
+            self._pos += take
+            n -= take
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    # --- Rolls ---
+
+    def d(self, sides: int) -> int:
+        """One die."""
+        if self._pos >= self.block_size:
+            self._refill()
+        value = int(self._block[self._pos] * sides) + 1
+        self._pos += 1
+        return value
+
+    def dice(self, sides: int, shape) -> np.ndarray:
+        """An array of die faces (1..sides) of the given shape."""
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        return (self._uniform(int(np.prod(shape))) * sides).astype(np.int64).reshape(shape) + 1
+
+    def roll(self, formula: str | DiceFormula, n: int = 1) -> np.ndarray:
+        """Totals of `n` independent rolls of a formula like "2d6+3"."""
+        if not isinstance(formula, DiceFormula):
+            formula = DiceFormula.parse(formula)
+        if formula.count == 0:
+            return np.full(n, formula.bonus, dtype=np.int64)
+        return self.dice(formula.sides, (n, formula.count)).sum(axis=1) + formula.bonus
+
+    def roll_hp(self, formula: str | DiceFormula, n: int = 1) -> np.ndarray:
+        """Hit points for `n` creatures; never below 1."""
+        return np.maximum(self.roll(formula, n), 1)
+
+    def roll_initiative(self, modifiers: Sequence[int]) -> np.ndarray:
+        """d20 + modifier for every creature at once."""
+        modifiers = np.asarray(modifiers, dtype=np.int64)
+        return self.dice(20, len(modifiers)) + modifiers
+
+    def recharge(self, thresholds: Sequence[int]) -> np.ndarray:
+        """One d6 per recharge threshold; True where the ability comes back."""
+        thresholds = np.asarray(thresholds, dtype=np.int64)
+        return self.dice(6, len(thresholds)) >= thresholds
+
+    # --- State ---
+
+    def to_dict(self) -> dict:
+        return {
+            "seed": self.seed,
+            "block_size": self.block_size,
+            "block_state": self._block_state,
+            "position": self._pos,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Dice":
+        dice = cls(data["seed"], data.get("block_size", 4096))
+        if "block_state" in data:
+            dice._rng.bit_generator.state = data["block_state"]
+            dice._refill()
+            dice._pos = data.get("position", 0)
+        return dice
+
+
+def roll_recharges(actions: Iterable, dice: "Dice") -> List:
+    """Roll every spent recharge action in one batch; returns the ones that came back."""
+    pending = [a for a in actions if not a.available and a.recharge]
+    if not pending:
+        return []
+    back = dice.recharge([a.recharge for a in pending])
+    recharged = []
+    for action, ok in zip(pending, back):
+        action.available = bool(ok)
+        if ok:
+            recharged.append(action)
+    return recharged
+
+
+default_dice = Dice()
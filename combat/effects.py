@@ -0,0 +1,180 @@
+import heapq
+import itertools
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+# Conditions and timed effects ("frightened until the end of its next turn",
+# "1 minute, save at the end of each turn", concentration spells).
+#
+# Every expiry and repeated save is an event in one heap, keyed by the moment in
+# the turn order it is due: (round, -initiative, join order, phase). The key
+# only depends on the combatant's initiative slot, not on its index in the
+# list, so adding or removing combatants never reorders pending events.
+# `advance()` pops the events that are due and nothing else. Cancelled effects
+# leave their events in the heap; they are skipped when popped.
+
+CONDITIONS = (
+    "blinded", "charmed", "deafened", "exhaustion", "frightened", "grappled", "incapacitated",
+    "invisible", "paralyzed", "petrified", "poisoned", "prone", "restrained", "stunned", "unconscious",
+)
+
+START, END = 0, 1  # phase within a combatant's turn
+
+Time = Tuple[int, int, int, int]  # (round, -initiative, join order, phase)
+
+
+class ConditionImmune(ValueError):
+    def __init__(self, combatant: str, condition: str):
+        super().__init__(f"{combatant} is immune to {condition}")
+        self.combatant = combatant
+        self.condition = condition
+
+
+# ===== EFFECTS =====
+
+@dataclass
+class Effect:
+    name: str
+    target: str  # combatant id
+    condition: Optional[str] = None
+    source: Optional[str] = None  # combatant id of whoever maintains it
+    concentration: bool = False
+    save_ability: Optional[str] = None  # repeat save, e.g. "wis"
+    save_dc: Optional[int] = None
+    save_phase: int = END  # the save is made at the START or END of the target's turns
+    expires: Optional[Time] = None  # None: until removed
+    next_save: Optional[Time] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "target": self.target,
+            "condition": self.condition,
+            "source": self.source,
+            "concentration": self.concentration,
+            "save_ability": self.save_ability,
+            "save_dc": self.save_dc,
+            "save_phase": self.save_phase,
+            "expires": list(self.expires) if self.expires else None,
+            "next_save": list(self.next_save) if self.next_save else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            id=data["id"],
+            name=data["name"],
+            target=data["target"],
+            condition=data.get("condition"),
+            source=data.get("source"),
+            concentration=data.get("concentration", False),
+            save_ability=data.get("save_ability"),
+            save_dc=data.get("save_dc"),
+            save_phase=data.get("save_phase", END),
+            expires=tuple(data["expires"]) if data.get("expires") else None,
+            next_save=tuple(data["next_save"]) if data.get("next_save") else None,
+        )
+
+
+@dataclass
+class EffectEvent:
+    kind: str  # "expired" or "save"
+    effect: Effect
+
+
+# ===== TRACKER =====
+
+class EffectTracker:
+    """Active effects of one encounter plus the heap of their pending events.
+
+    Times are produced by the owning `Encounter` (see `Encounter.time_of`); the
+    tracker itself never looks at the turn order.
+    """
+
+    def __init__(self):
+        self.effects: Dict[str, Effect] = {}
+        self._by_target: Dict[str, Set[str]] = {}
+        self._heap: List[Tuple[Time, int, str, str]] = []  # (due, tiebreak, kind, effect id)
+        self._counter = itertools.count()
+
+    def _push(self, due: Time, kind: str, effect_id: str) -> None:
+        heapq.heappush(self._heap, (due, next(self._counter), kind, effect_id))
+
+    def add(self, effect: Effect) -> Effect:
+        if effect.concentration and effect.source is not None:
+            # Concentrating on something new ends the previous spell
+            for other in list(self.effects.values()):
+                if other.concentration and other.source == effect.source and other.name != effect.name:
+                    self.remove(other.id)
+        self.effects[effect.id] = effect
+        self._by_target.setdefault(effect.target, set()).add(effect.id)
+        if effect.expires is not None:
+            self._push(effect.expires, "expired", effect.id)
+        if effect.next_save is not None:
+            self._push(effect.next_save, "save", effect.id)
+        return effect
+
+    def remove(self, effect_id: str) -> Optional[Effect]:
+        effect = self.effects.pop(effect_id, None)
+        if effect is not None:
+            self._by_target.get(effect.target, set()).discard(effect_id)
+        return effect
+
+    def on(self, combatant_id: str) -> List[Effect]:
+        return [self.effects[i] for i in self._by_target.get(combatant_id, ()) if i in self.effects]
+
+    def has_condition(self, combatant_id: str, condition: str) -> bool:
+        return any(e.condition == condition for e in self.on(combatant_id))
+
+    def break_concentration(self, source_id: str) -> List[Effect]:
+        ended = [e for e in self.effects.values() if e.concentration and e.source == source_id]
+        for effect in ended:
+            self.remove(effect.id)
+        return ended
+
+    def drop_combatant(self, combatant_id: str) -> None:
+        """Effects on the combatant and concentration it maintained both end."""
+        for effect in self.on(combatant_id):
+            self.remove(effect.id)
+        self.break_concentration(combatant_id)
+        self._by_target.pop(combatant_id, None)
+
+    def advance(self, now: Time, next_save) -> List[EffectEvent]:
+        """Pop every event due at or before `now`.
+
+        `next_save(effect, after)` gives the time of the effect's next save after
+        `after`, or None when its target has left the fight.
+        """
+        events = []
+        while self._heap and self._heap[0][0] <= now:
+            due, _, kind, effect_id = heapq.heappop(self._heap)
+            effect = self.effects.get(effect_id)
+            if effect is None:
+                continue  # cancelled
+            if kind == "expired":
+                if effect.expires != due:
+                    continue  # duration was changed since
+                self.remove(effect_id)
+                events.append(EffectEvent("expired", effect))
+            elif effect.next_save == due:
+                events.append(EffectEvent("save", effect))
+                effect.next_save = next_save(effect, due)
+                if effect.next_save is not None:
+                    self._push(effect.next_save, "save", effect_id)
+        return events
+
+    def __len__(self) -> int:
+        return len(self.effects)
+
+    def to_list(self) -> list:
+        return [e.to_dict() for e in self.effects.values()]
+
+    @classmethod
+    def from_list(cls, data: list) -> "EffectTracker":
+        tracker = cls()
+        for effect in data:
+            tracker.add(Effect.from_dict(effect))
+        return tracker
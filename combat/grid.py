@@ -0,0 +1,192 @@
+import math
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+# Token positions on the battle grid and area-of-effect target selection.
+#
+# Positions are grid squares (x, y) of 5 ft; a token covers size x size squares
+# from its position (Large 2, Huge 3, Gargantuan 4). Tokens live in a spatial
+# hash of coarse buckets, updated in place as they move, and in flat NumPy
+# arrays. An area query only looks at the tokens in the buckets under the
+# template's bounding box and tests all of their squares at once. As in the
+# DMG grid rules, a square is in the area when its center is.
+
+SQUARE_FEET = 5
+FOOTPRINT = {"T": 1, "S": 1, "M": 1, "L": 2, "H": 3, "G": 4}
+
+Point = Tuple[float, float]
+
+
+def footprint(size: str) -> int:
+    return FOOTPRINT.get(str(size)[:1].upper(), 1)
+
+
+def square_center(x: int, y: int) -> Point:
+    """Center of a square, in feet."""
+    return (x + 0.5) * SQUARE_FEET, (y + 0.5) * SQUARE_FEET
+
+
+def token_center(x: int, y: int, size: int = 1) -> Point:
+    """Center of a token covering `size` x `size` squares from (x, y), in feet."""
+    return (x + size / 2) * SQUARE_FEET, (y + size / 2) * SQUARE_FEET
+
+
+def _unit(direction: Point) -> np.ndarray:
+    u = np.asarray(direction, dtype=float)
+    norm = math.hypot(*u)
+    if norm == 0:
+        raise ValueError("direction must be non-zero")
+    return u / norm
+
+
+class SpatialHash:
+    """Token squares by bucket of `bucket` x `bucket` squares, plus flat coordinate arrays."""
+
+    def __init__(self, bucket: int = 8, capacity: int = 64):
+        self.bucket = bucket
+        self._buckets: Dict[Tuple[int, int], Set[int]] = {}
+        self._row: Dict[str, int] = {}  # token id -> row in the arrays
+        self._ids: List[str] = []
+        self._xy = np.zeros((capacity, 2), dtype=np.int64)
+        self._size = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self._row
+
+    def position(self, id_: str) -> Tuple[int, int]:
+        x, y = self._xy[self._row[id_]]
+        return int(x), int(y)
+
+    # --- Updates ---
+
+    def _bucket_keys(self, x: int, y: int, size: int) -> Iterable[Tuple[int, int]]:
+        b = self.bucket
+        for bx in range(x // b, (x + size - 1) // b + 1):
+            for by in range(y // b, (y + size - 1) // b + 1):
+                yield bx, by
+
+    def _link(self, row: int) -> None:
+        (x, y), size = self._xy[row], self._size[row]
+        for key in self._bucket_keys(int(x), int(y), int(size)):
+            self._buckets.setdefault(key, set()).add(row)
+
+    def _unlink(self, row: int) -> None:
+        (x, y), size = self._xy[row], self._size[row]
+        for key in self._bucket_keys(int(x), int(y), int(size)):
+            rows = self._buckets.get(key)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._buckets[key]
+
+    def place(self, id_: str, position: Tuple[int, int], size: int = 1) -> None:
+        """Add a token, or move it (only its own buckets are touched)."""
+        row = self._row.get(id_)
+        if row is None:
+            row = len(self._ids)
+            if row == len(self._size):
+                self._xy = np.concatenate([self._xy, np.zeros_like(self._xy)])
+                self._size = np.concatenate([self._size, np.zeros_like(self._size)])
+            self._ids.append(id_)
+            self._row[id_] = row
+        else:
+            self._unlink(row)
+        self._xy[row] = position
+        self._size[row] = size
+        self._link(row)
+
+    def remove(self, id_: str) -> None:
+        row = self._row.pop(id_, None)
+        if row is None:
+            return
+        self._unlink(row)
+        last = len(self._ids) - 1
+        if row != last:
+            # Move the last token into the hole so the arrays stay dense
+            self._unlink(last)
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._row[moved] = row
+            self._xy[row] = self._xy[last]
+            self._size[row] = self._size[last]
+            self._link(row)
+        self._ids.pop()
+
+    # --- Queries ---
+
+    def _candidates(self, lo: Point, hi: Point) -> np.ndarray:
+        """Rows of tokens in the buckets overlapping a bounding box given in feet."""
+        span = self.bucket * SQUARE_FEET
+        rows: Set[int] = set()
+        for bx in range(math.floor(lo[0] / span), math.floor(hi[0] / span) + 1):
+            for by in range(math.floor(lo[1] / span), math.floor(hi[1] / span) + 1):
+                rows |= self._buckets.get((bx, by), set())
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+
+    def _squares(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Centers (feet) of every square covered by the given tokens, and the row of each."""
+        sizes = self._size[rows]
+        largest = int(sizes.max()) if len(rows) else 1
+        offsets = np.arange(largest)
+        dx, dy = np.meshgrid(offsets, offsets, indexing="ij")
+        dx, dy = dx.ravel(), dy.ravel()
+        covered = (dx[None, :] < sizes[:, None]) & (dy[None, :] < sizes[:, None])
+        xs = self._xy[rows, 0][:, None] + dx[None, :]
+        ys = self._xy[rows, 1][:, None] + dy[None, :]
+        centers = np.stack([(xs[covered] + 0.5) * SQUARE_FEET, (ys[covered] + 0.5) * SQUARE_FEET], axis=1)
+        owner = np.broadcast_to(rows[:, None], covered.shape)[covered]
+        return centers, owner
+
+    def _select(self, lo: Point, hi: Point, inside) -> List[str]:
+        rows = self._candidates(lo, hi)
+        if not len(rows):
+            return []
+        centers, owner = self._squares(rows)
+        hit = np.unique(owner[inside(centers)])
+        return sorted(self._ids[r] for r in hit)
+
+    def sphere(self, center: Point, radius: float) -> List[str]:
+        """Tokens with a square center within `radius` feet of `center` (a point in feet)."""
+        c = np.asarray(center, dtype=float)
+        lo, hi = c - radius, c + radius
+        return self._select(lo, hi, lambda p: ((p - c) ** 2).sum(axis=1) <= radius * radius)
+
+    def _rectangle(self, origin: Point, direction: Point, length: float, width: float) -> List[str]:
+        o = np.asarray(origin, dtype=float)
+        u = _unit(direction)
+        v = np.array([-u[1], u[0]])
+        corners = [o + u * a + v * b for a in (0, length) for b in (-width / 2, width / 2)]
+        lo, hi = np.min(corners, axis=0), np.max(corners, axis=0)
+
+        def inside(p):
+            rel = p - o
+            along, across = rel @ u, rel @ v
+            return (along >= 0) & (along <= length) & (np.abs(across) <= width / 2)
+
+        return self._select(lo, hi, inside)
+
+    def line(self, origin: Point, direction: Point, length: float, width: float = SQUARE_FEET) -> List[str]:
+        return self._rectangle(origin, direction, length, width)
+
+    def cube(self, origin: Point, direction: Point, size: float) -> List[str]:
+        """A cube whose near face is centered on `origin`, extending along `direction`."""
+        return self._rectangle(origin, direction, size, size)
+
+    def cone(self, origin: Point, direction: Point, length: float) -> List[str]:
+        """A 5e cone: as wide at any distance as that distance from its origin."""
+        o = np.asarray(origin, dtype=float)
+        u = _unit(direction)
+        v = np.array([-u[1], u[0]])
+        corners = [o, o + u * length + v * length / 2, o + u * length - v * length / 2]
+        lo, hi = np.min(corners, axis=0), np.max(corners, axis=0)
+
+        def inside(p):
+            rel = p - o
+            along, across = rel @ u, rel @ v
+            return (along > 0) & (along <= length) & (np.abs(across) <= along / 2)
+
+        return self._select(lo, hi, inside)
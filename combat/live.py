@@ -0,0 +1,372 @@
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+
+from .battle_manager import Encounter
+from .registry import EncounterRegistry
+
+# Read-only live view of an encounter for the players' screen.
+#
+# After every mutation the encounter is reduced to a small player-facing
+# snapshot (initiative order, whose turn it is, HP bars, conditions) and
+# diffed against the previous one. Only the diff, a JSON merge patch
+# (RFC 7396), is pushed to the subscribed browsers over a websocket. The server
+# is plain asyncio on a background thread, serving the static client page and
+# the websocket on the same port. It listens on localhost unless given another
+# host: the players' screens are on the network only when the DM says so.
+
+STATIC_PAGE = Path(__file__).resolve().parent / "static" / "player_view.html"
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Clients only ever send close and ping frames, which are 125 bytes at most
+MAX_FRAME = 4096
+
+# A client whose socket has this much unsent data gets further frames queued instead
+WRITE_BUFFER = 64 * 1024
+
+
+# ===== SNAPSHOTS =====
+
+def player_view(encounter: Encounter) -> Dict[str, Any]:
+    """What the players may see: no statblocks, and monster HP only as a fraction."""
+    current = encounter.get_current() if encounter.combatants else None
+    combatants = {}
+    for order, c in enumerate(encounter.combatants):
+        max_hp = c.statblock.max_HP or 1
+        entry = {
+            "name": c.name,
+            "order": order,
+            "initiative": c.initiative,
+            "is_pc": c.is_pc,
+            "hp_fraction": round(c.HP / max_hp, 2),
+            "down": c.HP <= 0,
+            "conditions": sorted({e.condition for e in encounter.effects.on(c.id) if e.condition}),
+        }
+        if c.is_pc:
+            entry["hp"] = c.HP
+            entry["max_hp"] = c.statblock.max_HP
+        combatants[c.id] = entry
+    return {
+        "round": encounter.round,
+        "turn": current.id if current else None,
+        "combatants": combatants,
+    }
+
+
+def diff(old: Any, new: Any) -> Any:
+    """JSON merge patch turning `old` into `new` (None removes a key); `{}` when equal."""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return new
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif old[key] != value:
+            patch[key] = diff(old[key], value) if isinstance(value, dict) and isinstance(old[key], dict) else value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+
+# ===== WEBSOCKET FRAMING =====
+
+def encode_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """A single unmasked server-to-client frame."""
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header += bytes([length])
+    elif length < 1 << 16:
+        header += bytes([126]) + struct.pack("!H", length)
+    else:
+        header += bytes([127]) + struct.pack("!Q", length)
+    return header + payload
+
+
+class FrameTooLarge(ValueError):
+    pass
+
+
+async def read_frame(reader: asyncio.StreamReader, max_size: Optional[int] = None) -> tuple[int, bytes]:
+    """One frame as (opcode, unmasked payload); FrameTooLarge past `max_size` bytes, before reading it."""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if max_size is not None and length > max_size:
+        raise FrameTooLarge(length)
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+def accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+# ===== BROADCASTER =====
+
+class _Subscriber:
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int):
+        self.writer = writer
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resync = False
+        self.sender: Optional[asyncio.Task] = None
+
+
+class _Channel:
+    """Latest snapshot and subscribers of one encounter."""
+
+    def __init__(self):
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.seq = 0
+        self.subscribers: Set[_Subscriber] = set()
+
+
+class LiveBroadcaster:
+    """Pushes encounter deltas to websocket subscribers.
+
+    The broadcaster subscribes itself to `registry`, so `publish()` is called
+    from whatever thread mutated the encounter; it diffs and encodes the message
+    once and hands the bytes to the event loop. Only encounters in the registry
+    can be watched, and an encounter has a channel only while someone watches
+    it. A frame goes straight to a client's socket while that client keeps up;
+    otherwise it waits in a bounded queue, and a client that falls further
+    behind has its backlog dropped and gets one full snapshot instead, so a slow
+    screen never holds up the others or grows memory.
+    """
+
+    def __init__(self, registry: EncounterRegistry, host: str = "127.0.0.1", port: int = 8765, queue_size: int = 32):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self._channels: Dict[str, _Channel] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        registry.subscribe(self.publish)
+
+    # --- Lifecycle ---
+
+    def start(self) -> "LiveBroadcaster":
+        """Run the server on a daemon thread; returns once it is listening."""
+        if self._thread is not None:
+            return self
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="live-view", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread = None
+            raise self._error
+        return self
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(asyncio.start_server(self._connection, self.host, self.port))
+        except OSError as e:  # port already taken
+            self._error = e
+            self._ready.set()
+            loop.close()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]  # resolves port=0 to the real one
+        self._loop = loop
+        self._ready.set()
+        loop.run_forever()
+        loop.close()
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            # Let every task finish before the loop stops, so none is destroyed while pending
+            self._server.close()
+            senders = [sub.sender for channel in self._channels.values() for sub in channel.subscribers]
+            for task in senders:
+                task.cancel()
+            await asyncio.gather(*senders, return_exceptions=True)
+            # Closing a connection ends its handler (the pending read sees EOF)
+            connections = dict(self._connections)
+            for writer in connections.values():
+                writer.close()
+            await asyncio.gather(*(w.wait_closed() for w in connections.values()), return_exceptions=True)
+            await asyncio.gather(*connections, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+        self._loop = None
+
+    # --- Publishing ---
+
+    def publish(self, encounter_id: str, encounter: Encounter, initial: bool = False) -> None:
+        """Send the change to the encounter's watchers; `initial` only sets the first snapshot."""
+        with self._lock:
+            if encounter_id not in self._channels:
+                return  # nobody is watching
+        snapshot = player_view(encounter)
+        with self._lock:
+            channel = self._channels.get(encounter_id)
+            if channel is None or (initial and channel.snapshot is not None):
+                return
+            patch = diff(channel.snapshot, snapshot) if channel.snapshot is not None else snapshot
+            if channel.snapshot is not None and not patch:
+                return
+            kind = "delta" if channel.snapshot is not None else "snapshot"
+            channel.snapshot = snapshot
+            channel.seq += 1
+            frame = encode_frame(json.dumps({"type": kind, "seq": channel.seq, "data": patch}).encode())
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._fanout, channel, frame)
+
+    def _fanout(self, channel: _Channel, frame: bytes) -> None:
+        for sub in channel.subscribers:
+            if sub.resync:
+                continue  # a full snapshot is already queued
+            if sub.queue.empty() and sub.writer.transport.get_write_buffer_size() < WRITE_BUFFER:
+                # Nothing is waiting ahead of it (the send loop writes what it takes without
+                # pausing), so the frame can skip the queue and a task switch per client
+                sub.writer.write(frame)
+                continue
+            try:
+                sub.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.resync = True
+                sub.queue.put_nowait(None)  # None: send the current snapshot
+
+    def _snapshot_frame(self, channel: _Channel) -> Optional[bytes]:
+        with self._lock:
+            if channel.snapshot is None:
+                return None
+            message = {"type": "snapshot", "seq": channel.seq, "data": channel.snapshot}
+        return encode_frame(json.dumps(message).encode())
+
+    # --- Connections ---
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            await self._handle(reader, writer)
+        finally:
+            del self._connections[task]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        lines = request.decode("latin-1").split("\r\n")
+        _, target, _ = (lines[0].split(" ") + ["", ""])[:3]
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+
+        if headers.get("upgrade", "").lower() == "websocket" and url.path == "/ws":
+            encounter_id = parse_qs(url.query).get("encounter", [""])[0]
+            await self._serve_websocket(reader, writer, headers, encounter_id)
+        elif url.path in ("/", "/player"):
+            body = STATIC_PAGE.read_bytes()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+            writer.close()
+        else:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            writer.close()
+
+    async def _serve_websocket(self, reader, writer, headers, encounter_id: str) -> None:
+        loop = asyncio.get_running_loop()
+        # Checking membership may list the storage directory once, so keep it off the loop
+        if not await loop.run_in_executor(None, self.registry.__contains__, encounter_id):
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            writer.close()
+            return
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            + f"Sec-WebSocket-Accept: {accept_key(headers.get('sec-websocket-key', ''))}\r\n\r\n".encode()
+        )
+        await writer.drain()
+
+        sub = _Subscriber(writer, self.queue_size)
+        sub.queue.put_nowait(None)  # start with the full snapshot
+        with self._lock:
+            channel = self._channels.get(encounter_id)
+            if channel is None:
+                channel = self._channels[encounter_id] = _Channel()
+            channel.subscribers.add(sub)
+            first = channel.snapshot is None
+        sub.sender = asyncio.create_task(self._send_loop(channel, sub))
+        try:
+            if first:
+                # Edits published from now on reach this channel; seed it with the current state
+                encounter = await loop.run_in_executor(None, self.registry.get, encounter_id)
+                self.publish(encounter_id, encounter, initial=True)
+            while True:
+                opcode, payload = await read_frame(reader, MAX_FRAME)
+                if opcode == 0x8:  # close
+                    break
+                if opcode == 0x9:  # ping
+                    writer.write(encode_frame(payload, opcode=0xA))
+        except FrameTooLarge:
+            writer.write(encode_frame(struct.pack("!H", 1009), opcode=0x8))  # 1009: message too big
+        except (asyncio.IncompleteReadError, ConnectionError, KeyError):
+            pass  # KeyError: the encounter was deleted before it was seeded
+        finally:
+            with self._lock:
+                channel.subscribers.discard(sub)
+                if not channel.subscribers and self._channels.get(encounter_id) is channel:
+                    del self._channels[encounter_id]
+            sub.sender.cancel()
+            writer.close()
+
+    async def _send_loop(self, channel: _Channel, sub: _Subscriber) -> None:
+        try:
+            while True:
+                frame = await sub.queue.get()
+                if frame is None:
+                    sub.resync = False
+                    frame = self._snapshot_frame(channel)
+                    if frame is None:
+                        continue
+                sub.writer.write(frame)
+                await sub.writer.drain()  # waits while the client's socket buffer is full
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    def subscriber_count(self, encounter_id: Optional[str] = None) -> int:
+        channels = [self._channels.get(encounter_id)] if encounter_id else list(self._channels.values())
+        return sum(len(c.subscribers) for c in channels if c is not None)
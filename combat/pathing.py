@@ -0,0 +1,343 @@
+import heapq
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .combatant import MovementType, Speed
+from .grid import SQUARE_FEET
+
+# Movement over a terrain map: reachable squares per turn and shortest routes.
+#
+# Every square costs 5 ft, diagonals included (the PHB grid rule). Difficult
+# terrain doubles the cost for creatures on the ground; water has to be swum
+# (double cost without a swimming speed); a rise of more than 5 ft between
+# neighbouring squares has to be climbed, each foot climbed costing one extra
+# foot without a climbing speed. Flying and hovering ignore the ground,
+# burrowing ignores difficult terrain and ledges but not water. Walls stop
+# everything, and no one cuts a wall's corner.
+#
+# A creature with several speeds may switch between them mid-move, as long as
+# the distance already moved never exceeds the speed in use. That constraint
+# only ever rules out steps for a creature that has moved *more*, so a plain
+# Dijkstra search (cheapest arrival first) is still exact.
+#
+# Reach fields are cached per (start, movement profile). Each remembers the
+# box of squares its search looked at, and a terrain edit drops only the fields
+# whose box it touches.
+
+Square = Tuple[int, int]
+
+OPEN, DIFFICULT, WATER, WALL = 0, 1, 2, 3
+TERRAIN = {"open": OPEN, "difficult": DIFFICULT, "water": WATER, "wall": WALL}
+TERRAIN_NAMES = {code: name for name, code in TERRAIN.items()}
+LEDGE_FEET = 5  # higher steps have to be climbed
+
+NEIGHBOURS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class TerrainMap:
+    """Terrain kind and ground elevation (feet) of every square, indexed [x, y]."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.kind = np.zeros((width, height), dtype=np.uint8)
+        self.elevation = np.zeros((width, height), dtype=np.int32)
+        self._listeners: List[Callable[["TerrainMap", List[Square]], None]] = []
+
+    def subscribe(self, listener: Callable[["TerrainMap", List[Square]], None]) -> None:
+        """Call `listener(terrain, squares)` after every edit, with the squares that changed."""
+        self._listeners.append(listener)
+
+    def paint(self, squares: Iterable[Square], kind: Optional[str] = None, elevation: Optional[int] = None) -> None:
+        """Set the terrain kind ("open", "difficult", "water", "wall") and/or elevation of squares."""
+        code = TERRAIN[kind] if kind is not None else None
+        changed = []
+        for x, y in squares:
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise IndexError(f"square {(x, y)} is off the map")
+            if code is not None and self.kind[x, y] != code:
+                self.kind[x, y] = code
+                changed.append((x, y))
+            if elevation is not None and self.elevation[x, y] != elevation:
+                self.elevation[x, y] = elevation
+                changed.append((x, y))
+        if changed:
+            changed = list(dict.fromkeys(changed))
+            for listener in self._listeners:
+                listener(self, changed)
+
+    def to_dict(self) -> dict:
+        # Sparse: most squares are open ground at elevation 0
+        cells = {}
+        for code, name in TERRAIN_NAMES.items():
+            if code != OPEN:
+                xs, ys = np.nonzero(self.kind == code)
+                if len(xs):
+                    cells[name] = [[int(x), int(y)] for x, y in zip(xs, ys)]
+        xs, ys = np.nonzero(self.elevation)
+        return {
+            "width": self.width,
+            "height": self.height,
+            "cells": cells,
+            "elevation": [[int(x), int(y), int(self.elevation[x, y])] for x, y in zip(xs, ys)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        terrain = cls(data["width"], data["height"])
+        for name, squares in data.get("cells", {}).items():
+            for x, y in squares:
+                terrain.kind[x, y] = TERRAIN[name]
+        for x, y, feet in data.get("elevation", []):
+            terrain.elevation[x, y] = feet
+        return terrain
+
+
+@dataclass(frozen=True)
+class MovementProfile:
+    """Speeds in feet (0 = can't) and token size in squares; hashable, so it keys the cache."""
+    walk: float = 30
+    fly: float = 0
+    swim: float = 0
+    climb: float = 0
+    burrow: float = 0
+    size: int = 1
+
+    @classmethod
+    def of(cls, speed: Speed, size: int = 1):
+        return cls(
+            walk=speed.get(MovementType.WALK),
+            fly=max(speed.get(MovementType.FLY), speed.get(MovementType.HOVER)),
+            swim=speed.get(MovementType.SWIM),
+            climb=speed.get(MovementType.CLIMB),
+            burrow=speed.get(MovementType.BURROW),
+            size=size,
+        )
+
+    def dashed(self) -> "MovementProfile":
+        return MovementProfile(self.walk * 2, self.fly * 2, self.swim * 2, self.climb * 2, self.burrow * 2, self.size)
+
+    def unbounded(self) -> "MovementProfile":
+        """Same movement types with no limit per turn, for routes longer than one turn."""
+        return MovementProfile(*(math.inf if s else 0 for s in (self.walk, self.fly, self.swim, self.climb, self.burrow)),
+                               self.size)
+
+
+def _step(spent: float, kind: int, rise: int, p: MovementProfile) -> float:
+    """Distance moved after stepping onto a square, using the cheapest speed that allows it (inf if none)."""
+    if kind == WALL:
+        return math.inf
+    after = spent + SQUARE_FEET
+    if after <= p.fly:
+        return after  # nothing beats flying over it
+    best = math.inf
+    if kind == WATER:
+        if after <= p.swim:
+            return after
+        if spent + 2 * SQUARE_FEET <= p.walk:
+            best = spent + 2 * SQUARE_FEET
+    else:
+        if after <= p.burrow:
+            return after
+        base = 2 * SQUARE_FEET if kind == DIFFICULT else SQUARE_FEET
+        climb = abs(rise) if abs(rise) > LEDGE_FEET else 0
+        if spent + base + 2 * climb <= p.walk:
+            best = spent + base + 2 * climb
+        if climb and spent + base + climb <= p.climb:
+            best = min(best, spent + base + climb)
+    return best
+
+
+class _Layer:
+    """Terrain as seen by a token of one size: the worst kind and highest ground under its footprint.
+
+    Flat Python lists indexed x * height + y (faster to read one by one than
+    NumPy arrays); anchors whose footprint leaves the map count as walls.
+    """
+
+    def __init__(self, terrain: TerrainMap, size: int):
+        self.size = size
+        kind = np.full((terrain.width, terrain.height), WALL, dtype=np.uint8)
+        elevation = np.zeros((terrain.width, terrain.height), dtype=np.int32)
+        w, h = terrain.width - size + 1, terrain.height - size + 1
+        if w > 0 and h > 0:
+            kind[:w, :h] = 0
+            elevation[:w, :h] = np.iinfo(np.int32).min
+            for dx in range(size):
+                for dy in range(size):
+                    np.maximum(kind[:w, :h], terrain.kind[dx:dx + w, dy:dy + h], out=kind[:w, :h])
+                    np.maximum(elevation[:w, :h], terrain.elevation[dx:dx + w, dy:dy + h], out=elevation[:w, :h])
+        self.kind = kind.ravel().tolist()
+        self.elevation = elevation.ravel().tolist()
+
+    def update(self, terrain: TerrainMap, squares: Iterable[Square]) -> None:
+        """Recompute the anchors whose footprint covers one of `squares`."""
+        s, height = self.size, terrain.height
+        for cx, cy in squares:
+            for x in range(max(cx - s + 1, 0), cx + 1):
+                for y in range(max(cy - s + 1, 0), cy + 1):
+                    if x + s > terrain.width or y + s > height:
+                        continue
+                    i = x * height + y
+                    self.kind[i] = int(terrain.kind[x:x + s, y:y + s].max())
+                    self.elevation[i] = int(terrain.elevation[x:x + s, y:y + s].max())
+
+
+class Reach:
+    """Squares a token can get to this turn, what each costs and how to get there."""
+
+    def __init__(self, start: Square, profile: MovementProfile, height: int,
+                 cost: Dict[int, float], parent: Dict[int, int], bounds: Tuple[int, int, int, int]):
+        self.start = start
+        self.profile = profile
+        self._height = height
+        self._cost = cost
+        self._parent = parent
+        self.bounds = bounds  # (x0, y0, x1, y1) of every square the search looked at
+
+    def __len__(self) -> int:
+        return len(self._cost)
+
+    def __contains__(self, square: Square) -> bool:
+        return self._index(square) in self._cost
+
+    def _index(self, square: Square) -> int:
+        return square[0] * self._height + square[1]
+
+    def cost(self, square: Square) -> Optional[float]:
+        return self._cost.get(self._index(square))
+
+    def squares(self) -> List[Square]:
+        return [divmod(i, self._height) for i in self._cost]
+
+    def path_to(self, square: Square) -> Optional[List[Square]]:
+        i = self._index(square)
+        if i not in self._cost:
+            return None
+        path = [i]
+        while i in self._parent:
+            i = self._parent[i]
+            path.append(i)
+        return [divmod(i, self._height) for i in reversed(path)]
+
+    def mask(self, width: int) -> np.ndarray:
+        """Boolean [x, y] array of reachable squares, for highlighting."""
+        mask = np.zeros(width * self._height, dtype=bool)
+        mask[np.fromiter(self._cost, dtype=np.int64, count=len(self._cost))] = True
+        return mask.reshape(width, self._height)
+
+
+class Pathfinder:
+    def __init__(self, terrain: TerrainMap, cache_size: int = 512):
+        self.terrain = terrain
+        self.cache_size = cache_size
+        self._layers: Dict[int, _Layer] = {}
+        self._cache: "OrderedDict[Tuple[Square, MovementProfile], Reach]" = OrderedDict()
+        terrain.subscribe(self.apply_change)
+
+    def _layer(self, size: int) -> _Layer:
+        layer = self._layers.get(size)
+        if layer is None:
+            layer = self._layers[size] = _Layer(self.terrain, size)
+        return layer
+
+    # --- Updates ---
+
+    def apply_change(self, terrain: TerrainMap, squares: List[Square]) -> None:
+        """`TerrainMap.subscribe` hook: patch the layers, drop the reach fields that looked at a changed square."""
+        for layer in self._layers.values():
+            layer.update(terrain, squares)
+        stale = []
+        for key, reach in self._cache.items():
+            x0, y0, x1, y1 = reach.bounds
+            s = reach.profile.size
+            # A changed square matters to every anchor whose footprint covers it
+            if any(cx >= x0 and cx - s + 1 <= x1 and cy >= y0 and cy - s + 1 <= y1 for cx, cy in squares):
+                stale.append(key)
+        for key in stale:
+            del self._cache[key]
+
+    # --- Queries ---
+
+    def _search(self, start: Square, profile: MovementProfile, goal: Optional[Square] = None):
+        """Dijkstra from `start` (A* towards `goal` if given); returns cost, parent and the bounds looked at."""
+        layer = self._layer(profile.size)
+        kind, elevation = layer.kind, layer.elevation
+        width, height = self.terrain.width, self.terrain.height
+        sx, sy = start
+        if not (0 <= sx < width and 0 <= sy < height):
+            raise IndexError(f"square {start} is off the map")
+        origin = sx * height + sy
+        target = goal[0] * height + goal[1] if goal is not None else None
+
+        def estimate(i: int) -> int:
+            if target is None:
+                return 0
+            x, y = divmod(i, height)
+            return max(abs(x - goal[0]), abs(y - goal[1])) * SQUARE_FEET
+
+        cost = {origin: 0}
+        parent: Dict[int, int] = {}
+        done = set()
+        heap = [(estimate(origin), 0, origin)]
+        x0 = x1 = sx
+        y0 = y1 = sy
+        while heap:
+            _, spent, i = heapq.heappop(heap)
+            if i in done:
+                continue
+            done.add(i)
+            if i == target:
+                break
+            x, y = divmod(i, height)
+            x0, x1, y0, y1 = min(x0, x - 1), max(x1, x + 1), min(y0, y - 1), max(y1, y + 1)
+            ground = elevation[i]
+            for dx, dy in NEIGHBOURS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                if dx and dy and (kind[nx * height + y] == WALL or kind[i + dy] == WALL):
+                    continue  # squeezing past a wall's corner
+                j = nx * height + ny
+                if j in done:
+                    continue
+                after = _step(spent, kind[j], elevation[j] - ground, profile)
+                if after < cost.get(j, math.inf):
+                    cost[j] = after
+                    parent[j] = i
+                    heapq.heappush(heap, (after + estimate(j), after, j))
+        if target is None:
+            return cost, parent, (x0, y0, x1, y1)
+        return {i: cost[i] for i in done}, parent, (x0, y0, x1, y1)
+
+    def reach(self, start: Square, profile: MovementProfile, dash: bool = False) -> Reach:
+        """Every square a token at `start` can end its move on this turn (cached)."""
+        if dash:
+            profile = profile.dashed()
+        key = (tuple(start), profile)
+        reach = self._cache.get(key)
+        if reach is not None:
+            self._cache.move_to_end(key)
+            return reach
+        cost, parent, bounds = self._search(key[0], profile)
+        reach = Reach(key[0], profile, self.terrain.height, cost, parent, bounds)
+        self._cache[key] = reach
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return reach
+
+    def path(self, start: Square, goal: Square, profile: MovementProfile) -> Optional[Tuple[float, List[Square]]]:
+        """Cheapest route (feet, squares) from `start` to `goal`, over as many turns as it takes."""
+        cost, parent, _ = self._search(tuple(start), profile.unbounded(), tuple(goal))
+        height = self.terrain.height
+        end = goal[0] * height + goal[1]
+        if end not in cost:
+            return None
+        path = [end]
+        while path[-1] in parent:
+            path.append(parent[path[-1]])
+        return cost[end], [divmod(i, height) for i in reversed(path)]
@@ -0,0 +1,290 @@
+import json
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Protocol
+
+from .battle_manager import Encounter
+
+# Ids are generated by `EncounterRegistry.create` and arrive back from the URL,
+# so anything else is rejected before it can reach a file path.
+ENCOUNTER_ID_RE = re.compile(r"[0-9a-f]{12}")
+
+
+def valid_encounter_id(encounter_id: object) -> bool:
+    return isinstance(encounter_id, str) and ENCOUNTER_ID_RE.fullmatch(encounter_id) is not None
+
+
+def new_encounter_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+# ===== STORAGE =====
+
+class EncounterStorage(Protocol):
+    def save(self, encounter_id: str, data: dict) -> None: ...
+    def load(self, encounter_id: str) -> Optional[dict]: ...
+    def delete(self, encounter_id: str) -> None: ...
+    def ids(self) -> List[str]: ...
+
+
+class DirectoryStorage:
+    """One JSON file per encounter (the same format as `Encounter.save`)."""
+
+    def __init__(self, directory: str | Path = "data/encounters"):
+        self.directory = Path(directory)
+
+    def _path(self, encounter_id: str) -> Path:
+        if not valid_encounter_id(encounter_id):
+            raise ValueError(f"Invalid encounter id: {encounter_id!r}")
+        return self.directory / f"{encounter_id}.json"
+
+    def save(self, encounter_id: str, data: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(encounter_id).with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        tmp.replace(self._path(encounter_id))  # atomic, so a crash never leaves half a file
+
+    def load(self, encounter_id: str) -> Optional[dict]:
+        path = self._path(encounter_id)
+        if not path.is_file():
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def delete(self, encounter_id: str) -> None:
+        self._path(encounter_id).unlink(missing_ok=True)
+
+    def ids(self) -> List[str]:
+        if not self.directory.is_dir():
+            return []
+        return sorted(p.stem for p in self.directory.glob("*.json") if valid_encounter_id(p.stem))
+
+
+# ===== REGISTRY =====
+
+class _Slot:
+    __slots__ = ("encounter", "size", "scratch")
+
+    def __init__(self, encounter: Encounter, size: int, scratch: bool = False):
+        self.encounter = encounter
+        self.size = size
+        self.scratch = scratch  # never edited: dropped instead of written out
+
+
+COMBATANT_SIZE = 256  # a combatant's own fields, next to its statblock
+EFFECT_SIZE = 256
+
+
+def _statblock_size(statblock) -> int:
+    # Statblocks are templates that are almost never edited, so measure each once
+    size = statblock.__dict__.get("_size")
+    if size is None:
+        size = statblock.__dict__["_size"] = len(json.dumps(statblock.to_dict()))
+    return size
+
+
+def encounter_size(encounter: Encounter) -> int:
+    """Running estimate of an encounter's footprint in bytes, cheap enough to take on every edit.
+
+    Statblocks dominate and are measured once each; combatants and effects
+    count a fixed size, and terrain the size of its arrays.
+    """
+    size = COMBATANT_SIZE + EFFECT_SIZE * len(encounter.effects.effects)
+    for c in encounter.combatants:
+        size += COMBATANT_SIZE + _statblock_size(c.statblock)
+    if encounter.terrain is not None:
+        size += encounter.terrain.kind.nbytes + encounter.terrain.elevation.nbytes
+    return size
+
+
+class EncounterRegistry:
+    """Server-side encounters shared by every session, keyed by encounter id.
+
+    Recently used encounters stay in memory; when their total size goes over
+    `memory_budget` bytes the least recently used ones are written to `storage`
+    and dropped, to be loaded back on the next access. Mutations go through
+    `edit()`, which holds a lock for that one encounter only.
+
+    An encounter created as `scratch` (the example a new session starts with)
+    is not persisted until its first edit; evicting it just forgets it.
+    """
+
+    def __init__(self, storage: Optional[EncounterStorage] = None, memory_budget: int = 16 * 1024 * 1024):
+        self.storage = storage if storage is not None else DirectoryStorage()
+        self.memory_budget = memory_budget
+        self._hot: "OrderedDict[str, _Slot]" = OrderedDict()
+        self._locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()  # guards _hot and _locks, never held during I/O of one encounter
+        self._used = 0
+        self._stored: Optional[set] = None  # ids in storage, listed once and then kept up to date
+        self._listeners: List[Callable[[str, Encounter], None]] = []
+
+    def subscribe(self, listener: Callable[[str, Encounter], None]) -> None:
+        """Call `listener(encounter_id, encounter)` after every create/edit/replace.
+
+        Listeners run while the encounter's lock is held, so they see mutations
+        of one encounter in order.
+        """
+        self._listeners.append(listener)
+
+    def _changed(self, encounter_id: str, encounter: Encounter) -> None:
+        for listener in self._listeners:
+            listener(encounter_id, encounter)
+
+    # --- Locks ---
+
+    def _encounter_lock(self, encounter_id: str) -> threading.RLock:
+        with self._lock:
+            lock = self._locks.get(encounter_id)
+            if lock is None:
+                lock = self._locks[encounter_id] = threading.RLock()
+            return lock
+
+    def _stored_ids(self) -> set:
+        with self._lock:
+            stored = self._stored
+        if stored is None:
+            stored = set(self.storage.ids())
+            with self._lock:
+                if self._stored is None:
+                    self._stored = stored
+                stored = self._stored
+        return stored
+
+    # --- Access ---
+
+    def create(self, encounter: Encounter, encounter_id: Optional[str] = None, scratch: bool = False) -> str:
+        if encounter_id is None:
+            encounter_id = new_encounter_id()
+        elif not valid_encounter_id(encounter_id):
+            raise ValueError(f"Invalid encounter id: {encounter_id!r}")
+        with self._encounter_lock(encounter_id):
+            self._store_hot(encounter_id, encounter, scratch)
+            self._changed(encounter_id, encounter)
+        self._evict()
+        return encounter_id
+
+    def _store_hot(self, encounter_id: str, encounter: Encounter, scratch: bool = False) -> None:
+        size = encounter_size(encounter)
+        with self._lock:
+            old = self._hot.pop(encounter_id, None)
+            if old is not None:
+                self._used -= old.size
+            self._hot[encounter_id] = _Slot(encounter, size, scratch)
+            self._used += size
+
+    def _load(self, encounter_id: str) -> Encounter:
+        if not valid_encounter_id(encounter_id):
+            raise KeyError(encounter_id)
+        with self._lock:
+            slot = self._hot.get(encounter_id)
+            if slot is not None:
+                self._hot.move_to_end(encounter_id)
+                return slot.encounter
+        data = self.storage.load(encounter_id)
+        if data is None:
+            raise KeyError(encounter_id)
+        encounter = Encounter.from_dict(data)
+        self._store_hot(encounter_id, encounter)
+        return encounter
+
+    def get(self, encounter_id: str) -> Encounter:
+        """The encounter for reading (loaded back from storage if it was spilled)."""
+        with self._encounter_lock(encounter_id):
+            encounter = self._load(encounter_id)
+        self._evict()
+        return encounter
+
+    def __contains__(self, encounter_id: str) -> bool:
+        if not valid_encounter_id(encounter_id):
+            return False
+        with self._lock:
+            if encounter_id in self._hot:
+                return True
+        return encounter_id in self._stored_ids()
+
+    @contextmanager
+    def edit(self, encounter_id: str) -> Iterator[Encounter]:
+        """Mutate an encounter while holding its lock; other encounters stay unblocked."""
+        lock = self._encounter_lock(encounter_id)
+        with lock:
+            encounter = self._load(encounter_id)
+            yield encounter
+            self._store_hot(encounter_id, encounter)  # re-measure after the mutation
+            self._changed(encounter_id, encounter)
+        self._evict()
+
+    def replace(self, encounter_id: str, encounter: Encounter) -> None:
+        with self._encounter_lock(encounter_id):
+            self._store_hot(encounter_id, encounter)
+            self._changed(encounter_id, encounter)
+        self._evict()
+
+    def delete(self, encounter_id: str) -> None:
+        with self._encounter_lock(encounter_id):
+            with self._lock:
+                slot = self._hot.pop(encounter_id, None)
+                if slot is not None:
+                    self._used -= slot.size
+            if valid_encounter_id(encounter_id):
+                self.storage.delete(encounter_id)
+                self._stored_ids().discard(encounter_id)
+        with self._lock:
+            self._locks.pop(encounter_id, None)
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            hot = list(self._hot)
+        return sorted(set(hot) | self._stored_ids())
+
+    # --- Spilling ---
+
+    def _evict(self) -> None:
+        """Spill least recently used encounters until the hot set fits the budget."""
+        while True:
+            with self._lock:
+                if self._used <= self.memory_budget or len(self._hot) <= 1:
+                    return
+                # Oldest encounter nobody is editing right now
+                for encounter_id in self._hot:
+                    lock = self._locks[encounter_id]
+                    if lock.acquire(blocking=False):
+                        break
+                else:
+                    return
+            try:
+                with self._lock:
+                    slot = self._hot.get(encounter_id)
+                if slot is not None:
+                    if not slot.scratch:
+                        self._save(encounter_id, slot.encounter)
+                    with self._lock:
+                        if self._hot.get(encounter_id) is slot:
+                            del self._hot[encounter_id]
+                            self._used -= slot.size
+            finally:
+                lock.release()
+
+    def flush(self) -> None:
+        """Write every in-memory encounter to storage (they stay in memory)."""
+        with self._lock:
+            hot = list(self._hot)
+        for encounter_id in hot:
+            with self._encounter_lock(encounter_id):
+                with self._lock:
+                    slot = self._hot.get(encounter_id)
+                if slot is not None and not slot.scratch:
+                    self._save(encounter_id, slot.encounter)
+
+    def _save(self, encounter_id: str, encounter: Encounter) -> None:
+        self.storage.save(encounter_id, encounter.to_dict())
+        self._stored_ids().add(encounter_id)
+
+    @property
+    def memory_used(self) -> int:
+        return self._used
@@ -0,0 +1 @@
+from .context import ContextBuilder, Passage, RetrievedContext, load_note_files
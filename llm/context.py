@@ -0,0 +1,282 @@
+import math
+import re
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bestiary.stat_block import Action, CreatureType, NestedEntry, StatBlock
+
+
+# --- Tokenizing ---
+
+TAG_RE = re.compile(r"\{@\w+ ([^|}]*)[^}]*\}")
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i if in is it its "
+    "of on or that the their then this to what when which who with".split()
+)
+
+
+def strip_tags(text: str) -> str:
+    """Replace 5etools `{@tag text|...}` markup with its display text."""
+    return TAG_RE.sub(r"\1", text)
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 characters per token for English text)."""
+    return math.ceil(len(text) / 4)
+
+
+# --- Passages ---
+
+
+@dataclass(frozen=True)
+class Passage:
+    source: str  # "bestiary" or "notes"
+    title: str
+    text: str
+    subject: Optional[str] = None  # monster name for bestiary passages
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.render())
+
+    def render(self) -> str:
+        return f"[{self.title}]\n{self.text}"
+
+
+def _entry_text(entry) -> str:
+    if isinstance(entry, NestedEntry):
+        items = []
+        for item in entry.items:
+            if isinstance(item, dict):
+                items.append(f"{item.get('name', '')} {item.get('entry', '')}".strip())
+            else:
+                items.append(str(item))
+        return " ".join(items)
+    if isinstance(entry, dict):
+        return " ".join(str(v) for v in entry.get("items", entry.get("entries", [])))
+    return str(entry)
+
+
+def _action_text(action: Action) -> str:
+    return strip_tags(" ".join(_entry_text(e) for e in action.entries))
+
+
+def _join(value) -> str:
+    return ", ".join(value) if isinstance(value, list) else str(value)
+
+
+def statblock_passages(sb: StatBlock) -> List[Passage]:
+    """Split a statblock into a compact header plus one passage per trait/action/spellcasting block."""
+    creature_type = sb.type_.type_ if isinstance(sb.type_, CreatureType) else sb.type_
+    a = sb.abilities
+    header = [
+        f"{sb.size} {creature_type}, CR {sb.cr}, AC {sb.ac}, HP {sb.hp.get('average')} ({sb.hp.get('formula')})",
+        "Speed " + ", ".join(
+            f"{mode} {getattr(value, 'number', value)}" for mode, value in sb.speed.modes.items()
+        ),
+        f"STR {a.str_} DEX {a.dex_} CON {a.con_} INT {a.int_} WIS {a.wis_} CHA {a.cha_}",
+    ]
+    if sb.saves:
+        header.append("Saves " + ", ".join(f"{k} {v}" for k, v in sb.saves.items()))
+    if sb.skills:
+        header.append("Skills " + ", ".join(f"{k} {v}" for k, v in sb.skills.items()))
+    for label, modifier in (("Resist", sb.resist), ("Immune", sb.immune), ("Vulnerable", sb.vulnerable)):
+        if modifier.entries:
+            header.append(f"{label} " + ", ".join(
+                _join(e.types) + f" {e.note}" if hasattr(e, "types") else str(e)
+                for e in modifier.entries
+            ))
+    if sb.conditionImmune:
+        header.append("Condition immune " + ", ".join(sb.conditionImmune))
+    if sb.senses:
+        header.append(f"Senses {_join(sb.senses)}")
+    if sb.languages:
+        header.append(f"Languages {_join(sb.languages)}")
+
+    passages = [Passage("bestiary", sb.name, strip_tags("\n".join(header)), subject=sb.name)]
+    for section, actions in (("Trait", sb.trait), ("Action", sb.action), ("Legendary", sb.legendary or [])):
+        for action in actions:
+            passages.append(Passage(
+                "bestiary", f"{sb.name} — {section}: {action.name}", _action_text(action), subject=sb.name
+            ))
+    for block in sb.spellcasting or []:
+        lines = [strip_tags(" ".join(block.headerEntries))]
+        for level, slot in sorted(block.spells.items()):
+            label = "Cantrips" if level == 0 else f"Level {level}" + (f" ({slot.slots} slots)" if slot.slots else "")
+            lines.append(f"{label}: " + ", ".join(strip_tags(s) for s in slot.spells))
+        if block.footerEntries:
+            lines.append(strip_tags(" ".join(block.footerEntries)))
+        passages.append(Passage(
+            "bestiary", f"{sb.name} — {block.name}", "\n".join(lines), subject=sb.name
+        ))
+    return passages
+
+
+def note_passages(title: str, text: str, max_words: int = 120) -> List[Passage]:
+    """Split a note or transcript into paragraph-sized passages of at most `max_words` words."""
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        for start in range(0, len(words), max_words):
+            chunk = " ".join(words[start:start + max_words])
+            passages.append(Passage("notes", f"{title} §{len(passages) + 1}", chunk))
+    return passages
+
+
+def load_note_files(directory: str | Path, pattern: str = "*.md") -> List[Passage]:
+    """Read every note file in `directory` into passages (missing directory -> no passages)."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    passages = []
+    for path in sorted(directory.glob(pattern)):
+        passages.extend(note_passages(path.stem, path.read_text(encoding="utf-8")))
+    return passages
+
+
+# --- Index ---
+
+
+class PassageIndex:
+    """BM25 inverted index over passages, built once."""
+
+    def __init__(self, passages: Iterable[Passage], k1: float = 1.2, b: float = 0.75):
+        self.passages: List[Passage] = list(passages)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+        self.subjects: Dict[Tuple[str, ...], List[int]] = defaultdict(list)  # name words -> passages
+
+        for pid, passage in enumerate(self.passages):
+            counts: Dict[str, int] = defaultdict(int)
+            terms = tokenize(passage.title + " " + passage.text)
+            for term in terms:
+                counts[term] += 1
+            for term, tf in counts.items():
+                self.postings[term].append((pid, tf))
+            self.lengths.append(len(terms))
+            if passage.subject:
+                self.subjects[tuple(WORD_RE.findall(passage.subject.lower()))].append(pid)
+
+        self.subject_words = max((len(words) for words in self.subjects), default=0)
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def score(self, query: str) -> Dict[int, float]:
+        n = len(self.passages)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for pid, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[pid] / self.avg_length)
+                scores[pid] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        # Passages about a monster named in the question outrank everything else; the
+        # name has to appear as whole words ("shapechanger" does not name the Ape)
+        words = WORD_RE.findall(query.lower())
+        named = {
+            tuple(words[i:i + n])
+            for n in range(1, self.subject_words + 1)
+            for i in range(len(words) - n + 1)
+        }
+        for subject in named:
+            for pid in self.subjects.get(subject, ()):
+                scores[pid] += 100.0
+        return scores
+
+    def rank(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Passage ids by descending score; ties keep index order so results are deterministic."""
+        ranked = sorted(self.score(query).items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+
+# --- Context builder ---
+
+
+@dataclass
+class RetrievedContext:
+    query: str
+    budget: int
+    passages: List[Passage] = field(default_factory=list)
+    truncated: bool = False
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(p.render() for p in self.passages)
+
+    @property
+    def tokens(self) -> int:
+        return sum(p.tokens for p in self.passages)
+
+
+def truncate_to_tokens(passage: Passage, max_tokens: int) -> Optional[Passage]:
+    """Cut a passage at a word boundary so its rendering fits `max_tokens`."""
+    room = max_tokens * 4 - len(passage.title) - 4  # header brackets, newline and ellipsis
+    if room <= 0:
+        return None
+    text = passage.text[:room]
+    if len(text) < len(passage.text):
+        text = text.rsplit(" ", 1)[0] if " " in text else text
+    return Passage(passage.source, passage.title, text + "…", subject=passage.subject)
+
+
+class ContextBuilder:
+    """Ranks statblock sections and note passages for a question and packs them into a token budget."""
+
+    def __init__(
+        self,
+        statblocks: Iterable[StatBlock] = (),
+        notes: Iterable[Passage] = (),
+        budget: int = 1500,
+        min_fragment: int = 40,
+        cache_size: int = 256,
+    ):
+        passages: List[Passage] = []
+        for sb in statblocks:
+            passages.extend(statblock_passages(sb))
+        passages.extend(notes)
+        self.index = PassageIndex(passages)
+        self.budget = budget
+        self.min_fragment = min_fragment
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Tuple[str, int], RetrievedContext] = OrderedDict()
+
+    def build(self, query: str, budget: Optional[int] = None) -> RetrievedContext:
+        budget = budget or self.budget
+        key = (" ".join(query.lower().split()), budget)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        context = RetrievedContext(query=query, budget=budget)
+        remaining = budget
+        for pid, _ in self.index.rank(query):
+            passage = self.index.passages[pid]
+            cost = passage.tokens
+            if cost <= remaining:
+                context.passages.append(passage)
+                remaining -= cost
+                continue
+            # Only the first passage that overflows gets truncated, and only if the remainder is useful
+            if remaining >= self.min_fragment:
+                fragment = truncate_to_tokens(passage, remaining)
+                if fragment is not None:
+                    context.passages.append(fragment)
+            context.truncated = True
+            break
+
+        self._cache[key] = context
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return context
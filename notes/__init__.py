@@ -0,0 +1,2 @@
+from .linker import Entity, EntityLinker, Mention, iter_chunks
+from .store import Note, NoteStore
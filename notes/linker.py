@@ -0,0 +1,298 @@
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from bestiary.stat_block import StatBlock, row_id
+
+# Entity linking: find every mention of a known name (monsters, spells, items,
+# our own NPCs and places) in a transcript, in one pass over the text.
+#
+# Names are matched whole-word and case-insensitively, so the automaton is an
+# Aho-Corasick machine over *words* rather than characters: the text is split
+# into words by a regex, and each word is one transition. Overlapping mentions
+# resolve leftmost-longest ("Goblin King" over "Goblin").
+#
+# Vocabularies change far less often than transcripts are read, but they do
+# change (a new NPC, a refreshed bestiary). New names go into a small delta
+# automaton and removed ones are only hidden, so an edit costs a rebuild of
+# the delta alone; once the delta or the hidden names grow past a fraction of
+# the main automaton, everything is folded into a fresh main automaton.
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def name_words(name: str) -> Tuple[str, ...]:
+    return tuple(w.lower() for w in WORD_RE.findall(name))
+
+
+def _sequences(name: str, aliases: Iterable[str]) -> Set[Tuple[str, ...]]:
+    """Word sequences an entity is known by: its name, its aliases, and their plurals."""
+    sequences = set()
+    for text in [name, *aliases]:
+        words = name_words(text)
+        if words:
+            sequences.add(words)
+            if not words[-1].endswith("s"):
+                sequences.add(words[:-1] + (words[-1] + "s",))
+    return sequences
+
+
+@dataclass(frozen=True)
+class Entity:
+    kind: str  # "monster", "spell", "item", "npc", "place", ...
+    name: str
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.name}"
+
+    @classmethod
+    def parse(cls, text: str):
+        kind, name = text.split(":", 1)
+        return cls(kind, name)
+
+
+@dataclass(frozen=True)
+class Mention:
+    entity: Entity
+    start: int  # character offsets in the whole stream
+    end: int
+
+
+class _Automaton:
+    """Aho-Corasick over word sequences; outputs are indices into `patterns`."""
+
+    def __init__(self, patterns: List[Tuple[Tuple[str, ...], Entity]]):
+        self.patterns = patterns
+        self.goto: List[Dict[str, int]] = [{}]
+        self.out: List[Tuple[int, ...]] = [()]
+        for index, (words, _) in enumerate(patterns):
+            node = 0
+            for word in words:
+                nxt = self.goto[node].get(word)
+                if nxt is None:
+                    nxt = self.goto[node][word] = len(self.goto)
+                    self.goto.append({})
+                    self.out.append(())
+                node = nxt
+            self.out[node] += (index,)
+        self.alphabet: Set[str] = {w for words, _ in patterns for w in words}
+        self.max_words = max((len(words) for words, _ in patterns), default=0)
+
+        # Breadth-first failure links; each node's outputs include those of its failure chain
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and word not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(word, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] += self.out[self.fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def step(self, node: int, word: str) -> int:
+        if word not in self.alphabet:
+            return 0
+        goto, fail = self.goto, self.fail
+        while node and word not in goto[node]:
+            node = fail[node]
+        return goto[node].get(word, 0)
+
+
+class EntityLinker:
+    def __init__(self, merge_fraction: float = 0.125, min_merge: int = 64):
+        self.merge_fraction = merge_fraction
+        self.min_merge = min_merge
+        self._names: Dict[Entity, Set[Tuple[str, ...]]] = {}  # entity -> word sequences it is known by
+        self._main = _Automaton([])
+        self._main_pairs: Set[Tuple[Tuple[str, ...], Entity]] = set()
+        self._delta_pairs: Set[Tuple[Tuple[str, ...], Entity]] = set()
+        self._hidden: Set[Tuple[Tuple[str, ...], Entity]] = set()  # in the main automaton but removed
+        self._delta: Optional[_Automaton] = _Automaton([])
+        self._monsters: Dict[str, Entity] = {}  # catalogue row id -> entity
+        self.rebuilds = 0  # full rebuilds of the main automaton
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, entity: Entity) -> bool:
+        return entity in self._names
+
+    def entities(self, kind: Optional[str] = None) -> List[Entity]:
+        return [e for e in self._names if kind is None or e.kind == kind]
+
+    # --- Vocabulary ---
+
+    def add(self, kind: str, name: str, aliases: Iterable[str] = ()) -> Entity:
+        """Link `name` and its aliases (and their plurals) to an entity; re-adding replaces its aliases."""
+        entity = Entity(kind, name)
+        self.remove(entity)
+        sequences = self._names[entity] = _sequences(name, aliases)
+        for words in sequences:
+            pair = (words, entity)
+            if pair in self._hidden:
+                self._hidden.discard(pair)
+            elif pair not in self._main_pairs:
+                self._delta_pairs.add(pair)
+                self._delta = None
+        return entity
+
+    def remove(self, entity: Entity) -> None:
+        for words in self._names.pop(entity, ()):
+            pair = (words, entity)
+            if pair in self._delta_pairs:
+                self._delta_pairs.discard(pair)
+                self._delta = None
+            elif pair in self._main_pairs:
+                self._hidden.add(pair)
+
+    def set_vocabulary(self, kind: str, names: Mapping[str, Iterable[str]] | Iterable[str]) -> None:
+        """Make `kind` exactly `names` (or a name -> aliases mapping), touching only what differs."""
+        if not isinstance(names, Mapping):
+            names = {name: () for name in names}
+        for entity in self.entities(kind):
+            if entity.name not in names:
+                self.remove(entity)
+        for name, aliases in names.items():
+            if self._names.get(Entity(kind, name)) != _sequences(name, aliases):
+                self.add(kind, name, aliases)
+
+    def add_statblocks(self, statblocks: Iterable[StatBlock]) -> None:
+        for sb in statblocks:
+            self._monsters[row_id(sb.name, sb.source)] = self.add("monster", sb.name, sb.alias)
+
+    def apply_change(self, catalogue, change) -> None:
+        """`Catalogue.subscribe` hook."""
+        for id_ in change.removed + change.changed:
+            entity = self._monsters.pop(id_, None)
+            # The same name can come from several sources; keep it while any is left
+            if entity is not None and entity not in self._monsters.values():
+                self.remove(entity)
+        self.add_statblocks(catalogue.get(id_) for id_ in change.added + change.changed)
+
+    def rebuild(self) -> None:
+        """Fold the delta and the removals into a fresh main automaton."""
+        self._main_pairs = {(words, entity) for entity, sequences in self._names.items() for words in sequences}
+        self._main = _Automaton(sorted(self._main_pairs, key=lambda pair: (pair[0], str(pair[1]))))
+        self._delta_pairs = set()
+        self._hidden = set()
+        self._delta = _Automaton([])
+        self.rebuilds += 1
+
+    # --- Linking ---
+
+    def stream(self) -> "LinkStream":
+        """A linker for one text fed in chunks; later vocabulary edits don't affect it."""
+        # Edits are batched until the next text is read; only then is the delta (or everything) rebuilt
+        pending = len(self._delta_pairs) + len(self._hidden)
+        if pending > max(self.min_merge, self.merge_fraction * len(self._main_pairs)):
+            self.rebuild()
+        elif self._delta is None:
+            self._delta = _Automaton(sorted(self._delta_pairs, key=lambda pair: (pair[0], str(pair[1]))))
+        return LinkStream([a for a in (self._main, self._delta) if len(a)], frozenset(self._hidden))
+
+    def link(self, chunks: Iterable[str] | str) -> List[Mention]:
+        if isinstance(chunks, str):
+            chunks = [chunks]
+        stream = self.stream()
+        mentions = []
+        for chunk in chunks:
+            mentions.extend(stream.feed(chunk))
+        mentions.extend(stream.close())
+        return mentions
+
+
+class LinkStream:
+    """Mentions in a text read chunk by chunk, with offsets into the whole text.
+
+    A word cut by a chunk boundary is held back until the next chunk, and a
+    mention is only reported once no longer mention starting at or before it
+    can still turn up.
+    """
+
+    def __init__(self, automata: List[_Automaton], hidden: frozenset):
+        self._automata = automata
+        self._hidden = hidden
+        self._states = [0] * len(automata)
+        self._window = max((a.max_words for a in automata), default=1)
+        self._spans: deque = deque(maxlen=self._window)  # (start, end) of the latest words
+        self._words = 0  # words read so far
+        self._offset = 0  # characters read so far, not counting the carry
+        self._carry = ""
+        self._pending: List[Tuple[int, int, int, int, Tuple[Entity, ...]]] = []  # first/last word, start, end, entities
+        self._reported = -1  # last word of the latest reported mention
+
+    def feed(self, chunk: str) -> List[Mention]:
+        text = self._carry + chunk
+        base = self._offset
+        # The last word may continue in the next chunk
+        cut = len(text)
+        while cut and WORD_RE.match(text, cut - 1):
+            cut -= 1
+        if cut == 0 and text:
+            self._carry = text
+            return []
+        self._carry = text[cut:]
+        self._offset += cut
+        return self._read(text, base, cut)
+
+    def close(self) -> List[Mention]:
+        text, self._carry = self._carry, ""
+        base = self._offset
+        self._offset += len(text)
+        mentions = self._read(text, base, len(text))
+        mentions.extend(self._resolve(final=True))
+        return mentions
+
+    def _read(self, text: str, base: int, end: int) -> List[Mention]:
+        automata, states, spans, hidden = self._automata, self._states, self._spans, self._hidden
+        mentions = []
+        for match in WORD_RE.finditer(text, 0, end):
+            word = match.group().lower()
+            spans.append((base + match.start(), base + match.end()))
+            last = self._words
+            self._words += 1
+            for k, automaton in enumerate(automata):
+                node = states[k] = automaton.step(states[k], word)
+                for index in automaton.out[node]:
+                    words, entity = automaton.patterns[index]
+                    if (words, entity) in hidden:
+                        continue
+                    first = last - len(words) + 1
+                    if first <= self._reported:
+                        continue  # overlaps a mention already reported
+                    self._pending.append((first, last, spans[first - last - 1][0], base + match.end(), (entity,)))
+            if self._pending:
+                mentions.extend(self._resolve())
+        return mentions
+
+    def _resolve(self, final: bool = False) -> List[Mention]:
+        """Report pending mentions that can no longer be beaten by a longer one starting earlier."""
+        mentions = []
+        pending = self._pending
+        while pending:
+            first = min(p[0] for p in pending)
+            if not final and self._words - first < self._window:
+                break
+            # Leftmost, then longest; the same span from several vocabularies links every entity
+            best_last = max(p[1] for p in pending if p[0] == first)
+            winners = [p for p in pending if p[0] == first and p[1] == best_last]
+            start, end = winners[0][2], winners[0][3]
+            for entity in dict.fromkeys(e for p in winners for e in p[4]):
+                mentions.append(Mention(entity, start, end))
+            self._reported = best_last
+            self._pending = pending = [p for p in pending if p[0] > best_last]
+        return mentions
+
+
+def iter_chunks(path, size: int = 1 << 16) -> Iterator[str]:
+    """Read a text file in chunks of `size` characters."""
+    with open(path, encoding="utf-8") as f:
+        while chunk := f.read(size):
+            yield chunk
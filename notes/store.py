@@ -0,0 +1,142 @@
+import json
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .linker import Entity, EntityLinker
+
+# Session notes and the entities mentioned in them.
+#
+# Each note keeps its entity postings (entity -> character spans in the
+# transcript), and the store keeps the inverted view (entity -> notes), so
+# "every session where the Goblin King appeared" is a dictionary lookup.
+
+Span = Tuple[int, int]
+
+
+@dataclass
+class Note:
+    id: str
+    title: str
+    date: str = ""
+    summary: str = ""
+    transcript: Optional[str] = None  # path of the full transcript
+    length: int = 0  # characters read
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "date": self.date,
+            "summary": self.summary,
+            "transcript": self.transcript,
+            "length": self.length,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**data)
+
+
+class NoteStore:
+    def __init__(self):
+        self.notes: Dict[str, Note] = {}
+        self.postings: Dict[str, Dict[Entity, List[Span]]] = {}  # note id -> entity -> spans
+        self._notes_by_entity: Dict[Entity, Dict[str, int]] = defaultdict(dict)  # entity -> note id -> mentions
+
+    def __len__(self) -> int:
+        return len(self.notes)
+
+    def __contains__(self, note_id: str) -> bool:
+        return note_id in self.notes
+
+    # --- Updates ---
+
+    def ingest(self, note: Note, chunks: Iterable[str], linker: EntityLinker) -> Counter:
+        """Link a transcript read in chunks and store the note with its postings (replacing an older version)."""
+        stream = linker.stream()
+        postings: Dict[Entity, List[Span]] = defaultdict(list)
+        length = 0
+        for chunk in chunks:
+            length += len(chunk)
+            for mention in stream.feed(chunk):
+                postings[mention.entity].append((mention.start, mention.end))
+        for mention in stream.close():
+            postings[mention.entity].append((mention.start, mention.end))
+        note.length = length
+        self._store(note, dict(postings))
+        return Counter({entity: len(spans) for entity, spans in postings.items()})
+
+    def _store(self, note: Note, postings: Dict[Entity, List[Span]]) -> None:
+        self.remove(note.id)
+        self.notes[note.id] = note
+        self.postings[note.id] = postings
+        for entity, spans in postings.items():
+            self._notes_by_entity[entity][note.id] = len(spans)
+
+    def remove(self, note_id: str) -> Optional[Note]:
+        note = self.notes.pop(note_id, None)
+        for entity in self.postings.pop(note_id, {}):
+            notes = self._notes_by_entity[entity]
+            notes.pop(note_id, None)
+            if not notes:
+                del self._notes_by_entity[entity]
+        return note
+
+    # --- Queries ---
+
+    def notes_with(self, entity: Entity) -> List[Tuple[Note, int]]:
+        """Notes mentioning `entity` and how often, most recent first."""
+        found = [(self.notes[id_], count) for id_, count in self._notes_by_entity.get(entity, {}).items()]
+        return sorted(found, key=lambda item: (item[0].date, item[0].id), reverse=True)
+
+    def mentions(self, note_id: str, entity: Entity) -> List[Span]:
+        return self.postings.get(note_id, {}).get(entity, [])
+
+    def entities(self, note_id: Optional[str] = None) -> Counter:
+        """Mention counts by entity, in one note or across all of them."""
+        if note_id is not None:
+            return Counter({e: len(spans) for e, spans in self.postings.get(note_id, {}).items()})
+        return Counter({e: sum(notes.values()) for e, notes in self._notes_by_entity.items()})
+
+    def find(self, name: str) -> List[Entity]:
+        """Mentioned entities called `name` (any kind, case-insensitive)."""
+        name = name.strip().lower()
+        return [e for e in self._notes_by_entity if e.name.lower() == name]
+
+    # --- Storage ---
+
+    def to_dict(self) -> dict:
+        return {
+            "notes": [
+                dict(
+                    self.notes[id_].to_dict(),
+                    postings={str(entity): spans for entity, spans in postings.items()},
+                )
+                for id_, postings in self.postings.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        store = cls()
+        for record in data.get("notes", []):
+            record = dict(record)
+            postings = {Entity.parse(key): [tuple(span) for span in spans]
+                        for key, spans in record.pop("postings", {}).items()}
+            store._store(Note.from_dict(record), postings)
+        return store
+
+    def save(self, filepath: str | Path):
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, filepath: str | Path):
+        """Load a saved store (a missing file gives an empty one)."""
+        path = Path(filepath)
+        if not path.is_file():
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -1,57 +1,43 @@
 import streamlit as st
 import pandas as pd
-from bestiary import StatBlock
-import json
-from collections import defaultdict
+from bestiary.catalogue import Catalogue
+from bestiary.markup import render_action
+from bestiary.query import MonsterQuery, QueryError
+from bestiary.similarity import SimilarityIndex
+from bestiary.table import SUMMARY_COLUMNS, TableView
 
 st.set_page_config(layout="wide")
 
 
-@st.cache_data
-def bestiary_data():
-    with open("data/bestiary/bestiary-mm.json", "r") as f:
-        data = json.load(f)
+@st.cache_resource
+def bestiary_catalogue():
+    catalogue = Catalogue("data/bestiary")
+    catalogue.refresh()
+    # Search indexes follow the catalogue record by record instead of being rebuilt
+    index = SimilarityIndex(catalogue.statblocks())
+    catalogue.subscribe(index.apply_change)
+    return catalogue, index, TableView(catalogue), MonsterQuery(catalogue)
 
-    statblocks = [StatBlock.from_json(item) for item in data["monster"][:500]]
 
-    data_dict = defaultdict(list)
+catalogue, similarity_index, table, queries = bestiary_catalogue()
 
-    df = pd.DataFrame()
 
-    for item in statblocks:
+@st.fragment(run_every=1)
+def watch_bestiary():
+    # Cheap when nothing changed: one stat() per bestiary file
+    if catalogue.refresh():
+        st.rerun()
 
-        try:
-            dictd = item.to_pandas_row()
-        except Exception as e:
-            print("================================")
-            print(e)
-            print(item)
-
-        tdf = pd.DataFrame([dictd])
-        df = pd.concat([df, tdf], ignore_index=True)
-
-    return statblocks, df
-
-
-all_data, df = bestiary_data()
 
+watch_bestiary()
+df = catalogue.df  # one snapshot for the whole run; refreshes swap in a new frame
 
-def cr_edit(cr: str):
-    cr = cr.split(" ")[0]
-    if cr == "0":
-        return 0.0
-    elif cr == "1/8":
-        return 0.125
-    elif cr == "1/4":
-        return 0.25
-    elif cr == "1/2":
-        return 0.5
-    else:
-        return float(cr)
+load_errors = [str(e) for errors in catalogue.errors.values() for e in errors]
+if load_errors:
+    with st.expander(f"⚠️ {len(load_errors)} monsters could not be loaded"):
+        st.text("\n".join(load_errors))
 
 
-df["cr_float"] = df["cr"].apply(cr_edit)
-
 st.text_input("Search", key="search")
 st.select_slider(
     "CR filter",
@@ -72,9 +58,97 @@ if st.session_state.CR_limit:
     mask_cr = mask_cr & (df["cr_float"] <= st.session_state.CR_limit[1])
     mask = mask & mask_cr
 
-sel = st.dataframe(
-    df[mask], hide_index=True, selection_mode="multi-row", on_select="rerun"
+with st.expander("Advanced query"):
+    st.text_input(
+        "Query",
+        key="advanced_query",
+        placeholder="cr >= 5 and type = dragon and immune:fire and speed.fly > 60 and str > 20",
+        help="Fields: name, type, size, source, alignment, languages, senses, group (=, !=, ~ contains); "
+        "cr, ac, hp, str..cha, pb, xp, passive, speed.walk/fly/swim/climb/burrow (=, !=, <, <=, >, >=). "
+        "Flags: immune:fire, resist:cold, vulnerable:x, condition:charmed, speed:fly, speed:hover, "
+        "has:legendary, has:lair. Combine with and, or, not and parentheses.",
+    )
+    if st.session_state.advanced_query:
+        try:
+            query_mask, explain = queries.run(st.session_state.advanced_query, df)
+            mask = mask & query_mask
+            st.code(str(explain), language=None)
+        except QueryError as e:
+            st.error(str(e))
+
+# --- Table: one page of summary columns, selection kept by row id ---
+
+if "selected_ids" not in st.session_state:
+    st.session_state.selected_ids = {}  # row id -> None, in selection order
+
+
+def sync_selection():
+    # Only the rows on the page that was displayed can have been (de)selected
+    rows = st.session_state.monster_table["selection"]["rows"]
+    shown = st.session_state.table_ids
+    for id_ in shown:
+        st.session_state.selected_ids.pop(id_, None)
+    for pos in rows:
+        st.session_state.selected_ids[shown[pos]] = None
+
+
+cols = st.columns([2, 1, 1, 1])
+cols[0].selectbox("Sort by", SUMMARY_COLUMNS, key="sort_by")
+cols[1].toggle("Descending", key="sort_desc")
+cols[2].selectbox("Rows per page", [25, 50, 100], index=1, key="page_size")
+window = table.window(
+    mask,
+    sort_by=st.session_state.sort_by,
+    ascending=not st.session_state.sort_desc,
+    page=st.session_state.get("page", 1) - 1,
+    page_size=st.session_state.page_size,
+    df=df,
 )
-
-if sel:
-    st.write(sel)
+if st.session_state.get("page", 1) > window.pages:
+    st.session_state.page = window.pages  # the filter shrank the result
+cols[3].number_input(f"Page (of {window.pages})", 1, window.pages, key="page")
+
+st.session_state.table_ids = window.ids
+st.dataframe(
+    window.rows,
+    hide_index=True,
+    selection_mode="multi-row",
+    on_select=sync_selection,
+    key="monster_table",
+)
+st.caption(f"{window.total} monsters, showing {len(window.rows)}")
+
+selected = [id_ for id_ in st.session_state.selected_ids if catalogue.get(id_) is not None]
+if selected:
+    st.subheader(f"Selected ({len(selected)})")
+    if st.button("Clear selection"):
+        st.session_state.selected_ids = {}
+        st.rerun()
+    for id_ in selected:
+        with st.expander(id_):
+            statblock = catalogue.get(id_)
+            for section in ("trait", "action", "legendary"):
+                for action in getattr(statblock, section) or []:
+                    st.markdown(f"**{action.name}.** {render_action(action)}")
+
+with st.expander("Find similar monsters"):
+    cols = st.columns([2, 2, 1, 1])
+    cols[0].selectbox("Like", sorted(df["name"]), key="similar_to")
+    cols[1].multiselect("Must have speed", ["fly", "swim", "climb", "burrow", "hover"], key="similar_movement")
+    cols[2].selectbox("Metric", ["cosine", "euclidean"], key="similar_metric")
+    cols[3].number_input("Results", 1, 50, 10, key="similar_k")
+
+    neighbours = similarity_index.nearest(
+        st.session_state.similar_to,
+        k=st.session_state.similar_k,
+        metric=st.session_state.similar_metric,
+        cr=tuple(st.session_state.CR_limit),
+        movement=st.session_state.similar_movement,
+    )
+    st.dataframe(
+        pd.DataFrame([
+            {"name": sb.name, "source": sb.source, "cr": sb.derived.cr, "score": round(score, 3)}
+            for sb, score in neighbours
+        ]),
+        hide_index=True,
+    )
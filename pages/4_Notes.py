@@ -1,4 +1,9 @@
 import streamlit as st
+import json
+import re
+from pathlib import Path
+from bestiary.catalogue import Catalogue
+from notes import EntityLinker, Note, NoteStore, iter_chunks
 
 st.markdown("""# Notes
 
@@ -6,4 +11,97 @@ st.markdown("""# Notes
     a. Each note has a date, and details such as places, main characters, etc.
     b. Also a short summary and a long summary.
     c. Plus a link to the full transcript???
-2. Can be searched by similarity search or exact term search.""")
\ No newline at end of file
+2. Can be searched by similarity search or exact term search.""")
+
+NOTES_DIR = Path("data/notes")
+INDEX_FILE = NOTES_DIR / "index.json"  # notes and their entity postings
+VOCABULARY_FILE = NOTES_DIR / "vocabulary.json"  # our own names: {"npc": [...], "place": [...]}
+KINDS = ("npc", "place")
+
+
+@st.cache_resource
+def entity_linker():
+    # Monster names follow the bestiary; NPCs and places come from our own lists
+    linker = EntityLinker()
+    catalogue = Catalogue("data/bestiary")
+    catalogue.refresh()
+    linker.add_statblocks(catalogue.statblocks())
+    catalogue.subscribe(linker.apply_change)
+    if VOCABULARY_FILE.is_file():
+        for kind, names in json.loads(VOCABULARY_FILE.read_text(encoding="utf-8")).items():
+            linker.set_vocabulary(kind, names)
+    return linker, catalogue
+
+
+@st.cache_resource
+def note_store():
+    return NoteStore.load(INDEX_FILE)
+
+
+linker, catalogue = entity_linker()
+store = note_store()
+catalogue.refresh()  # a stat() per file; changed monsters patch the linker
+
+
+def snippet(note: Note, start: int, end: int, context: int = 80) -> str:
+    if not note.transcript or not Path(note.transcript).is_file():
+        return ""
+    text = Path(note.transcript).read_text(encoding="utf-8")
+    before = text[max(start - context, 0):start].split("\n")[-1]
+    after = text[end:end + context].split("\n")[0]
+    return f"…{before}**{text[start:end]}**{after}…"
+
+
+with st.expander("🧙 NPCs and places"):
+    with st.form("vocabulary_form"):
+        lists = {
+            kind: st.text_area(f"{kind.upper()}s (one per line)", "\n".join(e.name for e in linker.entities(kind)))
+            for kind in KINDS
+        }
+        if st.form_submit_button("Save"):
+            vocabulary = {kind: [line.strip() for line in text.splitlines() if line.strip()]
+                          for kind, text in lists.items()}
+            for kind, names in vocabulary.items():
+                linker.set_vocabulary(kind, names)
+            NOTES_DIR.mkdir(parents=True, exist_ok=True)
+            VOCABULARY_FILE.write_text(json.dumps(vocabulary, indent=2), encoding="utf-8")
+            st.caption("Sessions added from now on link the new names.")
+
+with st.expander("➕ Add a session"):
+    with st.form("note_form", clear_on_submit=True):
+        title = st.text_input("Title")
+        date = st.date_input("Date")
+        summary = st.text_area("Summary")
+        uploaded = st.file_uploader("Transcript", type=["txt", "md"])
+        if st.form_submit_button("Add") and title and uploaded:
+            note_id = re.sub(r"[^a-z0-9]+", "-", f"{date} {title}".lower()).strip("-")
+            NOTES_DIR.mkdir(parents=True, exist_ok=True)
+            path = NOTES_DIR / f"{note_id}.md"
+            path.write_bytes(uploaded.getvalue())  # also read by the LLM page as note passages
+            note = Note(note_id, title, date=str(date), summary=summary, transcript=str(path))
+            found = store.ingest(note, iter_chunks(path), linker)
+            store.save(INDEX_FILE)
+            st.success(f"Linked {sum(found.values())} mentions of {len(found)} names.")
+
+st.subheader(f"Sessions ({len(store)})")
+for note in sorted(store.notes.values(), key=lambda n: n.date, reverse=True):
+    with st.expander(f"{note.date} — {note.title}"):
+        if note.summary:
+            st.markdown(note.summary)
+        top = store.entities(note.id).most_common(15)
+        st.caption(", ".join(f"{e.name} ×{n}" for e, n in top) or "No known names")
+
+st.subheader("Who appeared where")
+counts = store.entities()
+if counts:
+    entity = st.selectbox(
+        "Name",
+        [e for e, _ in counts.most_common()],
+        format_func=lambda e: f"{e.name} ({e.kind}, {counts[e]} mentions)",
+    )
+    for note, n in store.notes_with(entity):
+        st.markdown(f"**{note.date} — {note.title}**: {n} mentions")
+        first = store.mentions(note.id, entity)[0]
+        text = snippet(note, *first)
+        if text:
+            st.markdown(text)
@@ -1,4 +1,6 @@
 import streamlit as st
+from bestiary.decoder import load_bestiary_file
+from llm import ContextBuilder, load_note_files
 
 st.markdown("""# LLM Window
 
@@ -6,4 +8,25 @@ st.markdown("""# LLM Window
 2. Maybe some switches for different LLM prompts.
    a. Generate a new name
    b. Resolve a rule conflict
-""")
\ No newline at end of file
+""")
+
+
+@st.cache_resource
+def context_builder():
+    statblocks = load_bestiary_file("data/bestiary/bestiary-mm.json").statblocks
+    return ContextBuilder(statblocks, notes=load_note_files("data/notes"))
+
+
+builder = context_builder()
+
+st.text_input("Rules question", key="llm_question")
+st.slider("Context budget (tokens)", 250, 4000, 1500, step=250, key="llm_budget")
+
+if st.session_state.llm_question:
+    context = builder.build(st.session_state.llm_question, budget=st.session_state.llm_budget)
+    st.caption(
+        f"{len(context.passages)} passages, ~{context.tokens}/{context.budget} tokens"
+        + (" (truncated)" if context.truncated else "")
+    )
+    with st.expander("Retrieved context"):
+        st.text(context.text)
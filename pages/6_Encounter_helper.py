@@ -1,5 +1,14 @@
 import streamlit as st
-from combat import Combatant, Action, Encounter, default_encounter
+import combat
+from combat import Encounter, EncounterRegistry
+from combat.effects import CONDITIONS, ConditionImmune
+from combat.live import LiveBroadcaster
+from combat.registry import valid_encounter_id
+from bestiary.catalogue import Catalogue
+from bestiary.decoder import decode_monster_pair
+from bestiary.fuzzy import NameIndex
+from bestiary.markup import render_action, render_entries, render_text
+from contextlib import contextmanager
 from math import ceil
 import json
 
@@ -17,10 +26,63 @@ elif st.session_state.rerun:
 
 # === Decorated dialogs ===
 
+LIVE_VIEW_PORT = 8765
+# Only this machine can open the player view; "0.0.0.0" lets other devices on the network in
+LIVE_VIEW_HOST = "127.0.0.1"
+
+
+@st.cache_resource
+def encounter_registry():
+    # Shared by every session, so a second screen can open the same encounter id
+    return EncounterRegistry()
+
+
+@st.cache_resource
+def live_broadcaster():
+    # Read-only player view, pushed over a websocket; None if the port is taken
+    try:
+        return LiveBroadcaster(encounter_registry(), host=LIVE_VIEW_HOST, port=LIVE_VIEW_PORT).start()
+    except OSError:
+        return None
+
+
+registry = encounter_registry()
+broadcaster = live_broadcaster()
+
+
+@st.cache_resource
+def monster_index():
+    # Typo-tolerant index over monster names, patched as the bestiary files change
+    catalogue = Catalogue("data/bestiary")
+    catalogue.refresh()
+    names = NameIndex(catalogue.statblocks())
+    catalogue.subscribe(names.apply_change)
+    return names, catalogue
+
+
+monster_names, catalogue = monster_index()
+catalogue.refresh()  # a stat() per file; changed monsters patch the name index
+
+
+@st.cache_resource(max_entries=256)
+def combat_template(id_: str, digest: str):
+    # Only a monster that is actually added needs its combat statblock; the digest keys out edited ones
+    entry = catalogue.entries[id_]
+    _, statblock = decode_monster_pair(catalogue.record(id_), source=entry.path.name)
+    return statblock
+
+
+@contextmanager
+def edit_combatant(name: str):
+    """Mutate a combatant under the encounter's lock (the rendered copy may have been spilled since)."""
+    with registry.edit(encounter_id) as encounter:
+        yield next(c for c in encounter.combatants if c.name == name)
+
+
 @st.dialog("💾 Save Battle")
 def show_save_dialog():
-    if "battle" in st.session_state and st.session_state.battle is not None:
-        battle_json = json.dumps(st.session_state.battle.to_dict(), indent=2)
+    if encounter_id in registry:
+        battle_json = json.dumps(registry.get(encounter_id).to_dict(), indent=2)
         st.download_button(
             label="📥 Download Battle JSON",
             data=battle_json.encode("utf-8"),
@@ -38,7 +100,7 @@ def show_load_dialog():
         try:
             contents = uploaded_file.read()
             data = json.loads(contents)
-            st.session_state.battle = Encounter.from_dict(data)
+            registry.replace(encounter_id, Encounter.from_dict(data))
             st.success("✅ Battle loaded successfully!")
             st.session_state.rerun = True  # Trigger a rerun to refresh the UI with the new data
             st.rerun()
@@ -47,15 +109,19 @@ def show_load_dialog():
 
 
 # --- Session Setup ---
-if 'battle' not in st.session_state:
-    # Example data
-    combatants = default_encounter
-    st.session_state.battle = Encounter(combatants)
+encounter_id = st.query_params.get("encounter")
+if not valid_encounter_id(encounter_id):
+    encounter_id = None  # missing, or not an id we hand out
+if encounter_id is None or encounter_id not in registry:
+    # Example data, copied so sessions never share combatant objects; only kept once edited
+    example = Encounter.from_dict(Encounter(combat.default_encounter).to_dict())
+    encounter_id = registry.create(example, encounter_id, scratch=True)
+    st.query_params["encounter"] = encounter_id
 
 if "selected_combatant" not in st.session_state:
     st.session_state.selected_combatant = None
 
-battle: Encounter = st.session_state.battle
+battle: Encounter = registry.get(encounter_id)
 current = battle.get_current()
 
 # --- Page Title ---
@@ -77,6 +143,9 @@ st.markdown(
 )
 
 
+ABILITY_LABELS = ("STR", "DEX", "CON", "INT", "WIS", "CHA")
+
+
 def render_combatant_card(combatant, is_current=False):
     # # Create button that acts like a card
 
@@ -95,6 +164,9 @@ def render_combatant_card(combatant, is_current=False):
             st.subheader(f"{text}")
 
         st.write(f"**Initiative:** {combatant.initiative}")
+        for effect in battle.effects.on(combatant.id):
+            save = f", {effect.save_ability.upper()} {effect.save_dc}" if effect.save_ability else ""
+            st.caption(f":orange[{effect.name}]" + (f" ({effect.condition}{save})" if effect.condition or save else ""))
 
         if combatant.is_pc:
 
@@ -105,40 +177,36 @@ def render_combatant_card(combatant, is_current=False):
         #with st.container(border=True):
         fmt_cols_5 = [1.5,2,0.25,1.5,2]
 
+        derived = combatant.statblock.derived
+
         cols = st.columns(fmt_cols_5)
         cols[0].write("HP")
         cols[1].write(f"{combatant.HP}/{combatant.statblock.max_HP}")
         cols[3].write("AC")
-        cols[4].write(f"{combatant.statblock.armor_class}")
+        cols[4].write(f"{derived.ac}")
 
-        cols = st.columns(fmt_cols_5)
-        cols[0].write("STR")
-        cols[3].write("INT")
-        cols[1].write(f"{combatant.statblock.abilities.STR} ({combatant.statblock.abilities.get_modifier('STR')})")
-        cols[4].write(f"{combatant.statblock.abilities.INT} ({combatant.statblock.abilities.get_modifier('INT')})")
-
-        cols = st.columns(fmt_cols_5)
-        cols[0].write("CON")
-        cols[1].write(f"{combatant.statblock.abilities.CON} ({combatant.statblock.abilities.get_modifier('CON')})")
-        cols[3].write("WIS")
-        cols[4].write(f"{combatant.statblock.abilities.WIS} ({combatant.statblock.abilities.get_modifier('WIS')})")
-
-        cols = st.columns(fmt_cols_5)
-        cols[0].write("DEX")
-        cols[3].write("CHA")
-        cols[1].write(f"{combatant.statblock.abilities.DEX} ({combatant.statblock.abilities.get_modifier('DEX')})")
-        cols[4].write(f"{combatant.statblock.abilities.CHA} ({combatant.statblock.abilities.get_modifier('CHA')})")
+        # Left column STR/CON/DEX, right column INT/WIS/CHA, as on the printed sheet
+        for left, right in ((0, 3), (2, 4), (1, 5)):
+            cols = st.columns(fmt_cols_5)
+            cols[0].write(ABILITY_LABELS[left])
+            cols[1].write(f"{derived.scores[left]} ({derived.modifiers[left]:+d})")
+            cols[3].write(ABILITY_LABELS[right])
+            cols[4].write(f"{derived.scores[right]} ({derived.modifiers[right]:+d})")
 
         st.write(str(combatant.statblock.speed))
-        if combatant.statblock.senses:
-            print(combatant.statblock.senses)
         if combatant.statblock.saves:
-            print(combatant.statblock.saves)
+            st.caption("**Saves** " + ", ".join(
+                f"{k.upper()} {derived.save(k):+d}" for k in combatant.statblock.saves
+            ))
+        if combatant.statblock.senses:
+            st.caption(f"**Senses** {render_text(combatant.statblock.senses)}")
+        if combatant.statblock.languages:
+            st.caption(f"**Languages** {render_text(combatant.statblock.languages)}")
 
         if combatant.statblock.traits:
-            print(combatant.statblock.traits)
-        if combatant.statblock.languages:
-            print(combatant.statblock.languages)
+            with st.expander("Traits"):
+                for trait in combatant.statblock.traits:
+                    st.markdown(f"**{trait.name}.** {render_action(trait)}")
 
 
         for action in combatant.statblock.actions:
@@ -150,7 +218,9 @@ def render_combatant_card(combatant, is_current=False):
                                  disabled=not (action.available and is_current),
                                  use_container_width=True):
                         if action.recharge:
-                            action.available = False  # Only mark unavailable if it's rechargeable
+                            with edit_combatant(combatant.name) as target:
+                                # Only mark unavailable if it's rechargeable
+                                next(a for a in target.statblock.actions if a.name == action.name).available = False
                         st.rerun()
                 else:
                     st.button(f"❌",
@@ -158,7 +228,11 @@ def render_combatant_card(combatant, is_current=False):
                               key=f"action_{combatant.name}_{action.name}",
                               use_container_width=True)
             with cols[1]:
-                st.write(f"{action.name}")
+                if action.entries:
+                    with st.expander(action.name):
+                        st.markdown(render_action(action))
+                else:
+                    st.write(f"{action.name}")
 
 # --- Render All Combatants as Cards ---
 cards_per_row = 6
@@ -176,6 +250,22 @@ for row in range(num_rows):
 
 with st.sidebar:
     st.subheader(f"Round {battle.round}")
+    st.caption(f"Encounter `{encounter_id}`: open this page with `?encounter={encounter_id}` on another screen")
+    if broadcaster is not None:
+        st.caption(
+            f"Player view: port {broadcaster.port}, `/?encounter={encounter_id}` "
+            f"({broadcaster.subscriber_count(encounter_id)} watching)"
+        )
+
+    with st.expander("➕ Quick add", expanded=True):
+        query = st.text_input("Monster", key="quick_add", placeholder="owlbear")
+        count = st.number_input("How many", 1, 20, 1, key="quick_add_count")
+        for match in monster_names.search(query, k=5):
+            source = match.id.split(":", 1)[0]
+            if st.button(f"{match.name} ({source})", key=f"quick_add_{match.id}", use_container_width=True):
+                with registry.edit(encounter_id) as encounter:
+                    encounter.spawn(combat_template(match.id, catalogue.entries[match.id].digest), count)
+                st.rerun()
 
     if st.button("💾 Save Battle", use_container_width=True,):
         show_save_dialog()
@@ -184,9 +274,87 @@ with st.sidebar:
         show_load_dialog()
 
     if st.button("➡️ Next Turn", use_container_width=True, type="primary"):
-        battle.next_turn()
+        with registry.edit(encounter_id) as battle:
+            battle.next_turn()
         st.rerun()
 
+    cols = st.columns(2)
+    if cols[0].button("🎲 Initiative", use_container_width=True, disabled=len(battle.effects) > 0,
+                      help="Roll d20 + DEX for every monster"):
+        with registry.edit(encounter_id) as battle:
+            battle.roll_initiative()
+        st.rerun()
+    if cols[1].button("🎲 Monster HP", use_container_width=True, help="Roll each monster's hit dice"):
+        with registry.edit(encounter_id) as battle:
+            battle.roll_hit_points()
+        st.rerun()
+    st.caption(f"Dice seed `{battle.seed}`")
+
+    for event in battle.last_events:
+        target = battle.combatant(event.effect.target)
+        who = target.name if target else "?"
+        if event.kind == "expired":
+            st.info(f"⌛ {event.effect.name} ended on {who}")
+        else:
+            st.warning(f"🎲 {who}: {event.effect.save_ability.upper()} save DC {event.effect.save_dc} against {event.effect.name}")
+
+    for group in battle.lair_actions_due():
+        with st.container(border=True):
+            st.subheader(f"🏰 {group.name} lair (initiative 20)")
+            st.markdown(render_entries(group.lairActions))
+
+    regional = battle.regional_groups()
+    if regional:
+        with st.expander("🌍 Regional effects"):
+            for group in regional:
+                st.markdown(f"**{group.name}**")
+                st.markdown(render_entries(group.regionalEffects))
+
+    with st.expander("🗺️ Terrain"):
+        if battle.terrain is not None:
+            st.caption(f"{battle.terrain.width} x {battle.terrain.height} squares; saved with the battle")
+        with st.form("terrain_form"):
+            cols = st.columns(2)
+            width = cols[0].number_input("Width (squares)", 5, 500, 40)
+            height = cols[1].number_input("Height (squares)", 5, 500, 40)
+            if st.form_submit_button("New open map"):
+                from combat.pathing import TerrainMap
+
+                with registry.edit(encounter_id) as encounter:
+                    encounter.set_terrain(TerrainMap(int(width), int(height)))
+                st.rerun()
+
+    placed = [c for c in battle.combatants if c.position is not None]
+    if placed:
+        with st.expander("💥 Area of effect"):
+            from combat.grid import footprint, token_center  # NumPy only once tokens are on the grid
+
+            names = {c.id: c.name for c in placed}
+            shape = st.selectbox("Shape", ["sphere", "cone", "line", "cube"], key="aoe_shape")
+            size_ft = st.number_input("Size (ft)", 5, 300, 20, step=5, key="aoe_size",
+                                      help="Radius of a sphere, length of a cone or line, side of a cube")
+            origin_id = st.selectbox("Centered on" if shape == "sphere" else "From", list(names),
+                                     format_func=names.get, key="aoe_origin")
+            origin_c = battle.combatant(origin_id)
+            origin = token_center(*origin_c.position, footprint(origin_c.statblock.size))
+            if shape == "sphere":
+                hit = battle.grid.sphere(origin, size_ft)
+            else:
+                toward_id = st.selectbox("Toward", [i for i in names if i != origin_id] or [origin_id],
+                                         format_func=names.get, key="aoe_toward")
+                toward_c = battle.combatant(toward_id)
+                toward = token_center(*toward_c.position, footprint(toward_c.statblock.size))
+                direction = (toward[0] - origin[0], toward[1] - origin[1])
+                if direction == (0, 0):
+                    hit = []
+                elif shape == "cone":
+                    hit = battle.grid.cone(origin, direction, size_ft)
+                elif shape == "line":
+                    hit = battle.grid.line(origin, direction, size_ft)
+                else:
+                    hit = battle.grid.cube(origin, direction, size_ft)
+            st.write(", ".join(names[i] for i in hit if i in names) or "Nobody")
+
     if st.session_state.selected_combatant:
 
         combatant_names = [c.name for c in battle.combatants]
@@ -196,13 +364,67 @@ with st.sidebar:
         if selected_combatant:
             with st.container(border=True):
                 st.subheader(f"{st.session_state.selected_combatant}")
-                st.text(f"Hit Points: {selected_combatant.statblock.HP}/{selected_combatant.statblock.max_HP}")
+                st.text(f"Hit Points: {selected_combatant.HP}/{selected_combatant.statblock.max_HP}")
                 st.text(f"Initiative: {selected_combatant.initiative}")
+            with st.form(f"position_form_{selected_name}"):
+                x0, y0 = selected_combatant.position or (0, 0)
+                cols = st.columns(2)
+                x = cols[0].number_input("Square x", 0, 500, x0)
+                y = cols[1].number_input("Square y", 0, 500, y0)
+                if st.form_submit_button("Place on grid"):
+                    with registry.edit(encounter_id) as encounter:
+                        encounter.move(selected_combatant.id, (int(x), int(y)))
+                    st.rerun()
+            if battle.terrain is not None and selected_combatant.position is not None:
+                reach = battle.reach(selected_combatant.id)
+                dash = battle.reach(selected_combatant.id, dash=True)
+                st.caption(f"🦶 Can reach {len(reach)} squares this turn ({len(dash)} with Dash)")
+
             with st.form(f"adjust_hp_form_{selected_name}"):
                 hp_delta = st.number_input("Damage (positive) or healing (negative)", value=0)
                 if st.form_submit_button("Apply Change"):
-                    if hp_delta >= 0:
-                        selected_combatant.take_damage(hp_delta)
-                    else:
-                        selected_combatant.heal(-hp_delta)
+                    with edit_combatant(selected_name) as target:
+                        if hp_delta >= 0:
+                            target.take_damage(hp_delta)
+                        else:
+                            target.heal(-hp_delta)
                     st.rerun()  # Force refresh so the cards update
+
+            with st.form(f"apply_effect_form_{selected_name}"):
+                names = {c.id: c.name for c in battle.combatants}
+                effect_name = st.text_input("Effect", placeholder="Hold Person")
+                condition = st.selectbox("Condition", (None,) + CONDITIONS)
+                duration = st.radio("Lasts", ["until removed", "rounds", "until end of source's next turn"])
+                rounds = st.number_input("Rounds", 1, 100, 10)
+                source_id = st.selectbox("Source", [None] + list(names), format_func=lambda i: names.get(i, "-"))
+                concentration = st.checkbox("Concentration")
+                cols = st.columns(2)
+                save_ability = cols[0].selectbox("Repeat save", (None, "str", "dex", "con", "int", "wis", "cha"))
+                save_dc = cols[1].number_input("DC", 1, 30, 13)
+                until_source_turn = duration == "until end of source's next turn"
+                if st.form_submit_button("Apply Effect"):
+                    if until_source_turn and source_id is None:
+                        st.error("❌ Pick the source whose next turn ends the effect")
+                    else:
+                        try:
+                            with registry.edit(encounter_id) as encounter:
+                                encounter.apply_effect(
+                                    selected_combatant.id,
+                                    effect_name or condition or "Effect",
+                                    condition=condition,
+                                    rounds=rounds if duration == "rounds" else None,
+                                    until=("end", source_id) if until_source_turn else None,
+                                    source_id=source_id,
+                                    concentration=concentration,
+                                    save_ability=save_ability,
+                                    save_dc=save_dc if save_ability else None,
+                                )
+                            st.rerun()
+                        except ConditionImmune as e:
+                            st.warning(str(e))
+
+            for effect in battle.effects.on(selected_combatant.id):
+                if st.button(f"End {effect.name}", key=f"end_effect_{effect.id}", use_container_width=True):
+                    with registry.edit(encounter_id) as encounter:
+                        encounter.end_effect(effect.id)
+                    st.rerun()
@@ -0,0 +1,86 @@
+import streamlit as st
+from bestiary.catalogue import Catalogue
+from bestiary.cube import DIMENSIONS, FLAGS, METRICS, StatCube
+
+st.set_page_config(layout="wide")
+
+st.markdown("""# Bestiary stats
+
+Balance numbers for homebrew: typical stats by CR, type, size and source.""")
+
+METRIC_LABELS = {
+    "ac": "AC", "hp": "HP", "to_hit": "Best to-hit", "dc": "Best save DC", "passive": "Passive Perception",
+    "walk": "Walk speed", "fly": "Fly speed",
+    "str": "STR", "dex": "DEX", "con": "CON", "int": "INT", "wis": "WIS", "cha": "CHA",
+}
+
+
+@st.cache_resource
+def bestiary_cube():
+    catalogue = Catalogue("data/bestiary")
+    catalogue.refresh()
+    # Every chart reads the cube; a changed bestiary file only patches the cells of its monsters
+    cube = StatCube(catalogue.statblocks())
+    catalogue.subscribe(cube.apply_change)
+    return catalogue, cube
+
+
+catalogue, cube = bestiary_cube()
+
+
+@st.fragment(run_every=1)
+def watch_bestiary():
+    if catalogue.refresh():
+        st.rerun()
+
+
+watch_bestiary()
+
+# --- Filters ---
+
+with st.sidebar:
+    st.header("Filter")
+    cr_range = st.select_slider(
+        "CR",
+        options=[0, 0.125, 0.25, 0.5] + [i for i in range(1, 21)] + [25, 30],
+        value=(0, 30),
+    )
+    where = {"cr": cr_range}
+    for dim in ("type", "size", "source"):
+        chosen = st.multiselect(dim.capitalize(), cube.values(dim))
+        if chosen:
+            where[dim] = set(chosen)
+
+st.caption(f"{len(cube)} monsters")
+
+# --- Stats by group ---
+
+cols = st.columns([2, 1])
+metric = cols[0].selectbox("Stat", METRICS, format_func=METRIC_LABELS.get)
+by = cols[1].selectbox("By", DIMENSIONS, format_func=str.upper)
+
+result = cube.rollup(metrics=[metric], by=[by], where=where)
+frame = result.frame
+st.caption(f"{result.cells} cells rolled up in {result.milliseconds:.1f} ms")
+if frame.empty:
+    st.info("No monsters match the filter.")
+else:
+    quantiles = [c for c in frame.columns if c.startswith(f"{metric}_")]
+    if by == "cr":
+        st.line_chart(frame[quantiles])
+    else:
+        st.bar_chart(frame[f"{metric}_median"])
+    st.dataframe(frame.rename(columns=lambda c: c.removeprefix(f"{metric}_")), use_container_width=True)
+
+# --- Traits ---
+
+st.subheader("How common is…")
+cols = st.columns([2, 1])
+flags = cols[0].multiselect("Trait", FLAGS, default=["immune:fire"])
+flag_by = cols[1].selectbox("By", DIMENSIONS, index=1, format_func=str.upper, key="flag_by")
+if flags:
+    result = cube.flag_share(flags, by=[flag_by], where=where)
+    st.caption(f"{result.cells} cells rolled up in {result.milliseconds:.1f} ms")
+    if not result.frame.empty:
+        st.bar_chart(result.frame[[f"{flag} share" for flag in flags]])
+        st.dataframe(result.frame, use_container_width=True)